@@ -0,0 +1,294 @@
+import argparse
+import gc
+import json
+import multiprocessing
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from benchmarks import reference_engines as reference
+from benchmarks.memory_footprint import CONNECT4_DRAW, TICTACTOE_DRAW
+from errors.input_error import InputError
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+
+# Micro-benchmarks of the pure game logic, each case run against the engine
+# and against the original scan-based code in reference_engines:
+#
+#   python -m benchmarks.engines bench [--json]
+#   python -m benchmarks.engines diff --games 1000000 --processes 8
+#
+# diff plays random games, with invalid and out-of-turn moves mixed in,
+# through both and exits non-zero on the first divergence.
+
+ADVERSARIAL_MOVES = ("x", "", "3", -1, 7, 9, 100, 2.0)
+ADVERSARIAL_CODES = ("1123", "0123", "abcd", "99999", "999", " 123", "12 4", "-123", "1e34", "9876", "1023")
+
+
+def new_game(cls, seats: int = 2):
+    game = cls("bench")
+    for seat in range(seats):
+        game.add_player(game.new_player(f"player-{seat}", f"sid-{seat}", seat, uuid=f"uuid-{seat}"))
+    return game
+
+
+def random_moves(rng: random.Random, cols: int, rows: int) -> List[int]:
+    # A random legal sequence, possibly running past the first win
+    heights = [0] * cols
+    moves = []
+    while True:
+        free = [col for col in range(cols) if heights[col] < rows]
+        if not free:
+            return moves
+        col = rng.choice(free)
+        heights[col] += 1
+        moves.append(col)
+
+
+def played(cls, moves: Sequence[int]):
+    # The game after as many of moves as it accepts
+    game = new_game(cls)
+    for move in moves:
+        if game.state.is_game_over:
+            break
+        game.play(game.state.who_will_play, move)
+    return game
+
+
+def reference_played(cls, moves: Sequence[int]):
+    game = cls()
+    for move in moves:
+        if game.over:
+            break
+        game.play(game.to_move, move)
+    return game
+
+
+class Case:
+    def __init__(self, name: str, inputs: List, engine: Callable, oracle: Callable):
+        self.name = name
+        self.inputs = inputs
+        self.engine = engine
+        self.oracle = oracle
+
+
+def build_cases(rng: random.Random, positions: int) -> List[Case]:
+    c4_random = [random_moves(rng, 7, 6) for _ in range(positions)]
+    # Prefixes of a drawn game: full boards without a line, where scans cannot stop early
+    c4_adversarial = [CONNECT4_DRAW[:n] for n in range(len(CONNECT4_DRAW) - positions // 4, len(CONNECT4_DRAW) + 1)]
+    c4_sequences = [moves[:rng.randrange(len(moves) + 1)] for moves in c4_random] + c4_adversarial
+    c4_games = [played(Connect4Game, moves) for moves in c4_sequences]
+    c4_reference = [reference_played(reference.ReferenceConnect4, moves) for moves in c4_sequences]
+    c4_columns = [(i, rng.randrange(7)) for i in range(len(c4_games))]
+
+    ttt_random = [rng.sample(range(9), 9) for _ in range(positions)]
+    ttt_sequences = [moves[:rng.randrange(10)] for moves in ttt_random] + [TICTACTOE_DRAW[:n] for n in range(10)]
+    ttt_games = [played(TicTacToeGame, moves) for moves in ttt_sequences]
+    ttt_reference = [reference_played(reference.ReferenceTicTacToe, moves) for moves in ttt_sequences]
+
+    codes = ["".join(rng.sample("0123456789", 4)) for _ in range(positions)]
+    codes = [code if code[0] != "0" else code[::-1] for code in codes]
+    pairs = [(rng.choice(codes), rng.choice(codes)) for _ in range(positions)]
+    guess = GuessSecretGame("bench")
+    candidates = codes + list(ADVERSARIAL_CODES) * (positions // 50 + 1)
+
+    c4_full_random = c4_random[:max(1, positions // 10)]
+    c4_full = c4_full_random + [CONNECT4_DRAW]
+    ttt_full = ttt_random[:max(1, positions // 10)] + [TICTACTOE_DRAW]
+
+    return [
+        Case("connect4.check_winner", list(range(len(c4_games))),
+             lambda i: c4_games[i].check_winner(),
+             lambda i: reference.connect4_check_winner(c4_reference[i].board)),
+        Case("connect4.get_lowest_empty_row", c4_columns,
+             lambda ic: c4_games[ic[0]].get_lowest_empty_row(ic[1]),
+             lambda ic: reference.connect4_lowest_empty_row(c4_reference[ic[0]].board, ic[1])),
+        Case("tictactoe.check_winner", list(range(len(ttt_games))),
+             lambda i: ttt_games[i].check_winner(),
+             lambda i: reference.tictactoe_check_winner(ttt_reference[i].board)),
+        Case("guess.calculate_score", pairs,
+             lambda p: guess.calculate_score(*p),
+             lambda p: reference.guess_calculate_score(*p)),
+        Case("guess.is_valid_input", candidates,
+             GuessSecretGame.is_valid_input,
+             reference.guess_is_valid_input),
+        # Whole games, the engine side includes player setup and turn history
+        Case("connect4.play_game", c4_full,
+             lambda moves: played(Connect4Game, moves),
+             lambda moves: reference_played(reference.ReferenceConnect4, moves)),
+        Case("tictactoe.play_game", ttt_full,
+             lambda moves: played(TicTacToeGame, moves),
+             lambda moves: reference_played(reference.ReferenceTicTacToe, moves)),
+    ]
+
+
+def measure(fn: Callable, inputs: List, min_seconds: float) -> Dict:
+    # Whole passes over inputs until min_seconds have gone by
+    gc.collect()
+    ops, started = 0, time.perf_counter()
+    while True:
+        for item in inputs:
+            fn(item)
+        ops += len(inputs)
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            break
+
+    # tracemalloc only sees live blocks: report what one pass keeps and the
+    # peak of short-lived allocations on top of it, both per op
+    kept = [None] * len(inputs)
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for i, item in enumerate(inputs):
+        kept[i] = fn(item)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return {
+        "ops_per_second": round(ops / elapsed),
+        "ns_per_op": round(elapsed / ops * 1e9, 1),
+        "retained_bytes_per_op": round((after - before) / len(inputs), 1),
+        "peak_bytes_per_op": round((peak - before) / len(inputs), 1),
+    }
+
+
+def bench(args: argparse.Namespace) -> int:
+    cases = build_cases(random.Random(args.seed), args.positions)
+    results = {}
+    for case in cases:
+        if args.case and case.name not in args.case:
+            continue
+        engine = measure(case.engine, case.inputs, args.seconds)
+        oracle = measure(case.oracle, case.inputs, args.seconds)
+        engine["speedup"] = round(engine["ops_per_second"] / oracle["ops_per_second"], 2)
+        results[case.name] = {"engine": engine, "reference": oracle}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{'case':<32}{'ops/s':>12}{'ref ops/s':>12}{'speedup':>9}{'kept B/op':>11}{'peak B/op':>11}")
+    for name, result in results.items():
+        engine, oracle = result["engine"], result["reference"]
+        print(f"{name:<32}{engine['ops_per_second']:>12}{oracle['ops_per_second']:>12}{engine['speedup']:>9}"
+              f"{engine['retained_bytes_per_op']:>11}{engine['peak_bytes_per_op']:>11}")
+    return 0
+
+
+def _outcome(fn: Callable) -> Tuple[str, object]:
+    try:
+        return "ok", fn()
+    except InputError as e:
+        return "error", str(e)
+
+
+def diff_board_game(rng: random.Random, cls, reference_cls, cells: int, legal: Callable[[List[str]], List[int]]) -> str:
+    # Returns a description of the first divergence, or "" when both agree
+    game = new_game(cls)
+    oracle = reference_cls()
+    moves = []
+    while True:
+        seat = oracle.to_move if rng.random() > 0.05 else oracle.to_move ^ 1
+        options = legal(oracle.board)
+        move = rng.choice(ADVERSARIAL_MOVES) if rng.random() < 0.05 or not options else rng.choice(options)
+        moves.append((seat, move))
+
+        got = _outcome(lambda: game.play(f"uuid-{seat}", move))
+        expected = _outcome(lambda: oracle.play(seat, move))
+        if got[0] == "ok" and got[1] is not None and got[1] != "draw":
+            got = ("ok", int(got[1].uuid[-1]))
+        if got != expected:
+            return f"{cls.__name__} {moves}: engine {got}, reference {expected}"
+        if game.state.board != oracle.board:
+            return f"{cls.__name__} {moves}: boards differ {game.state.board} != {oracle.board}"
+        for cell in range(cells):
+            if game.is_valid_input(cell) != oracle.is_valid_input(cell):
+                return f"{cls.__name__} {moves}: is_valid_input({cell}) differs"
+        if isinstance(oracle, reference.ReferenceConnect4):
+            for col in range(reference.CONNECT4_COLS):
+                if game.get_lowest_empty_row(col) != oracle.lowest_empty_row(col):
+                    return f"{cls.__name__} {moves}: get_lowest_empty_row({col}) differs"
+        if game.check_winner() != oracle.check_winner():
+            return f"{cls.__name__} {moves}: check_winner differs"
+        # Sometimes keep going past the end to check finished games refuse moves
+        if oracle.over and rng.random() < 0.5:
+            break
+    return ""
+
+
+def diff_guess(rng: random.Random) -> str:
+    game = GuessSecretGame("diff")
+    for _ in range(8):
+        guess = "".join(rng.choice("0123456789") for _ in range(4))
+        secret = "".join(rng.sample("0123456789", 4))
+        if game.calculate_score(guess, secret) != reference.guess_calculate_score(guess, secret):
+            return f"calculate_score({guess!r}, {secret!r}) differs"
+        candidate = rng.choice(ADVERSARIAL_CODES) if rng.random() < 0.3 else guess
+        if GuessSecretGame.is_valid_input(candidate) != reference.guess_is_valid_input(candidate):
+            return f"is_valid_input({candidate!r}) differs"
+    return ""
+
+
+def connect4_legal(board: List[str]) -> List[int]:
+    return [col for col in range(reference.CONNECT4_COLS) if board[col] == ""]
+
+
+def tictactoe_legal(board: List[str]) -> List[int]:
+    return [cell for cell in range(9) if board[cell] == ""]
+
+
+def _diff_worker(seed: int, games: int) -> Tuple[int, str]:
+    rng = random.Random(seed)
+    for i in range(games):
+        for check in (
+            lambda: diff_board_game(rng, Connect4Game, reference.ReferenceConnect4, 7, connect4_legal),
+            lambda: diff_board_game(rng, TicTacToeGame, reference.ReferenceTicTacToe, 9, tictactoe_legal),
+            lambda: diff_guess(rng),
+        ):
+            divergence = check()
+            if divergence:
+                return i, f"seed {seed}, game {i}: {divergence}"
+    return games, ""
+
+
+def diff(args: argparse.Namespace) -> int:
+    per_process = -(-args.games // args.processes)
+    seeds = [args.seed + i for i in range(args.processes)]
+    started = time.perf_counter()
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.starmap(_diff_worker, [(seed, per_process) for seed in seeds])
+    elapsed = time.perf_counter() - started
+
+    divergences = [message for _, message in results if message]
+    played_games = sum(count for count, _ in results)
+    print(f"{played_games} rounds of connect4, tictactoe and guess checks in {elapsed:.1f} s")
+    for message in divergences:
+        print(f"DIVERGENCE {message}")
+    return 1 if divergences else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Game engine micro-benchmarks and differential checks")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    bench_parser = sub.add_parser("bench", help="ops/sec and memory per op, engine vs reference")
+    bench_parser.add_argument("--positions", type=int, default=2000, help="inputs generated per case")
+    bench_parser.add_argument("--seconds", type=float, default=0.5, help="minimum timing per case and side")
+    bench_parser.add_argument("--case", action="append", help="only run the named case")
+    bench_parser.add_argument("--seed", type=int, default=0)
+    bench_parser.add_argument("--json", action="store_true", help="print machine readable results")
+
+    diff_parser = sub.add_parser("diff", help="random games through engine and reference, fail on divergence")
+    diff_parser.add_argument("--games", type=int, default=100000)
+    diff_parser.add_argument("--processes", type=int, default=multiprocessing.cpu_count())
+    diff_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+    sys.exit(bench(args) if args.mode == "bench" else diff(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List
+
+import psutil
+import socketio
+
+from server.cluster import wait_for_port
+
+# Simulated players drive the real Socket.IO event flow against a server,
+# two clients per game. Every client emit uses an ack, so the measured round
+# trip ends when the server handler has returned, whatever it emits.
+#
+#   python -m benchmarks.load_test --clients 2000 --duration 60 --json
+#
+# --spectators N adds N clients per game that watch it with spectate_game,
+# for the move latency players see under an audience.
+#
+# --flooders N adds N clients that emit moves as fast as they can until the
+# server disconnects them, for the latency everyone else sees meanwhile.
+#
+# Without --url a server is started on --port with its move log and export in
+# a temporary directory; its RSS is sampled once a second. Every simulated
+# client connects from 127.0.0.1, so that server's per-address rate limit and
+# game cap are lifted unless ADDRESS_EVENT_RATE etc. are set.
+
+GAME_TYPES = ("guess_secret", "tictactoe", "connect4")
+
+
+def parse_mix(text: str) -> Dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in GAME_TYPES:
+            raise argparse.ArgumentTypeError(f"Unknown game type {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def random_code(rng: random.Random) -> str:
+    digits = rng.sample("0123456789", 4)
+    while digits[0] == "0":
+        rng.shuffle(digits)
+    return "".join(digits)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.client_emits = 0
+        self.server_events = 0
+        self.games_completed: Counter = Counter()
+        self.failures: Counter = Counter()
+        self.flood_emits = 0
+
+    def summary(self) -> Dict[str, Dict]:
+        events = {}
+        for event, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            events[event] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(percentile(values, 50) * 1000, 3),
+                "p95_ms": round(percentile(values, 95) * 1000, 3),
+                "p99_ms": round(percentile(values, 99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+            }
+        return events
+
+
+class SimulatedClient:
+    def __init__(self, url: str, stats: Stats, timeout: float):
+        self.url = url
+        self.stats = stats
+        self.timeout = timeout
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.inbox: Dict[str, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self.sio.on("*", self._on_event)
+
+    async def _on_event(self, event, data=None):
+        self.stats.server_events += 1
+        if event == "error":
+            self.stats.errors[str(data.get("message") if isinstance(data, dict) else data)] += 1
+        self.inbox[event].put_nowait(data)
+
+    async def connect(self) -> None:
+        started = time.perf_counter()
+        await self.sio.connect(self.url, transports=["websocket"], wait_timeout=self.timeout)
+        self.stats.latencies["connect"].append(time.perf_counter() - started)
+
+    async def call(self, event: str, data: Dict) -> None:
+        self.stats.client_emits += 1
+        started = time.perf_counter()
+        await self.sio.call(event, data, timeout=self.timeout)
+        self.stats.latencies[event].append(time.perf_counter() - started)
+
+    async def expect(self, event: str) -> Dict:
+        return await asyncio.wait_for(self.inbox[event].get(), self.timeout)
+
+    def drain(self) -> None:
+        self.inbox.clear()
+
+    async def disconnect(self) -> None:
+        await self.sio.disconnect()
+
+
+class Flooder:
+    # Emits without waiting for acks until it is disconnected
+    def __init__(self, url: str, stats: Stats, timeout: float):
+        self.client = SimulatedClient(url, stats, timeout)
+        self.stats = stats
+
+    async def run(self, deadline: float) -> None:
+        try:
+            await self.client.connect()
+        except socketio.exceptions.ConnectionError:
+            self.stats.failures["connect"] += 1
+            return
+        sio = self.client.sio
+        started = time.perf_counter()
+        while sio.connected and time.monotonic() < deadline:
+            await sio.emit("submit_connect4_move", {"gameId": "flood", "username": "flood", "uuid": "flood", "col": 0})
+            self.stats.flood_emits += 1
+            await asyncio.sleep(0)
+        if sio.connected:
+            await self.client.disconnect()
+        else:
+            self.stats.latencies["flooder_disconnected"].append(time.perf_counter() - started)
+
+
+class GamePair:
+    # Two clients playing one game after another until the deadline
+    def __init__(self, index: int, url: str, stats: Stats, args: argparse.Namespace):
+        self.index = index
+        self.stats = stats
+        self.args = args
+        self.rng = random.Random(args.seed + index)
+        self.clients = [SimulatedClient(url, stats, args.timeout) for _ in range(2)]
+        self.spectators = [SimulatedClient(url, stats, args.timeout) for _ in range(args.spectators)]
+        self.names = [f"load-{index}-a", f"load-{index}-b"]
+
+    async def think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.uniform(0, 2 * self.args.think_time))
+
+    async def run(self, deadline: float) -> None:
+        try:
+            for client in self.clients + self.spectators:
+                await client.connect()
+            while time.monotonic() < deadline:
+                game_type = self.rng.choices(list(self.args.mix), weights=list(self.args.mix.values()))[0]
+                try:
+                    await self.play(game_type)
+                    self.stats.games_completed[game_type] += 1
+                except (asyncio.TimeoutError, socketio.exceptions.TimeoutError):
+                    self.stats.failures["timeout"] += 1
+                for client in self.clients + self.spectators:
+                    client.drain()
+        except socketio.exceptions.ConnectionError:
+            self.stats.failures["connect"] += 1
+        finally:
+            for client in self.clients + self.spectators:
+                if client.sio.connected:
+                    await client.disconnect()
+
+    async def play(self, game_type: str) -> None:
+        a, b = self.clients
+        negotiate = {"moveResult": True} if self.args.move_result else {}
+        await a.call("create_game", {"username": self.names[0], "game_type": game_type, **negotiate})
+        created = await a.expect("game_created")
+        game_id = created["gameId"]
+        uuids = [created["uuid"], None]
+        base = {"gameId": game_id}
+        # The creator lands on the game page, which reconnects to the game
+        await a.call("reconnect_player", {**base, "username": self.names[0], "uuid": uuids[0], "lastSeq": 0, **negotiate})
+        await a.expect("reconnected")
+        await self.think()
+
+        await b.call("join_game", {"username": self.names[1], "gameId": game_id, **negotiate})
+        uuids[1] = (await b.expect("game_joined"))["uuid"]
+        for spectator in self.spectators:
+            await spectator.call("spectate_game", base)
+        await self.think()
+
+        if game_type == "guess_secret":
+            await self.play_guess_secret(base, uuids)
+        elif game_type == "tictactoe":
+            await self.play_board(base, uuids, "submit_tictactoe_move", "move", self.tictactoe_moves())
+        else:
+            await self.play_board(base, uuids, "submit_connect4_move", "col", self.connect4_moves())
+
+        for client, name, uuid in zip(self.clients, self.names, uuids):
+            await client.call("quit_game", {**base, "username": name, "uuid": uuid})
+
+    async def play_guess_secret(self, base: Dict, uuids: List[str]) -> None:
+        secrets = [random_code(self.rng), random_code(self.rng)]
+        for i, client in enumerate(self.clients):
+            await client.call("submit_secret", {**base, "username": self.names[i], "uuid": uuids[i], "secret": secrets[i]})
+            await self.think()
+        for turn in range(2 * self.args.max_guesses + 1):
+            i = turn % 2
+            # The first player finds the secret on its last turn so every game ends
+            guess = secrets[1] if turn == 2 * self.args.max_guesses else random_code(self.rng)
+            await self.clients[i].call("submit_guess", {**base, "username": self.names[i], "uuid": uuids[i], "guess": guess})
+            if guess == secrets[1 - i]:
+                return
+            await self.think()
+
+    async def play_board(self, base: Dict, uuids: List[str], event: str, field: str, moves) -> None:
+        for turn, move in enumerate(moves):
+            i = turn % 2
+            await self.clients[i].call(event, {**base, "username": self.names[i], "uuid": uuids[i], field: move})
+            if self.game_over(self.clients[i]):
+                return
+            await self.think()
+
+    def game_over(self, mover: SimulatedClient) -> bool:
+        # The mover's own socket delivers the broadcast before the ack
+        inbox = mover.inbox
+        if not self.args.move_result:
+            return not inbox["game_over"].empty()
+        results = inbox["move_result"]
+        while not results.empty():
+            if results.get_nowait()["winner"]:
+                return True
+        return False
+
+    def tictactoe_moves(self):
+        cells = list(range(9))
+        self.rng.shuffle(cells)
+        return cells
+
+    def connect4_moves(self):
+        heights = [0] * 7
+        while True:
+            free = [col for col in range(7) if heights[col] < 6]
+            if not free:
+                return
+            col = self.rng.choice(free)
+            heights[col] += 1
+            yield col
+
+
+async def sample_rss(pid: int, samples: List[int], stop: asyncio.Event) -> None:
+    process = psutil.Process(pid)
+    while not stop.is_set():
+        try:
+            samples.append(process.memory_info().rss)
+        except psutil.Error:
+            return
+        try:
+            await asyncio.wait_for(stop.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run(args: argparse.Namespace, url: str, server_pid: int) -> Dict:
+    stats = Stats()
+    pairs = [GamePair(i, url, stats, args) for i in range(max(1, args.clients // 2))]
+    rss: List[int] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server_pid, rss, stop)) if server_pid else None
+
+    started = time.monotonic()
+    deadline = started + args.ramp + args.duration
+    tasks = []
+    for pair in pairs:
+        tasks.append(asyncio.create_task(pair.run(deadline)))
+        await asyncio.sleep(args.ramp / len(pairs))
+    for _ in range(args.flooders):
+        tasks.append(asyncio.create_task(Flooder(url, stats, args.timeout).run(deadline)))
+    await asyncio.gather(*tasks)
+    elapsed = time.monotonic() - started
+
+    stop.set()
+    if sampler is not None:
+        await sampler
+    return {
+        "config": {
+            "url": url,
+            "clients": len(pairs) * 2,
+            "mix": args.mix,
+            "think_time": args.think_time,
+            "move_result": args.move_result,
+            "spectators": args.spectators,
+            "flooders": args.flooders,
+            "duration": args.duration,
+            "ramp": args.ramp,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "games_completed": dict(stats.games_completed),
+        "client_emits_per_second": round(stats.client_emits / elapsed, 1),
+        "server_events_per_second": round(stats.server_events / elapsed, 1),
+        "flood_emits": stats.flood_emits,
+        "events": stats.summary(),
+        "errors": dict(stats.errors),
+        "failures": dict(stats.failures),
+        "server_rss_bytes": {"start": rss[0], "peak": max(rss), "end": rss[-1]} if rss else None,
+    }
+
+
+def start_server(port: int, data_dir: str) -> subprocess.Popen:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, MOVE_LOG_DIR=os.path.join(data_dir, "move_log"), EXPORT_DIR=os.path.join(data_dir, "export"))
+    env.setdefault("ADDRESS_EVENT_RATE", "1e9")
+    env.setdefault("ADDRESS_EVENT_BURST", "1e9")
+    env.setdefault("MAX_GAMES_PER_ADDRESS", "1000000")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=root, env=env, stdout=subprocess.DEVNULL,
+    )
+    wait_for_port("127.0.0.1", port, timeout=30)
+    return server
+
+
+def print_report(report: Dict) -> None:
+    print(f"{report['config']['clients']} clients, {report['elapsed_seconds']} s, games {report['games_completed']}")
+    print(f"client emits/s {report['client_emits_per_second']}, server events/s {report['server_events_per_second']}")
+    if report["flood_emits"]:
+        print(f"flooder emits {report['flood_emits']}")
+    if report["server_rss_bytes"]:
+        rss = report["server_rss_bytes"]
+        print(f"server RSS start {rss['start'] >> 20} MiB, peak {rss['peak'] >> 20} MiB, end {rss['end'] >> 20} MiB")
+    print(f"{'event':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for event, result in report["events"].items():
+        print(f"{event:<24}{result['count']:>8}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+              f"{result['p99_ms']:>10}{result['max_ms']:>10}")
+    if report["errors"] or report["failures"]:
+        print(f"errors {report['errors']}, failures {report['failures']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO load test with per-event round trip percentiles")
+    parser.add_argument("--url", help="server to test, by default a local one is started")
+    parser.add_argument("--port", type=int, default=8765, help="port of the local server")
+    parser.add_argument("--server-pid", type=int, help="pid of the --url server, to sample its RSS")
+    parser.add_argument("--clients", type=int, default=1000, help="simulated players, two per game")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("guess_secret,tictactoe,connect4"),
+                        help="weighted game types, e.g. guess_secret=2,connect4=1")
+    parser.add_argument("--think-time", type=float, default=0.5, help="mean pause between a client's actions, seconds")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep starting games after the ramp")
+    parser.add_argument("--ramp", type=float, default=10.0, help="seconds over which clients connect")
+    parser.add_argument("--max-guesses", type=int, default=6, help="guesses per player before a guess game is ended")
+    parser.add_argument("--move-result", action="store_true", help="ask for one move_result event per move")
+    parser.add_argument("--spectators", type=int, default=0, help="clients watching each game")
+    parser.add_argument("--flooders", type=int, default=0, help="clients emitting moves without pause")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine readable results")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    server = None
+    with tempfile.TemporaryDirectory() as data_dir:
+        url, server_pid = args.url, args.server_pid
+        if url is None:
+            server = start_server(args.port, data_dir)
+            url, server_pid = f"http://127.0.0.1:{args.port}", server.pid
+        try:
+            report = asyncio.run(run(args, url, server_pid))
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from games.game import Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+from games.connect4_game import Connect4Game
+from player.guess_player import GuessPlayer
+from player.tictactoe_player import TicTacToePlayer
+from player.connect4_player import Connect4Player
+from server.archive import pack
+
+# Full games that end without a winner, so every game carries the longest history
+TICTACTOE_DRAW = [0, 1, 2, 4, 3, 5, 7, 6, 8]
+CONNECT4_DRAW = [int(c) for c in "015502320345364356222230416104501114435666"]
+GUESSES = ["1234", "5678", "1357", "2468", "9012", "3456", "7890", "1470", "2581", "3692"]
+
+
+def make_guess_secret(i: int) -> Game:
+    game_id = f"game-{i}"
+    game = GuessSecretGame(game_id)
+    player1 = GuessPlayer(f"player-{i}-1", f"sid-{i}-1", game_id)
+    player2 = GuessPlayer(f"player-{i}-2", f"sid-{i}-2", game_id)
+    game.add_player(player1)
+    game.add_player(player2)
+    player1.secret = "9876"
+    player2.secret = "8765"
+    game.state.is_secret_set[player1.uuid] = True
+    game.state.is_secret_set[player2.uuid] = True
+    players = [player1, player2]
+    for turn, guess in enumerate(GUESSES):
+        game.play(players[turn % 2].uuid, guess)
+    return game
+
+
+def make_tictactoe(i: int) -> Game:
+    game_id = f"game-{i}"
+    game = TicTacToeGame(game_id)
+    game.add_player(TicTacToePlayer(f"player-{i}-1", f"sid-{i}-1", game_id, "X"))
+    game.add_player(TicTacToePlayer(f"player-{i}-2", f"sid-{i}-2", game_id, "O"))
+    for move in TICTACTOE_DRAW:
+        game.play(game.state.who_will_play, move)
+    return game
+
+
+def make_connect4(i: int) -> Game:
+    game_id = f"game-{i}"
+    game = Connect4Game(game_id)
+    game.add_player(Connect4Player(f"player-{i}-1", f"sid-{i}-1", game_id, "Red"))
+    game.add_player(Connect4Player(f"player-{i}-2", f"sid-{i}-2", game_id, "Yellow"))
+    for col in CONNECT4_DRAW:
+        game.play(game.state.who_will_play, col)
+    return game
+
+
+FACTORIES: Dict[str, Callable[[int], Game]] = {
+    "guess_secret": make_guess_secret,
+    "tictactoe": make_tictactoe,
+    "connect4": make_connect4,
+}
+
+
+def archived(factory: Callable[[int], Game]) -> Callable[[int], object]:
+    # What a finished game costs once it has moved to server/archive.py
+    now = datetime.now()
+    return lambda i: pack(factory(i), now)
+
+
+def measure(factory: Callable[[int], object], count: int) -> Dict:
+    # Time without tracing first, tracemalloc slows allocation down several times
+    gc.collect()
+    started = time.perf_counter()
+    games: List[object] = [factory(i) for i in range(count)]
+    elapsed = time.perf_counter() - started
+    del games
+
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    games = [factory(i) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del games
+    return {
+        "games": count,
+        "bytes_per_game": round((after - before) / count, 1),
+        "alloc_seconds": round(elapsed, 4),
+        "us_per_game": round(elapsed / count * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory and allocation time per fully played game")
+    parser.add_argument("-n", "--games", type=int, default=10000)
+    parser.add_argument("--game-type", choices=sorted(FACTORIES), action="append")
+    parser.add_argument("--archived", action="store_true", help="measure the archive records of the games")
+    parser.add_argument("--json", action="store_true", help="print machine readable results")
+    args = parser.parse_args()
+
+    wrap = archived if args.archived else (lambda factory: factory)
+    results = {name: measure(wrap(FACTORIES[name]), args.games) for name in (args.game_type or FACTORIES)}
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'game type':<14}{'bytes/game':>12}{'us/game':>10}{'total s':>10}")
+    for name, result in results.items():
+        print(f"{name:<14}{result['bytes_per_game']:>12}{result['us_per_game']:>10}{result['alloc_seconds']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+from typing import List, Union
+
+from errors.input_error import InputError
+
+# The scan-based game logic the engines started from, kept verbatim as the
+# oracle for benchmarks/engines.py. Boards are the flat lists of
+# Connect4GameState/TicTacToeGameState.board; do not optimize this file.
+
+CONNECT4_ROWS = 6
+CONNECT4_COLS = 7
+CONNECT4_COLORS = ("Red", "Yellow")
+TICTACTOE_SYMBOLS = ("X", "O")
+
+
+def connect4_lowest_empty_row(b: List[str], col: int) -> int:
+    for r in range(CONNECT4_ROWS - 1, -1, -1):
+        if b[r * CONNECT4_COLS + col] == "":
+            return r
+    return -1
+
+
+def connect4_is_valid_input(b: List[str], col) -> bool:
+    if not isinstance(col, int):
+        try:
+            col = int(col)
+        except ValueError:
+            return False
+    if not (0 <= col < CONNECT4_COLS):
+        return False
+    return b[col] == ""
+
+
+def connect4_check_winner(b: List[str]) -> Union[str, None]:
+    ROWS, COLS = CONNECT4_ROWS, CONNECT4_COLS
+    for r in range(ROWS):
+        for c in range(COLS - 3):
+            idx = r * COLS + c
+            if b[idx] and b[idx] == b[idx + 1] == b[idx + 2] == b[idx + 3]:
+                return b[idx]
+    for r in range(ROWS - 3):
+        for c in range(COLS):
+            idx = r * COLS + c
+            if b[idx] and b[idx] == b[(r + 1) * COLS + c] == b[(r + 2) * COLS + c] == b[(r + 3) * COLS + c]:
+                return b[idx]
+    for r in range(ROWS - 3):
+        for c in range(COLS - 3):
+            idx = r * COLS + c
+            if b[idx] and b[idx] == b[(r + 1) * COLS + c + 1] == b[(r + 2) * COLS + c + 2] == b[(r + 3) * COLS + c + 3]:
+                return b[idx]
+    for r in range(3, ROWS):
+        for c in range(COLS - 3):
+            idx = r * COLS + c
+            if b[idx] and b[idx] == b[(r - 1) * COLS + c + 1] == b[(r - 2) * COLS + c + 2] == b[(r - 3) * COLS + c + 3]:
+                return b[idx]
+    if "" not in b:
+        return "draw"
+    return None
+
+
+def tictactoe_is_valid_input(b: List[str], move) -> bool:
+    if not isinstance(move, int):
+        try:
+            move = int(move)
+        except ValueError:
+            return False
+    return 0 <= move <= 8 and b[move] == ""
+
+
+def tictactoe_check_winner(b: List[str]) -> Union[str, None]:
+    lines = [
+        (0, 1, 2), (3, 4, 5), (6, 7, 8),
+        (0, 3, 6), (1, 4, 7), (2, 5, 8),
+        (0, 4, 8), (2, 4, 6)
+    ]
+    for x, y, z in lines:
+        if b[x] and b[x] == b[y] == b[z]:
+            return b[x]
+    if "" not in b:
+        return "draw"
+    return None
+
+
+def guess_is_valid_input(secret) -> bool:
+    try:
+        secret = int(secret)
+        if secret < 1000 or secret > 9999:
+            return False
+        digits = [int(d) for d in str(secret)]
+        return len(digits) == len(set(digits))
+    except ValueError:
+        return False
+
+
+def guess_calculate_score(guess: str, secret: str) -> tuple:
+    correct_digits = 0
+    correct_positions = 0
+    for i in range(4):
+        if guess[i] == secret[i]:
+            correct_positions += 1
+        elif guess[i] in secret:
+            correct_digits += 1
+    return correct_digits, correct_positions
+
+
+class ReferenceBoardGame:
+    # _play of the original Connect4Game/TicTacToeGame for seats 0 and 1.
+    # play() returns the winning seat, "draw" or None and raises the same
+    # InputError messages.
+    def __init__(self, size: int, marks):
+        self.board: List[str] = [""] * size
+        self.marks = marks
+        self.to_move = 0
+        self.over = False
+
+    def play(self, seat: int, move) -> Union[int, str, None]:
+        if self.over:
+            raise InputError("Game is already over")
+        try:
+            move = int(move)
+        except ValueError:
+            raise InputError(self.NOT_AN_INTEGER)
+        if seat != self.to_move:
+            raise InputError("Not your turn")
+        if not self.is_valid_input(move):
+            raise InputError(self.INVALID_MOVE)
+
+        self.board[self.cell_of(move)] = self.marks[seat]
+        result = self.check_winner()
+        if result:
+            self.over = True
+            return "draw" if result == "draw" else seat
+        self.to_move ^= 1
+        return None
+
+
+class ReferenceConnect4(ReferenceBoardGame):
+    NOT_AN_INTEGER = f"Move must be an integer between 0 and {CONNECT4_COLS - 1}"
+    INVALID_MOVE = "Invalid move. Column may be full or out of bounds."
+
+    def __init__(self):
+        super().__init__(CONNECT4_ROWS * CONNECT4_COLS, CONNECT4_COLORS)
+
+    def is_valid_input(self, col) -> bool:
+        return connect4_is_valid_input(self.board, col)
+
+    def lowest_empty_row(self, col: int) -> int:
+        return connect4_lowest_empty_row(self.board, col)
+
+    def cell_of(self, col: int) -> int:
+        return connect4_lowest_empty_row(self.board, col) * CONNECT4_COLS + col
+
+    def check_winner(self):
+        return connect4_check_winner(self.board)
+
+
+class ReferenceTicTacToe(ReferenceBoardGame):
+    NOT_AN_INTEGER = "Move must be an integer between 0 and 8"
+    INVALID_MOVE = "Invalid move. Cell may be occupied or out of bounds."
+
+    def __init__(self):
+        super().__init__(9, TICTACTOE_SYMBOLS)
+
+    def is_valid_input(self, move) -> bool:
+        return tictactoe_is_valid_input(self.board, move)
+
+    def cell_of(self, move: int) -> int:
+        return move
+
+    def check_winner(self):
+        return tictactoe_check_winner(self.board)
@@ -0,0 +1,145 @@
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Tuple
+
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+from benchmarks.memory_footprint import CONNECT4_DRAW, GUESSES, TICTACTOE_DRAW
+from games.connect4_game import Connect4Game
+from games.game import Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+from server import codec
+from server.move_broadcast import MoveBroadcast
+
+# Encode time and bytes per move of the payloads a game sends, per encoding:
+#
+#   json             the default Socket.IO JSON packet
+#   msgpack          negotiated encoding "msgpack": server/codec.py payload
+#                    sent as a binary attachment
+#   msgpack-packet   python-socketio's MsgPackPacket on the same dicts, what
+#                    switching the whole server to serializer="msgpack" gives
+#
+#   python -m benchmarks.serializers [--repeat 2000] [--json]
+#
+# Bytes are the Socket.IO frames, a binary attachment counts as its own frame.
+
+GUESS_SECRETS = ("1029", "3847")
+
+
+def seated(game: Game) -> Game:
+    for seat in range(2):
+        game.add_player(game.new_player(f"player-{seat}", f"sid-{seat}", seat, uuid=f"{seat}" * 8 + "-uuid-of-a-player"))
+    return game
+
+
+def play_moves(game: Game, moves) -> List[Tuple[str, Dict]]:
+    # The (event, payload) pairs a negotiated client receives over the game
+    sent = []
+    for turn, move in enumerate(moves):
+        player = game.players[turn % 2]
+        winner = game.play(player.uuid, move)
+        sent.append(("move_result", MoveBroadcast.outcome(game, player, move, winner)))
+        if winner:
+            break
+    return sent
+
+
+def guess_secret_game() -> Tuple[Game, List[Tuple[str, Dict]]]:
+    game = seated(GuessSecretGame("1792353860-86YILI"))
+    for player, secret in zip(game.players, GUESS_SECRETS):
+        game.set_secret(player, secret)
+    return game, play_moves(game, GUESSES + [GUESS_SECRETS[1]])
+
+
+def board_game(cls, moves) -> Callable[[], Tuple[Game, List[Tuple[str, Dict]]]]:
+    def build():
+        game = seated(cls("1792353860-86YILI"))
+        sent = play_moves(game, moves)
+        # A client resyncing once per move is the worst case for snapshots
+        snapshots = []
+        replay = seated(cls(game.game_id))
+        for _ in play_moves(replay, moves):
+            snapshots.append(("board_snapshot", {"gameId": replay.game_id, **replay.board_snapshot()}))
+        return game, sent + snapshots
+    return build
+
+
+GAMES = {
+    "guess_secret": guess_secret_game,
+    "tictactoe": board_game(TicTacToeGame, TICTACTOE_DRAW),
+    "connect4": board_game(Connect4Game, CONNECT4_DRAW),
+}
+
+
+def pack(event: str, data: Dict, game_type: str) -> bytes:
+    if event == "move_result":
+        return codec.pack_outcome(data, game_type)
+    return codec.pack_snapshot(data["gameId"], data, game_type)
+
+
+def encoders(game_type: str) -> Dict[str, Callable[[str, Dict], object]]:
+    return {
+        "json": lambda event, data: packet.Packet(packet.EVENT, data=[event, data]).encode(),
+        "msgpack": lambda event, data: packet.Packet(packet.EVENT, data=[event, pack(event, data, game_type)]).encode(),
+        "msgpack-packet": lambda event, data: MsgPackPacket(packet.EVENT, data=[event, data]).encode(),
+    }
+
+
+def frames(encoded) -> List:
+    return encoded if isinstance(encoded, list) else [encoded]
+
+
+def measure(game_type: str, repeat: int) -> Dict:
+    _, sent = GAMES[game_type]()
+    results = {}
+    for name, encode in encoders(game_type).items():
+        per_event = {}
+        for event in ("move_result", "board_snapshot"):
+            payloads = [data for sent_event, data in sent if sent_event == event]
+            if not payloads:
+                continue
+            encoded = [frames(encode(event, data)) for data in payloads]
+            started = time.perf_counter()
+            for _ in range(repeat):
+                for data in payloads:
+                    encode(event, data)
+            elapsed = time.perf_counter() - started
+            per_event[event] = {
+                "messages": len(payloads),
+                "bytes_per_message": round(sum(len(f) for e in encoded for f in e) / len(payloads), 1),
+                "frames_per_message": round(sum(len(e) for e in encoded) / len(payloads), 2),
+                "encode_us_per_message": round(elapsed / (repeat * len(payloads)) * 1e6, 2),
+            }
+        results[name] = per_event
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Socket.IO payload size and encode time per encoding")
+    parser.add_argument("--repeat", type=int, default=2000, help="times each game's payloads are encoded")
+    parser.add_argument("--game-type", choices=sorted(GAMES), action="append")
+    parser.add_argument("--json", action="store_true", help="print machine readable results")
+    args = parser.parse_args()
+
+    report = {game_type: measure(game_type, args.repeat) for game_type in args.game_type or GAMES}
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'game':<14}{'event':<16}{'encoding':<16}{'bytes':>8}{'frames':>8}{'encode us':>11}{'bytes vs json':>15}{'time vs json':>14}")
+    for game_type, results in report.items():
+        for event in results["json"]:
+            base = results["json"][event]
+            for name, per_event in results.items():
+                row = per_event[event]
+                print(f"{game_type:<14}{event:<16}{name:<16}{row['bytes_per_message']:>8}{row['frames_per_message']:>8}"
+                      f"{row['encode_us_per_message']:>11}"
+                      f"{row['bytes_per_message'] / base['bytes_per_message']:>15.2f}"
+                      f"{row['encode_us_per_message'] / base['encode_us_per_message']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
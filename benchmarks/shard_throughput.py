@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+import socketio
+
+from benchmarks.load_test import SimulatedClient, Stats
+from server.cluster import start_cluster, stop_cluster, wait_for_port
+
+# Completed games per second of the sharded server against its shard count.
+# For every count a broker and that many main.py workers are started the way
+# server.cluster runs them, and one client process per worker plays Connect 4
+# games on it. The creator of a game connects to worker k, which owns the
+# game; the joiner connects to worker k + 1, so its join_game and every move
+# it makes are forwarded to the owner over the bus, and every move_result the
+# owner broadcasts to the game room reaches it through BusClientManager. A
+# move counts as done once both players have its move_result.
+#
+#   python -m benchmarks.shard_throughput --shards 1 --shards 2 --shards 4 --json
+#
+# With one shard nothing is forwarded. Client processes grow with the shard
+# count, so the machine needs a core per worker, per client process and one
+# for the broker before the numbers say anything about scaling.
+
+GAME_MOVES = 42
+
+
+class ShardPair:
+    # Two clients on different workers playing one game after another
+    def __init__(self, index: int, owner_url: str, joiner_url: str, stats: Stats, args: argparse.Namespace):
+        self.stats = stats
+        self.rng = random.Random(args.seed + index)
+        self.clients = [SimulatedClient(owner_url, stats, args.timeout), SimulatedClient(joiner_url, stats, args.timeout)]
+        self.names = [f"shard-{index}-a", f"shard-{index}-b"]
+        self.forwarded = owner_url != joiner_url
+
+    async def run(self, deadline: float, finished: List[float]) -> None:
+        try:
+            for client in self.clients:
+                await client.connect()
+            while time.monotonic() < deadline:
+                try:
+                    await self.play()
+                    finished.append(time.monotonic())
+                except (asyncio.TimeoutError, socketio.exceptions.TimeoutError):
+                    self.stats.failures["timeout"] += 1
+                for client in self.clients:
+                    client.drain()
+        except socketio.exceptions.ConnectionError:
+            self.stats.failures["connect"] += 1
+        finally:
+            for client in self.clients:
+                if client.sio.connected:
+                    await client.disconnect()
+
+    async def play(self) -> None:
+        a, b = self.clients
+        await a.call("create_game", {"username": self.names[0], "game_type": "connect4", "moveResult": True})
+        created = await a.expect("game_created")
+        base = {"gameId": created["gameId"]}
+        uuids = [created["uuid"], None]
+        # The creator lands on the game page, which reconnects to the game
+        await a.call("reconnect_player", {**base, "username": self.names[0], "uuid": uuids[0], "lastSeq": 0,
+                                          "moveResult": True})
+        await a.expect("reconnected")
+        await b.call("join_game", {**base, "username": self.names[1], "moveResult": True})
+        uuids[1] = (await b.expect("game_joined"))["uuid"]
+
+        heights = [0] * 7
+        for turn in range(GAME_MOVES):
+            i = turn % 2
+            col = self.rng.choice([col for col in range(7) if heights[col] < 6])
+            heights[col] += 1
+            started = time.perf_counter()
+            await self.clients[i].sio.emit("submit_connect4_move",
+                                           {**base, "username": self.names[i], "uuid": uuids[i], "col": col})
+            results = [await client.expect("move_result") for client in self.clients]
+            event = "forwarded_move" if i == 1 and self.forwarded else "move"
+            self.stats.latencies[event].append(time.perf_counter() - started)
+            if results[0]["winner"]:
+                break
+
+        for client, name, uuid in zip(self.clients, self.names, uuids):
+            await client.call("quit_game", {**base, "username": name, "uuid": uuid})
+
+
+async def _play(shard: int, shards: int, args: argparse.Namespace) -> Dict:
+    stats = Stats()
+    owner_url = f"http://127.0.0.1:{args.port + shard}"
+    joiner_url = f"http://127.0.0.1:{args.port + (shard + 1) % shards}"
+    measured_from = time.monotonic() + args.warmup
+    deadline = measured_from + args.duration
+    finished: List[float] = []
+    pairs = [ShardPair(shard * args.pairs + i, owner_url, joiner_url, stats, args) for i in range(args.pairs)]
+    await asyncio.gather(*(pair.run(deadline, finished) for pair in pairs))
+    return {
+        "games": sum(1 for at in finished if measured_from <= at <= deadline),
+        "latencies": dict(stats.latencies),
+        "errors": dict(stats.errors),
+        "failures": dict(stats.failures),
+    }
+
+
+def _client(shard: int, shards: int, args: argparse.Namespace, results) -> None:
+    results.put(asyncio.run(_play(shard, shards, args)))
+
+
+def run(shards: int, args: argparse.Namespace) -> Dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(os.environ, EVENT_RATE="1e9", EVENT_BURST="1e9", ADDRESS_EVENT_RATE="1e9",
+                   ADDRESS_EVENT_BURST="1e9", MAX_GAMES_PER_ADDRESS="1000000")
+        cluster = start_cluster(shards, "127.0.0.1", args.port, args.bus_port, os.path.join(data_dir, "move_log"),
+                                os.path.join(data_dir, "export"), env=env, stdout=subprocess.DEVNULL)
+        try:
+            for shard in range(shards):
+                wait_for_port("127.0.0.1", args.port + shard, timeout=30)
+            results = multiprocessing.Queue()
+            clients = [multiprocessing.Process(target=_client, args=(shard, shards, args, results))
+                       for shard in range(shards)]
+            for client in clients:
+                client.start()
+            per_shard = [results.get() for _ in clients]
+            for client in clients:
+                client.join()
+        finally:
+            stop_cluster(cluster)
+
+    stats = Stats()
+    for result in per_shard:
+        for event, values in result["latencies"].items():
+            stats.latencies[event].extend(values)
+        stats.errors.update(result["errors"])
+        stats.failures.update(result["failures"])
+    games = sum(result["games"] for result in per_shard)
+    return {
+        "shards": shards,
+        "games": games,
+        "games_per_second": round(games / args.duration, 1),
+        "events": stats.summary(),
+        "errors": dict(stats.errors),
+        "failures": dict(stats.failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Games per second of the sharded server with forwarded events")
+    parser.add_argument("--shards", type=int, action="append", help="shard counts to try, default 1 2 4 .. cpu count / 2")
+    parser.add_argument("--pairs", type=int, default=20, help="games played at once per shard")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds measured per shard count")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of play before measuring")
+    parser.add_argument("--port", type=int, default=8900, help="port of the first worker")
+    parser.add_argument("--bus-port", type=int, default=7099)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print machine readable results")
+    args = parser.parse_args()
+
+    shard_counts = args.shards
+    if not shard_counts:
+        cpus = os.cpu_count() or 1
+        shard_counts = [1]
+        while shard_counts[-1] * 4 <= cpus:
+            shard_counts.append(shard_counts[-1] * 2)
+
+    results = [run(shards, args) for shards in shard_counts]
+    base = results[0]["games_per_second"] / results[0]["shards"]
+    for result in results:
+        result["speedup"] = round(result["games_per_second"] / results[0]["games_per_second"], 2)
+        result["efficiency"] = round(result["games_per_second"] / (base * result["shards"]), 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'shards':>7}{'games/s':>10}{'speedup':>9}{'efficiency':>12}{'move p99 ms':>13}{'forwarded p99 ms':>18}")
+    for result in results:
+        events = result["events"]
+        local = events.get("move", {}).get("p99_ms", "-")
+        forwarded = events.get("forwarded_move", {}).get("p99_ms", "-")
+        print(f"{result['shards']:>7}{result['games_per_second']:>10}{result['speedup']:>9}"
+              f"{result['efficiency']:>12}{local:>13}{forwarded:>18}")
+        if result["errors"] or result["failures"]:
+            print(f"{'':>7}errors {result['errors']}, failures {result['failures']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+from abc import ABC, abstractmethod
+from typing import Tuple, Union
+from uuid import uuid4
+
+from games.game import Game
+from player.player import Player
+
+# Bots are ordinary players of their game; the uuid marks them and carries
+# the level, so a game rebuilt from the move log still knows its bot.
+BOT_UUID_PREFIX = "bot:"
+
+
+def bot_uuid(level: str) -> str:
+    return f"{BOT_UUID_PREFIX}{level}:{uuid4()}"
+
+
+def is_bot(player: Player) -> bool:
+    return player.uuid.startswith(BOT_UUID_PREFIX)
+
+
+def bot_level(player: Player) -> str:
+    return player.uuid[len(BOT_UUID_PREFIX):].split(":", 1)[0]
+
+
+class Bot(ABC):
+    GAME_TYPE: str = None
+    NAME: str = "Computer"
+    LEVELS: Tuple[str, ...] = ("normal",)
+
+    def __init__(self, level: str = None):
+        if level is None:
+            level = self.LEVELS[-1]
+        if level not in self.LEVELS:
+            raise ValueError(f"Unknown level {level}")
+        self.level = level
+
+    def pick_secret(self) -> Union[str, None]:
+        return None
+
+    @abstractmethod
+    async def choose_move(self, game: Game, player: Player):
+        # Must not block the event loop, heavy work goes to a thread or process
+        pass
@@ -0,0 +1,27 @@
+from typing import Dict, Tuple, Type, Union
+
+from bots.bot import Bot, bot_level, is_bot
+from bots.guess_secret_bot import GuessSecretBot
+from bots.connect4_bot import Connect4Bot
+from bots.tictactoe_bot import TicTacToeBot
+from games.game import Game
+from player.player import Player
+
+# game_type values of create_game that start a game against the computer
+BOT_GAME_TYPES: Dict[str, Type[Bot]] = {
+    f"{GuessSecretBot.GAME_TYPE}_bot": GuessSecretBot,
+    f"{TicTacToeBot.GAME_TYPE}_bot": TicTacToeBot,
+    f"{Connect4Bot.GAME_TYPE}_bot": Connect4Bot,
+}
+
+BOTS_BY_GAME: Dict[str, Type[Bot]] = {cls.GAME_TYPE: cls for cls in BOT_GAME_TYPES.values()}
+
+
+def bot_for(game: Game) -> Union[Tuple[Bot, Player], None]:
+    cls = BOTS_BY_GAME.get(game.GAME_TYPE)
+    if cls is None:
+        return None
+    for player in game.players:
+        if is_bot(player):
+            return cls(bot_level(player)), player
+    return None
@@ -0,0 +1,120 @@
+import itertools
+import random
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Every valid secret (GuessSecretGame.is_valid_input): four distinct digits, no leading zero
+CODES: List[str] = ["".join(p) for p in itertools.permutations("0123456789", 4) if p[0] != "0"]
+CODE_INDEX: Dict[str, int] = {code: i for i, code in enumerate(CODES)}
+
+# A (correct_digits, correct_positions) result packed into one of 25 bins
+SCORE_BINS = 25
+SOLVED = 4 * 5
+
+POPCOUNT = np.array([bin(i).count("1") for i in range(1 << 10)], dtype=np.uint8)
+
+
+def pack_score(correct_digits: int, correct_positions: int) -> int:
+    return correct_positions * 5 + correct_digits
+
+
+def build_score_matrix(codes: Sequence[str] = CODES, block: int = 512) -> np.ndarray:
+    # matrix[g, s] is pack_score(*GuessSecretGame.calculate_score(codes[g], codes[s])).
+    # Digits are distinct, so the digits two codes share are the popcount of
+    # their digit masks and correct_digits is that minus correct_positions.
+    digits = np.array([[int(c) for c in code] for code in codes], dtype=np.int8)
+    masks = (1 << digits.astype(np.int16)).sum(axis=1)
+    matrix = np.empty((len(codes), len(codes)), dtype=np.uint8)
+    for start in range(0, len(codes), block):
+        rows = slice(start, start + block)
+        positions = (digits[rows, None, :] == digits[None, :, :]).sum(axis=2, dtype=np.uint8)
+        common = POPCOUNT[masks[rows, None] & masks[None, :]]
+        matrix[rows] = positions * 5 + (common - positions)
+    return matrix
+
+
+class BullsAndCowsSolver:
+    # Keeps the candidates consistent with every (guess, score) seen so far and
+    # picks the guess that splits them best: the smallest worst-case partition
+    # ("minimax") or the most informative one ("entropy"). Candidates win ties
+    # since they may end the game on the spot; what is still tied after that is
+    # drawn at random, or every game would open with the same code.
+    STRATEGIES = ("minimax", "entropy")
+
+    _matrix: np.ndarray = None
+    # strategy -> indices of the equally good first guesses
+    _openings: Dict[str, np.ndarray] = {}
+
+    def __init__(self, strategy: str = "minimax", rng: random.Random = None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy {strategy}")
+        self.strategy = strategy
+        self.rng = rng or random
+
+    @classmethod
+    def matrix(cls) -> np.ndarray:
+        if cls._matrix is None:
+            cls._matrix = build_score_matrix()
+        return cls._matrix
+
+    @classmethod
+    def warm_up(cls) -> None:
+        # The matrix and the openings, so the first bot game does not pay for them
+        for strategy in cls.STRATEGIES:
+            cls(strategy).next_guess([])
+
+    def candidates(self, history: Sequence[Tuple[str, int, int]]) -> np.ndarray:
+        # history holds (guess, correct_digits, correct_positions) triples
+        matrix = self.matrix()
+        candidates = np.arange(len(CODES))
+        for guess, correct_digits, correct_positions in history:
+            row = matrix[CODE_INDEX[guess]]
+            candidates = candidates[row[candidates] == pack_score(correct_digits, correct_positions)]
+        return candidates
+
+    def next_guess(self, history: Sequence[Tuple[str, int, int]]) -> str:
+        if not history:
+            if self.strategy not in self._openings:
+                self._openings[self.strategy] = self.best_guesses(np.arange(len(CODES)))
+            return CODES[self.rng.choice(self._openings[self.strategy])]
+
+        candidates = self.candidates(history)
+        if len(candidates) == 0:
+            raise ValueError("No code is consistent with the history")
+        if len(candidates) <= 2:
+            return CODES[self.rng.choice(candidates)]
+        return CODES[self.rng.choice(self.best_guesses(candidates))]
+
+    def partition_counts(self, candidates: np.ndarray, block: int = 256) -> np.ndarray:
+        # counts[g, b] is how many candidates guess g sorts into score bin b.
+        # A block of guesses at a time: bincount takes intp, for every guess
+        # against every code at once that is 160 MB
+        matrix = self.matrix()
+        counts = np.empty((len(CODES), SCORE_BINS), dtype=np.int32)
+        offsets = (np.arange(block, dtype=np.intp) * SCORE_BINS)[:, None]
+        for start in range(0, len(CODES), block):
+            scores = matrix[start:start + block, candidates]
+            rows = len(scores)
+            binned = np.bincount((scores + offsets[:rows]).ravel(), minlength=rows * SCORE_BINS)
+            counts[start:start + rows] = binned.reshape(rows, SCORE_BINS)
+        return counts
+
+    def best_guesses(self, candidates: np.ndarray) -> np.ndarray:
+        # Indices of every guess that splits the candidates best
+        counts = self.partition_counts(candidates)
+
+        is_candidate = np.zeros(len(CODES), dtype=bool)
+        is_candidate[candidates] = True
+        if self.strategy == "minimax":
+            # Lower is better, a candidate beats a non-candidate with the same worst case
+            key = counts.max(axis=1) * 2 - is_candidate
+            return np.flatnonzero(key == key.min())
+
+        p = counts / len(candidates)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            entropy = -np.where(counts > 0, p * np.log2(p), 0.0).sum(axis=1)
+        # A candidate can be right outright, worth a guess that is solved with probability p
+        entropy += is_candidate / len(candidates)
+        # The same partition sizes in another bin order can differ in the last bits
+        return np.flatnonzero(entropy >= entropy.max() - 1e-9)
@@ -0,0 +1,50 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Tuple
+
+from bots.bot import Bot
+from bots.connect4_search import choose_column
+from games.connect4_game import Connect4Game
+from player.connect4_player import Connect4Player
+
+SEARCH_WORKERS = int(os.environ.get("CONNECT4_BOT_WORKERS", min(2, os.cpu_count() or 1)))
+
+_executor: ProcessPoolExecutor = None
+
+
+def executor() -> ProcessPoolExecutor:
+    # Created on first use; spawned workers do not inherit the server's threads
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(SEARCH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _executor
+
+
+def shutdown() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+class Connect4Bot(Bot):
+    GAME_TYPE = Connect4Game.GAME_TYPE
+    LEVELS = ("easy", "normal", "hard")
+
+    # level -> (maximum search depth, seconds per move)
+    SEARCH_LIMITS: Dict[str, Tuple[int, float]] = {
+        "easy": (2, 0.2),
+        "normal": (8, 0.5),
+        "hard": (Connect4Game.ROWS * Connect4Game.COLS, 2.0),
+    }
+
+    async def choose_move(self, game: Connect4Game, player: Connect4Player) -> int:
+        board = game.bitboard
+        slot = game.seat_of(player)
+        position = board.masks[slot]
+        mask = board.masks[0] | board.masks[1]
+        depth, time_budget = self.SEARCH_LIMITS[self.level]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor(), choose_column, position, mask, depth, time_budget)
@@ -0,0 +1,188 @@
+import time
+from typing import Dict, List, Tuple
+
+from games.connect4_board import Connect4Board
+
+# Positions are (position, mask) pairs in the Connect4Board layout: position
+# holds the stones of the player to move, mask every stone on the board.
+# position + mask is unique per position (it adds a bit on top of every
+# column), so it is the transposition table key.
+ROWS = Connect4Board.ROWS
+COLS = Connect4Board.COLS
+HEIGHT = Connect4Board.HEIGHT
+SIZE = Connect4Board.SIZE
+
+BOTTOM_MASK = sum(1 << (col * HEIGHT) for col in range(COLS))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+COLUMN_MASKS = tuple(((1 << ROWS) - 1) << (col * HEIGHT) for col in range(COLS))
+# Central columns take part in more lines, try them first
+COLUMN_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+WIN = 1000
+EXACT, LOWER, UPPER = 0, 1, 2
+TABLE_LIMIT = 1 << 20
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def winning_cells(position: int, mask: int) -> int:
+    # Empty cells that would complete four in a row for the stones in position
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (HEIGHT, HEIGHT - 1, HEIGHT + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def playable(mask: int) -> int:
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def popcount(x: int) -> int:
+    return bin(x).count("1")
+
+
+class Connect4Search:
+    # Iterative deepening negamax with alpha-beta pruning. The table keeps
+    # (depth, flag, value, best move bit) per position and survives between
+    # searches, so a bot process gets faster as it sees more games.
+    def __init__(self):
+        self.table: Dict[int, Tuple[int, int, int, int]] = {}
+        self.deadline: float = 0.0
+        self.nodes: int = 0
+
+    def best_column(self, position: int, mask: int, max_depth: int, time_budget: float) -> int:
+        if len(self.table) > TABLE_LIMIT:
+            self.table.clear()
+        moves = popcount(mask)
+        possible = playable(mask)
+        if not possible:
+            raise ValueError("The board is full")
+
+        win = winning_cells(position, mask) & possible
+        if win:
+            return self._column_of(win & -win)
+        opponent_win = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            # Block one threat, losing or not there is nothing better
+            return self._column_of(forced & -forced)
+        candidates = possible & ~(opponent_win >> 1)
+        if not candidates:
+            candidates = possible
+        if candidates & (candidates - 1) == 0:
+            return self._column_of(candidates)
+
+        self.deadline = time.monotonic() + time_budget
+        self.nodes = 0
+        best_move = self._ordered(position, mask, candidates, 0)[0]
+        for depth in range(1, min(max_depth, SIZE - moves) + 1):
+            try:
+                value, move = self._root(position, mask, moves, depth, candidates, best_move)
+            except SearchTimeout:
+                break
+            best_move = move
+            if abs(value) >= WIN - SIZE:
+                # A forced result was found, deeper searches will not change it
+                break
+        return self._column_of(best_move)
+
+    @staticmethod
+    def _column_of(bit: int) -> int:
+        return (bit.bit_length() - 1) // HEIGHT
+
+    def _ordered(self, position: int, mask: int, candidates: int, hint: int) -> List[int]:
+        # Hint first, then the moves leaving the most open threats
+        scored = []
+        for order, col in enumerate(COLUMN_ORDER):
+            move = candidates & COLUMN_MASKS[col]
+            if move:
+                threats = popcount(winning_cells(position | move, mask))
+                scored.append((move != hint, -threats, order, move))
+        scored.sort()
+        return [move for _, _, _, move in scored]
+
+    def _root(self, position: int, mask: int, moves: int, depth: int, candidates: int, hint: int) -> Tuple[int, int]:
+        alpha, beta = -WIN, WIN
+        best_value, best_move = -WIN, hint
+        for move in self._ordered(position, mask, candidates, hint):
+            value = -self._negamax(position ^ mask, mask | move, moves + 1, depth - 1, -beta, -alpha)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+        return best_value, best_move
+
+    def _negamax(self, position: int, mask: int, moves: int, depth: int, alpha: int, beta: int) -> int:
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.monotonic() > self.deadline:
+            raise SearchTimeout()
+
+        possible = playable(mask)
+        own_win = winning_cells(position, mask)
+        if own_win & possible:
+            return WIN - moves
+        if moves == SIZE:
+            return 0
+        opponent_win = winning_cells(position ^ mask, mask)
+        forced = possible & opponent_win
+        if forced:
+            if forced & (forced - 1):
+                # Two threats at once cannot both be blocked
+                return -(WIN - moves - 1)
+            possible = forced
+        candidates = possible & ~(opponent_win >> 1)
+        if not candidates:
+            return -(WIN - moves - 1)
+        if depth == 0:
+            return popcount(own_win) - popcount(opponent_win)
+
+        original_alpha = alpha
+        key = position + mask
+        hint = 0
+        entry = self.table.get(key)
+        if entry is not None:
+            entry_depth, flag, value, hint = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_value, best_move = -WIN, 0
+        for move in self._ordered(position, mask, candidates, hint):
+            value = -self._negamax(position ^ mask, mask | move, moves + 1, depth - 1, -beta, -alpha)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER
+        elif best_value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.table[key] = (depth, flag, best_value, best_move)
+        return best_value
+
+
+_search: Connect4Search = None
+
+
+def choose_column(position: int, mask: int, max_depth: int, time_budget: float) -> int:
+    # Entry point for the process pool, each worker keeps its own table
+    global _search
+    if _search is None:
+        _search = Connect4Search()
+    return _search.best_column(position, mask, max_depth, time_budget)
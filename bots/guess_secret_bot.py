@@ -0,0 +1,31 @@
+import asyncio
+import random
+from typing import List, Tuple
+
+from bots.bot import Bot
+from bots.bulls_and_cows import CODES, BullsAndCowsSolver
+from games.guess_secret_game import GuessSecretGame
+from player.guess_player import GuessPlayer
+
+
+class GuessSecretBot(Bot):
+    GAME_TYPE = GuessSecretGame.GAME_TYPE
+    LEVELS = ("easy", "normal", "hard")
+
+    def __init__(self, level: str = None):
+        super().__init__(level)
+        self.solver = BullsAndCowsSolver("entropy" if self.level == "hard" else "minimax")
+
+    def pick_secret(self) -> str:
+        return random.choice(CODES)
+
+    async def choose_move(self, game: GuessSecretGame, player: GuessPlayer) -> str:
+        history: List[Tuple[str, int, int]] = [
+            (turn["guess"], turn["correct_digits"], turn["correct_positions"])
+            for turn in game.turn_history if turn["uuid"] == player.uuid
+        ]
+        if self.level == "easy":
+            # Any code that fits what it has seen, without looking ahead
+            candidates = await asyncio.to_thread(self.solver.candidates, history)
+            return CODES[random.choice(candidates)]
+        return await asyncio.to_thread(self.solver.next_guess, history)
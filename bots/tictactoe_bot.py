@@ -0,0 +1,34 @@
+import os
+import random
+from typing import Dict
+
+from bots.bot import Bot
+from bots.tictactoe_table import TicTacToeTable
+from games.tictactoe_game import TicTacToeGame
+from player.tictactoe_player import TicTacToePlayer
+
+# Optional packed copy of the table, written on first use if missing
+TABLE_PATH = os.environ.get("TICTACTOE_TABLE_PATH")
+
+_table: TicTacToeTable = None
+
+
+def table() -> TicTacToeTable:
+    global _table
+    if _table is None:
+        _table = TicTacToeTable.load(TABLE_PATH) if TABLE_PATH else TicTacToeTable()
+    return _table
+
+
+class TicTacToeBot(Bot):
+    GAME_TYPE = TicTacToeGame.GAME_TYPE
+    LEVELS = ("easy", "normal", "hard")
+
+    # Chance of ignoring the table and playing any free cell
+    BLUNDER_RATES: Dict[str, float] = {"easy": 0.4, "normal": 0.15, "hard": 0.0}
+
+    async def choose_move(self, game: TicTacToeGame, player: TicTacToePlayer) -> int:
+        board = game.bitboard
+        if random.random() < self.BLUNDER_RATES[self.level]:
+            return random.choice([cell for cell in range(9) if board.can_play(cell)])
+        return random.choice(table().best_moves(board.masks[0], board.masks[1]))
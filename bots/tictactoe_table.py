@@ -0,0 +1,90 @@
+import os
+from array import array
+from typing import List
+
+from games.tictactoe_board import CELL_LINES, FULL_MASK
+
+# One entry per (X mask, O mask) pair, indexed by x | o << 9. An entry packs
+# the optimal moves for the player to move as a 9-bit mask and the game
+# value for that player (-1, 0, 1) stored as value + 1 in the bits above.
+# Unreachable positions stay 0, i.e. no moves.
+TABLE_SIZE = 1 << 18
+VALUE_SHIFT = 9
+MOVES_MASK = (1 << VALUE_SHIFT) - 1
+
+
+def position_index(x_mask: int, o_mask: int) -> int:
+    return x_mask | o_mask << 9
+
+
+def _wins_through(mask: int, cell: int) -> bool:
+    for line in CELL_LINES[cell]:
+        if mask & line == line:
+            return True
+    return False
+
+
+def build_table() -> array:
+    table = array('H', bytes(2 * TABLE_SIZE))
+
+    def solve(own: int, other: int) -> int:
+        # Minimax value for the player owning `own`, who is to move
+        occupied = own | other
+        x_to_move = bin(own).count("1") == bin(other).count("1")
+        index = position_index(own, other) if x_to_move else position_index(other, own)
+        if table[index]:
+            return (table[index] >> VALUE_SHIFT) - 1
+
+        best, best_moves = -2, 0
+        for cell in range(9):
+            if occupied >> cell & 1:
+                continue
+            mark = own | 1 << cell
+            if _wins_through(mark, cell):
+                value = 1
+            elif mark | other == FULL_MASK:
+                value = 0
+            else:
+                value = -solve(other, mark)
+            if value > best:
+                best, best_moves = value, 1 << cell
+            elif value == best:
+                best_moves |= 1 << cell
+        table[index] = best_moves | (best + 1) << VALUE_SHIFT
+        return best
+
+    solve(0, 0)
+    return table
+
+
+class TicTacToeTable:
+    # Optimal replies for every position reachable in a game, one lookup per move
+    def __init__(self, table: array = None):
+        self.table = table if table is not None else build_table()
+
+    @classmethod
+    def load(cls, path: str) -> "TicTacToeTable":
+        # A file written by dump(), rebuilt and written if it is missing or damaged
+        table = array('H')
+        try:
+            with open(path, "rb") as f:
+                table.fromfile(f, TABLE_SIZE)
+        except (OSError, EOFError):
+            instance = cls()
+            instance.dump(path)
+            return instance
+        return cls(table)
+
+    def dump(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as f:
+            self.table.tofile(f)
+
+    def value(self, x_mask: int, o_mask: int) -> int:
+        return (self.table[position_index(x_mask, o_mask)] >> VALUE_SHIFT) - 1
+
+    def best_moves(self, x_mask: int, o_mask: int) -> List[int]:
+        moves = self.table[position_index(x_mask, o_mask)] & MOVES_MASK
+        return [cell for cell in range(9) if moves >> cell & 1]
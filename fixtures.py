@@ -0,0 +1,43 @@
+from games.connect4_game import Connect4Game
+
+# Shared by the test modules
+
+# Columns of a Connect 4 game the first seat wins on column 0
+CONNECT4_WIN = [0, 1, 0, 1, 0, 1, 0]
+
+
+def seated(game, sids=("s0", "s1")):
+    for seat, sid in enumerate(sids):
+        game.add_player(game.new_player(f"p{seat}", sid, seat))
+    return game.players
+
+
+def finished_connect4(game_id="g"):
+    game = Connect4Game(game_id)
+    seated(game)
+    for col in CONNECT4_WIN:
+        game.play(game.state.who_will_play, col)
+    return game
+
+
+class RecordingServer:
+    # Stands in for socketio.AsyncServer, emits are kept as (event, data, room, skip_sid)
+    def __init__(self):
+        self.sent = []
+        self.rooms = {}
+        self.disconnected = []
+
+    async def emit(self, event, data, room=None, skip_sid=None):
+        self.sent.append((event, data, room, skip_sid))
+
+    async def enter_room(self, sid, room):
+        self.rooms.setdefault(room, set()).add(sid)
+
+    async def leave_room(self, sid, room):
+        self.rooms.get(room, set()).discard(sid)
+
+    async def close_room(self, room):
+        self.rooms.pop(room, None)
+
+    async def disconnect(self, sid):
+        self.disconnected.append(sid)
@@ -0,0 +1,60 @@
+from typing import List
+
+
+class Connect4Board:
+    __slots__ = ("masks", "heights", "moves")
+
+    # Every column takes HEIGHT bits: ROWS playable cells plus one empty
+    # sentinel bit on top, so shifted lines can never wrap into the next column.
+    ROWS = 6
+    COLS = 7
+    HEIGHT = ROWS + 1
+    SIZE = ROWS * COLS
+
+    # Bit shifts for vertical, horizontal and the two diagonal directions
+    DIRECTIONS = (1, HEIGHT, HEIGHT - 1, HEIGHT + 1)
+
+    def __init__(self):
+        self.masks: List[int] = [0, 0] # one bitboard per player slot
+        self.heights: List[int] = [0] * self.COLS # discs in each column
+        self.moves: int = 0
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < self.COLS and self.heights[col] < self.ROWS
+
+    def play(self, col: int, slot: int) -> int:
+        bit = col * self.HEIGHT + self.heights[col]
+        self.masks[slot] |= 1 << bit
+        self.heights[col] += 1
+        self.moves += 1
+        return bit
+
+    def undo(self, col: int, slot: int) -> None:
+        self.heights[col] -= 1
+        self.moves -= 1
+        self.masks[slot] &= ~(1 << (col * self.HEIGHT + self.heights[col]))
+
+    def lowest_empty_row(self, col: int) -> int:
+        # Rows are counted top-down to match Connect4GameState.board
+        if self.heights[col] >= self.ROWS:
+            return -1
+        return self.ROWS - 1 - self.heights[col]
+
+    def has_won(self, slot: int) -> bool:
+        return self.is_winning_mask(self.masks[slot])
+
+    def is_full(self) -> bool:
+        return self.moves == self.SIZE
+
+    @classmethod
+    def is_winning_mask(cls, mask: int) -> bool:
+        for shift in cls.DIRECTIONS:
+            pairs = mask & (mask >> shift)
+            if pairs & (pairs >> (2 * shift)):
+                return True
+        return False
+
+    @classmethod
+    def cell_index(cls, bit: int) -> int:
+        col, height = divmod(bit, cls.HEIGHT)
+        return (cls.ROWS - 1 - height) * cls.COLS + col
@@ -1,9 +1,13 @@
 from games.game import Game
+from games.connect4_board import Connect4Board
+from games.turn_history import TurnHistory
 from player.connect4_player import Connect4Player
 from typing import List, Union, Dict
 from errors.input_error import InputError
 
 class Connect4GameState:
+    __slots__ = ("who_will_play", "is_game_over", "is_game_ready", "is_game_started", "is_game_full", "board", "winner")
+
     def __init__(self):
         self.who_will_play: str = None
         self.is_game_over: bool = False
@@ -14,26 +18,42 @@ class Connect4GameState:
         self.winner: str = None # uuid of the winner or 'draw'
 
 class Connect4Game(Game):
+    __slots__ = ("state", "turn_history", "bitboard", "last_cell", "_last_slot")
+
+    GAME_TYPE = "connect4"
+    ROWS = Connect4Board.ROWS
+    COLS = Connect4Board.COLS
+
     def __init__(self, game_id: str):
         super().__init__(game_id)
         self.players: List[Connect4Player] = []
         self.state = Connect4GameState()
-        self.turn_history: List[Dict] = []
-        self.ROWS = 6
-        self.COLS = 7
+        # Moves are stored as the index of the filled cell
+        self.turn_history = TurnHistory('B', self._describe_move)
+        self.bitboard = Connect4Board()
+        self.last_cell: int = None
+        self._last_slot: int = None
 
     def add_player(self, player: Connect4Player):
         if len(self.players) == 2:
             raise ValueError("Game is full")
         self.players.append(player)
+        self._index_player(player)
         if len(self.players) == 2:
             self.state.is_game_full = True
             self.state.is_game_ready = True
             self.state.who_will_play = self.players[0].uuid
 
+    def new_player(self, name: str, sid: str, seat: int, uuid: str = None) -> Connect4Player:
+        return Connect4Player(name, sid, self.game_id, color=("Red", "Yellow")[seat], uuid=uuid)
+
+    def seat_of(self, player: Connect4Player) -> int:
+        return ("Red", "Yellow").index(player.color)
+
     def remove_player(self, player: Connect4Player):
         if player in self.players:
             self.players.remove(player)
+            self._unindex_player(player)
         self.state.is_game_full = False
         self.state.is_game_ready = False
 
@@ -63,51 +83,19 @@ class Connect4Game(Game):
                 col = int(col)
             except ValueError:
                 return False
-        if not (0 <= col < self.COLS):
-            return False
-        # Check if the top row of that column is empty
-        return self.state.board[col] == ""
+        return self.bitboard.can_play(col)
 
     def get_lowest_empty_row(self, col: int) -> int:
-        for r in range(self.ROWS - 1, -1, -1):
-            if self.state.board[r * self.COLS + col] == "":
-                return r
-        return -1
+        return self.bitboard.lowest_empty_row(col)
 
     def check_winner(self) -> str:
-        b = self.state.board
-        
-        # Check horizontal
-        for r in range(self.ROWS):
-            for c in range(self.COLS - 3):
-                idx = r * self.COLS + c
-                if b[idx] and b[idx] == b[idx + 1] == b[idx + 2] == b[idx + 3]:
-                    return b[idx]
-                    
-        # Check vertical
-        for r in range(self.ROWS - 3):
-            for c in range(self.COLS):
-                idx = r * self.COLS + c
-                if b[idx] and b[idx] == b[(r + 1) * self.COLS + c] == b[(r + 2) * self.COLS + c] == b[(r + 3) * self.COLS + c]:
-                    return b[idx]
-                    
-        # Check diagonal (down-right)
-        for r in range(self.ROWS - 3):
-            for c in range(self.COLS - 3):
-                idx = r * self.COLS + c
-                if b[idx] and b[idx] == b[(r + 1) * self.COLS + c + 1] == b[(r + 2) * self.COLS + c + 2] == b[(r + 3) * self.COLS + c + 3]:
-                    return b[idx]
-                    
-        # Check diagonal (up-right)
-        for r in range(3, self.ROWS):
-            for c in range(self.COLS - 3):
-                idx = r * self.COLS + c
-                if b[idx] and b[idx] == b[(r - 1) * self.COLS + c + 1] == b[(r - 2) * self.COLS + c + 2] == b[(r - 3) * self.COLS + c + 3]:
-                    return b[idx]
-
-        if "" not in b:
+        # Only the player who made the last move can have completed a line
+        if self._last_slot is None:
+            return None
+        if self.bitboard.has_won(self._last_slot):
+            return self.state.board[self.last_cell]
+        if self.bitboard.is_full():
             return "draw"
-            
         return None
 
     def _play(self, uuid: str, col: int) -> Union[Connect4Player, None]:
@@ -122,21 +110,16 @@ class Connect4Game(Game):
         if not self.is_valid_input(col):
             raise InputError("Invalid move. Column may be full or out of bounds.")
 
-        current_player = self.player1 if self.player1.uuid == uuid else self.player2
-        opponent = self.get_opponent(current_player)
+        current_player, opponent = self.get_player_and_opponent(uuid)
 
         # Place the token
-        row = self.get_lowest_empty_row(col)
-        move_idx = row * self.COLS + col
+        slot = 0 if current_player == self.player1 else 1
+        move_idx = Connect4Board.cell_index(self.bitboard.play(col, slot))
         self.state.board[move_idx] = current_player.color
+        self.last_cell = move_idx
+        self._last_slot = slot
 
-        self.turn_history.append({
-            "uuid": uuid,
-            "player": current_player.name,
-            "col": col,
-            "row": row,
-            "color": current_player.color
-        })
+        self.turn_history.append(current_player, move_idx)
 
         result = self.check_winner()
 
@@ -153,6 +136,17 @@ class Connect4Game(Game):
         self.state.who_will_play = opponent.uuid
         return None
 
+    @staticmethod
+    def _describe_move(player: Connect4Player, cell: int) -> Dict:
+        row, col = divmod(cell, Connect4Board.COLS)
+        return {"col": col, "row": row, "color": player.color}
+
+    def board_delta(self) -> Dict:
+        return {"seq": self.seq, "cell": self.last_cell, "value": self.state.board[self.last_cell]}
+
+    def board_snapshot(self) -> Dict:
+        return {"seq": self.seq, "board": self.state.board}
+
     def is_game_over(self) -> bool:
         return self.state.is_game_over
 
@@ -1,22 +1,73 @@
 from abc import ABC, abstractmethod
 from player.player import Player
-from typing import List, Union
+from typing import List, Union, Dict, Tuple
 from errors.input_error import InputError
 from datetime import datetime, timedelta
 
 class Game(ABC):
+    __slots__ = ("game_id", "players", "_players_by_uuid", "_players_by_sid", "created_at", "started_at",
+                 "last_played_at", "game_over_flag", "seq")
+
     def __init__(self, game_id: int):
         self.game_id: str = game_id
         self.players: List[Player] = []
+        self._players_by_uuid: Dict[str, Player] = {}
+        self._players_by_sid: Dict[str, Player] = {}
         self.created_at: datetime = datetime.now()
         self.started_at: datetime = None
         self.last_played_at: datetime = self.created_at
         self.game_over_flag: bool = False
+        self.seq: int = 0 # number of accepted moves
+
+    GAME_TYPE: str = None
 
     @abstractmethod
     def add_player(self, player: Player) -> None:
         pass
 
+    @abstractmethod
+    def new_player(self, name: str, sid: str, seat: int, uuid: str = None) -> Player:
+        pass
+
+    def seat_of(self, player: Player) -> int:
+        return 0
+
+    def _index_player(self, player: Player) -> None:
+        self._players_by_uuid[player.uuid] = player
+        self._players_by_sid[player.sid] = player
+
+    def _unindex_player(self, player: Player) -> None:
+        self._players_by_uuid.pop(player.uuid, None)
+        if self._players_by_sid.get(player.sid) is player:
+            del self._players_by_sid[player.sid]
+
+    def get_player(self, uuid: str) -> Union[Player, None]:
+        return self._players_by_uuid.get(uuid)
+
+    def get_player_by_sid(self, sid: str) -> Union[Player, None]:
+        return self._players_by_sid.get(sid)
+
+    def get_player_and_opponent(self, uuid: str) -> Tuple[Union[Player, None], Union[Player, None]]:
+        player = self._players_by_uuid.get(uuid)
+        if player is None or len(self.players) < 2:
+            return player, None
+        first, second = self.players
+        return player, (second if player is first else first)
+
+    def leave(self, player: Player) -> bool:
+        # A player leaving a running two player game ends it
+        was_active = len(self.players) == 2 and not self.state.is_game_over
+        self.remove_player(player)
+        if was_active:
+            self.state.is_game_over = True
+        return was_active
+
+    def set_player_sid(self, player: Player, sid: str) -> None:
+        if self._players_by_sid.get(player.sid) is player:
+            del self._players_by_sid[player.sid]
+        player.sid = sid
+        self._players_by_sid[sid] = player
+
     @abstractmethod
     def is_okay_start(self) -> bool:
         pass
@@ -35,7 +86,13 @@ class Game(ABC):
         if not self.started_at:
             self.started_at = self.last_played_at
         
-        return self._play(player, move)
+        result = self._play(player, move)
+        self.seq += 1
+        return result
+
+    def history_since(self, seq: int) -> List[Dict]:
+        # Entry i of turn_history carries seq i + 1
+        return self.turn_history[max(seq, 0):]
 
     @abstractmethod
     def is_game_over(self) -> bool:
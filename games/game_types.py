@@ -0,0 +1,11 @@
+from typing import Dict, Type
+from games.game import Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+from games.connect4_game import Connect4Game
+
+GAME_TYPES: Dict[str, Type[Game]] = {
+    GuessSecretGame.GAME_TYPE: GuessSecretGame,
+    TicTacToeGame.GAME_TYPE: TicTacToeGame,
+    Connect4Game.GAME_TYPE: Connect4Game,
+}
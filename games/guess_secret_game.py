@@ -1,9 +1,12 @@
 from games.game import Game
+from games.turn_history import TurnHistory
 from player.guess_player import GuessPlayer
 from typing import List, Union, Tuple, Dict
 from errors.input_error import InputError
 
 class GameState:
+    __slots__ = ("who_will_play", "is_game_over", "is_game_ready", "is_game_started", "is_game_full", "is_secret_set")
+
     def __init__(self):
         self.who_will_play: str = None
         self.is_game_over: bool = False
@@ -14,9 +17,14 @@ class GameState:
 
 
 class GuessSecretGame(Game):
+    __slots__ = ("turn_history", "state")
+
+    GAME_TYPE = "guess_secret"
+
     def __init__(self, game_id: str):
         super().__init__(game_id)
-        self.turn_history: List[Dict] = []
+        # Moves are stored as guess * 100 + correct_positions * 10 + correct_digits
+        self.turn_history = TurnHistory('I', self._describe_move)
         self.players: List[GuessPlayer] = []
         self.state = GameState()
 
@@ -24,9 +32,18 @@ class GuessSecretGame(Game):
         if len(self.players) == 2:
             raise ValueError("Game is full")
         self.players.append(player)
+        self._index_player(player)
+
+    def new_player(self, name: str, sid: str, seat: int, uuid: str = None) -> GuessPlayer:
+        return GuessPlayer(name, sid, self.game_id, uuid=uuid)
+
+    def set_secret(self, player: GuessPlayer, secret: str) -> None:
+        player.secret = secret
+        self.state.is_secret_set[player.uuid] = True
 
     def remove_player(self, player: GuessPlayer):
         self.players.remove(player)
+        self._unindex_player(player)
 
     def get_opponent(self, player: GuessPlayer):
         return self.players[0] if player == self.players[1] else self.players[1]
@@ -56,9 +73,10 @@ class GuessSecretGame(Game):
             return False
 
     def get_current_player_and_target_secret(self, uuid: str) -> Tuple[GuessPlayer, str]:
-        if self.player1.uuid == uuid:
-            return self.player1, self.player2.secret
-        return self.player2, self.player1.secret
+        current_player, opponent = self.get_player_and_opponent(uuid)
+        if current_player is None or opponent is None:
+            raise InputError("Player not found in game")
+        return current_player, opponent.secret
     
     def calculate_score(self, guess:str , secret: str) -> tuple:
         correct_digits = 0
@@ -79,23 +97,31 @@ class GuessSecretGame(Game):
         if uuid != self.state.who_will_play and self.state.who_will_play:
             raise InputError("Not your turn")
     
-        current_player, secret = self.get_current_player_and_target_secret(uuid)
+        current_player, opponent = self.get_player_and_opponent(uuid)
+        if current_player is None or opponent is None:
+            raise InputError("Player not found in game")
+        secret = opponent.secret
 
         correct_digits, correct_positions = self.calculate_score(guess, secret)
-        self.turn_history.append({
-            "uuid": uuid,
-            "player": current_player.name,
-            "guess": guess,
-            "result": 4 == correct_positions,
-            "correct_positions": correct_positions,
-            "correct_digits": correct_digits
-        })
+        self.turn_history.append(current_player, int(guess) * 100 + correct_positions * 10 + correct_digits)
 
         if self.is_game_over(correct_positions):
             return current_player
-        
+
+        self.state.who_will_play = opponent.uuid
         return None
             
+    @staticmethod
+    def _describe_move(player: GuessPlayer, code: int) -> Dict:
+        guess, score = divmod(code, 100)
+        correct_positions, correct_digits = divmod(score, 10)
+        return {
+            "guess": str(guess),
+            "result": 4 == correct_positions,
+            "correct_positions": correct_positions,
+            "correct_digits": correct_digits
+        }
+
     def print_turn_history(self):
         for turn in self.turn_history:
             print(f"{turn['player']} guessed {turn['guess']} and got {turn['result']}")
@@ -0,0 +1,50 @@
+from typing import List, Tuple
+
+LINES: Tuple[Tuple[int, int, int], ...] = (
+    (0, 1, 2), (3, 4, 5), (6, 7, 8), # rows
+    (0, 3, 6), (1, 4, 7), (2, 5, 8), # cols
+    (0, 4, 8), (2, 4, 6)             # diagonals
+)
+
+LINE_MASKS: Tuple[int, ...] = tuple(sum(1 << cell for cell in line) for line in LINES)
+
+# For every cell, the masks of the lines that pass through it (2 to 4 of them)
+CELL_LINES: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(mask for line, mask in zip(LINES, LINE_MASKS) if cell in line)
+    for cell in range(9)
+)
+
+FULL_MASK = (1 << 9) - 1
+
+
+class TicTacToeBoard:
+    __slots__ = ("masks", "moves")
+
+    def __init__(self):
+        self.masks: List[int] = [0, 0] # one 9-bit mask per player slot
+        self.moves: int = 0
+
+    @property
+    def occupied(self) -> int:
+        return self.masks[0] | self.masks[1]
+
+    def can_play(self, cell: int) -> bool:
+        return 0 <= cell <= 8 and not (self.occupied >> cell) & 1
+
+    def play(self, cell: int, slot: int) -> None:
+        self.masks[slot] |= 1 << cell
+        self.moves += 1
+
+    def undo(self, cell: int, slot: int) -> None:
+        self.masks[slot] &= ~(1 << cell)
+        self.moves -= 1
+
+    def wins_through(self, cell: int, slot: int) -> bool:
+        mask = self.masks[slot]
+        for line in CELL_LINES[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def is_full(self) -> bool:
+        return self.moves == 9
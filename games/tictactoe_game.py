@@ -1,10 +1,14 @@
 from games.game import Game
+from games.tictactoe_board import TicTacToeBoard
+from games.turn_history import TurnHistory
 from player.tictactoe_player import TicTacToePlayer
 from typing import List, Union, Dict, Tuple
 from errors.input_error import InputError
 from errors.mutability_error import MutabilityError
 
 class TicTacToeGameState:
+    __slots__ = ("who_will_play", "is_game_over", "is_game_ready", "is_game_started", "is_game_full", "board", "winner")
+
     def __init__(self):
         self.who_will_play: str = None
         self.is_game_over: bool = False
@@ -15,24 +19,40 @@ class TicTacToeGameState:
         self.winner: str = None # uuid of the winner or 'draw'
 
 class TicTacToeGame(Game):
+    __slots__ = ("state", "turn_history", "bitboard", "last_cell", "_last_slot")
+
+    GAME_TYPE = "tictactoe"
+
     def __init__(self, game_id: str):
         super().__init__(game_id)
         self.players: List[TicTacToePlayer] = []
         self.state = TicTacToeGameState()
-        self.turn_history: List[Dict] = []
+        # Moves are stored as the index of the marked cell
+        self.turn_history = TurnHistory('B', self._describe_move)
+        self.bitboard = TicTacToeBoard()
+        self.last_cell: int = None
+        self._last_slot: int = None
 
     def add_player(self, player: TicTacToePlayer):
         if len(self.players) == 2:
             raise ValueError("Game is full")
         self.players.append(player)
+        self._index_player(player)
         if len(self.players) == 2:
             self.state.is_game_full = True
             self.state.is_game_ready = True
             # Player 1 starts, typically X
             self.state.who_will_play = self.players[0].uuid
 
+    def new_player(self, name: str, sid: str, seat: int, uuid: str = None) -> TicTacToePlayer:
+        return TicTacToePlayer(name, sid, self.game_id, symbol=("X", "O")[seat], uuid=uuid)
+
+    def seat_of(self, player: TicTacToePlayer) -> int:
+        return ("X", "O").index(player.symbol)
+
     def remove_player(self, player: TicTacToePlayer):
         self.players.remove(player)
+        self._unindex_player(player)
         self.state.is_game_full = False
         self.state.is_game_ready = False
 
@@ -62,19 +82,15 @@ class TicTacToeGame(Game):
                 move = int(move)
             except ValueError:
                 return False
-        return 0 <= move <= 8 and self.state.board[move] == ""
+        return self.bitboard.can_play(move)
 
     def check_winner(self) -> str:
-        b = self.state.board
-        lines = [
-            (0, 1, 2), (3, 4, 5), (6, 7, 8), # rows
-            (0, 3, 6), (1, 4, 7), (2, 5, 8), # cols
-            (0, 4, 8), (2, 4, 6)             # diagonals
-        ]
-        for x, y, z in lines:
-            if b[x] and b[x] == b[y] == b[z]:
-                return b[x] # Returns 'X' or 'O'
-        if "" not in b:
+        # Only the lines through the last placed mark can have been completed
+        if self._last_slot is None:
+            return None
+        if self.bitboard.wins_through(self.last_cell, self._last_slot):
+            return self.state.board[self.last_cell] # Returns 'X' or 'O'
+        if self.bitboard.is_full():
             return "draw"
         return None
 
@@ -90,16 +106,14 @@ class TicTacToeGame(Game):
         if not self.is_valid_input(move):
             raise InputError("Invalid move. Cell may be occupied or out of bounds.")
 
-        current_player = self.player1 if self.player1.uuid == uuid else self.player2
-        opponent = self.get_opponent(current_player)
+        current_player, opponent = self.get_player_and_opponent(uuid)
 
+        slot = 0 if current_player == self.player1 else 1
+        self.bitboard.play(move, slot)
         self.state.board[move] = current_player.symbol
-        self.turn_history.append({
-            "uuid": uuid,
-            "player": current_player.name,
-            "move": move,
-            "symbol": current_player.symbol
-        })
+        self.last_cell = move
+        self._last_slot = slot
+        self.turn_history.append(current_player, move)
 
         result = self.check_winner()
 
@@ -116,6 +130,16 @@ class TicTacToeGame(Game):
         self.state.who_will_play = opponent.uuid
         return None
 
+    @staticmethod
+    def _describe_move(player: TicTacToePlayer, cell: int) -> Dict:
+        return {"move": cell, "symbol": player.symbol}
+
+    def board_delta(self) -> Dict:
+        return {"seq": self.seq, "cell": self.last_cell, "value": self.state.board[self.last_cell]}
+
+    def board_snapshot(self) -> Dict:
+        return {"seq": self.seq, "board": self.state.board}
+
     def is_game_over(self) -> bool:
         return self.state.is_game_over
 
@@ -0,0 +1,61 @@
+from array import array
+from typing import Callable, Dict, Iterator, List, Union
+from player.player import Player
+
+
+class TurnHistory:
+    __slots__ = ("players", "slots", "moves", "_describe")
+
+    # Moves are kept as a player slot and a game-specific integer code in two
+    # flat arrays; every player is stored once. The dicts sent to clients are
+    # only built when an entry is read.
+    def __init__(self, typecode: str, describe: Callable[[Player, int], Dict]):
+        self.players: List[Player] = []
+        self.slots = array('B')
+        self.moves = array(typecode)
+        self._describe = describe
+
+    def _slot_of(self, player: Player) -> int:
+        for slot, known in enumerate(self.players):
+            if known is player:
+                return slot
+        self.players.append(player)
+        return len(self.players) - 1
+
+    def append(self, player: Player, move: int) -> None:
+        self.slots.append(self._slot_of(player))
+        self.moves.append(move)
+
+    def entry(self, index: int) -> Dict:
+        player = self.players[self.slots[index]]
+        entry = {
+            "seq": index + 1,
+            "uuid": player.uuid,
+            "player": player.name,
+        }
+        entry.update(self._describe(player, self.moves[index]))
+        return entry
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, List[Dict]]:
+        if isinstance(index, slice):
+            return [self.entry(i) for i in range(*index.indices(len(self.moves)))]
+        if index < 0:
+            index += len(self.moves)
+        if not 0 <= index < len(self.moves):
+            raise IndexError("turn history index out of range")
+        return self.entry(index)
+
+    def __len__(self) -> int:
+        return len(self.moves)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self.moves)):
+            yield self.entry(i)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, TurnHistory):
+            other = other.to_list()
+        return self.to_list() == other
+
+    def to_list(self) -> List[Dict]:
+        return self[:]
@@ -1,8 +1,9 @@
-from fastapi import FastAPI, WebSocket, BackgroundTasks
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, WebSocket, BackgroundTasks, Request, Response, HTTPException
+from fastapi.responses import StreamingResponse
 import socketio
 import json
+import os
+import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from datetime import datetime, timedelta
@@ -16,62 +17,253 @@ from games.tictactoe_game import TicTacToeGame
 from player.tictactoe_player import TicTacToePlayer
 from games.connect4_game import Connect4Game
 from player.connect4_player import Connect4Player
+from games.game_types import GAME_TYPES
 
 from typing import List, Union, Dict
 from errors.input_error import InputError
 from errors.mutability_error import MutabilityError
-from utils import check_game_timeout, generate_custom_id
+from utils import check_game_timeout
+from server.connections import ConnectionRegistry
+from server.expiry import GameExpiry
+from server.assets import AssetCache
+from server.move_log import MoveLog
+from server.bus import BrokerBus
+from server.sharding import BusClientManager, ShardRouter
+from server.metrics import CONTENT_TYPE, ServerMetrics
+from server.move_broadcast import MoveBroadcast
+from server.spectators import SpectatorFanout
+from server.archive import GameArchive
+from server.export import ARROW_STREAM, PARQUET, GameExporter
+from server.ratelimit import EventGuard
+from server import log as logs
+from bots.bot import Bot, bot_uuid
+from bots.bot_types import BOT_GAME_TYPES, bot_for
+from bots import connect4_bot
+from bots.bulls_and_cows import BullsAndCowsSolver
 
 GAME_IDLE_TIMEOUT = timedelta(minutes=10)
+EXPIRY_CHECK_INTERVAL = timedelta(seconds=5)
+MOVE_LOG_DIR = os.environ.get("MOVE_LOG_DIR", "data/move_log")
+MOVE_LOG_COMPACT_AFTER = 50000 # records written since the last snapshot
+# Finished games are kept archived for GAME_IDLE_TIMEOUT, this many stay rebuilt for reconnects
+ARCHIVE_CACHE_SIZE = int(os.environ.get("ARCHIVE_CACHE_SIZE", "1000"))
+# Finished games are exported there for analytics, see server/export.py
+EXPORT_DIR = os.environ.get("EXPORT_DIR", "data/export")
+# Sharded mode, see server/cluster.py: this worker owns the games whose id hashes to SHARD_INDEX
+SHARD_COUNT = int(os.environ.get("SHARD_COUNT", "1"))
+SHARD_INDEX = int(os.environ.get("SHARD_INDEX", "0"))
+BUS_URL = os.environ.get("BUS_URL", "tcp://127.0.0.1:7000")
+# Spectators of a game get at most one batched update per interval
+SPECTATOR_INTERVAL = float(os.environ.get("SPECTATOR_INTERVAL", "0.5"))
+# Events per second and burst for each connection and for each client address,
+# see server/ratelimit.py; create_game and join_game cost more than a move
+EVENT_RATE = float(os.environ.get("EVENT_RATE", "10"))
+EVENT_BURST = float(os.environ.get("EVENT_BURST", "20"))
+ADDRESS_EVENT_RATE = float(os.environ.get("ADDRESS_EVENT_RATE", "50"))
+ADDRESS_EVENT_BURST = float(os.environ.get("ADDRESS_EVENT_BURST", "100"))
+EVENT_COSTS = {"connect": 2, "create_game": 5, "join_game": 2}
+# Rejected events a connection may pile up (one more per second) before it is disconnected
+EVENT_STRIKES = float(os.environ.get("EVENT_STRIKES", "20"))
+# Set behind a proxy that appends the client address to X-Forwarded-For
+TRUST_FORWARDED_FOR = os.environ.get("TRUST_FORWARDED_FOR", "") == "1"
+MAX_GAMES_PER_CONNECTION = int(os.environ.get("MAX_GAMES_PER_CONNECTION", "4"))
+# Running games created from one client address, whatever the connection
+MAX_GAMES_PER_ADDRESS = int(os.environ.get("MAX_GAMES_PER_ADDRESS", "20"))
+MAX_MESSAGE_BYTES = int(os.environ.get("MAX_MESSAGE_BYTES", "16384"))
 
 #TODO: implement restart game
 # TODO: cover one quit game someone else is still in the game and the game is not over
-# TODO: add spectator mode
 # TODO: win screen update
 # TODO: trun history show old guesses like whatsapp messages
 # TODO: inform users about opponent's name, status, etc.
 # TODO: check uiid before user make any changes.
 
 games: Dict[str, Game] = {}
+connections = ConnectionRegistry()
+expiry = GameExpiry(GAME_IDLE_TIMEOUT)
+assets = AssetCache("static")
+logs.configure()
+log = logs.get_logger(__name__)
+metrics = ServerMetrics()
+metrics.watch_games(games)
+archive = GameArchive(GAME_IDLE_TIMEOUT, ARCHIVE_CACHE_SIZE)
+metrics.watch_archive(archive)
+
+exporter = GameExporter(EXPORT_DIR)
+
+def retire(game: Game, departed: List[Player] = (), export: bool = True, finished_at: datetime = None):
+    # Finished games leave the live registry for the archive, the move log
+    # keeps their records until the archive drops them
+    if games.get(game.game_id) is game and game.state.is_game_over:
+        del games[game.game_id]
+        connections.forget_game(game)
+        archive.add(game, finished_at, departed)
+        if export:
+            exporter.append(game, departed)
+
+def find_game(game_id: str) -> Union[Game, None]:
+    return games.get(game_id) or archive.get(game_id)
+
+# Rebuild the games that were live when the process last stopped
+move_log = MoveLog(MOVE_LOG_DIR)
+games.update(move_log.recover())
+# Oldest first, the archive expires records in the order they were added
+for game in sorted(games.values(), key=lambda game: game.last_played_at):
+    # Exported when they finished, before the restart. The archive keeps them
+    # from their last move rather than for a new GAME_IDLE_TIMEOUT per restart
+    retire(game, export=False, finished_at=game.last_played_at)
+for game in games.values():
+    expiry.schedule(game)
+move_log.start()
+exporter.start()
+metrics.watch_writers({"move_log": move_log, "export": exporter})
 
 app = FastAPI()
 
+bus = BrokerBus.from_url(BUS_URL) if SHARD_COUNT > 1 else None
+router = ShardRouter(bus, SHARD_INDEX, SHARD_COUNT)
+
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins=[],
+                           client_manager=BusClientManager(bus) if router.sharded else None,
+                           serializer=metrics.packet_class(),
+                           max_http_buffer_size=MAX_MESSAGE_BYTES)
+app.mount("/socket.io", socketio.ASGIApp(sio))
+spectators = SpectatorFanout(sio, SPECTATOR_INTERVAL)
+moves = MoveBroadcast(sio, spectators)
+guard = EventGuard(sio, EVENT_RATE, EVENT_BURST, ADDRESS_EVENT_RATE, ADDRESS_EVENT_BURST,
+                   strikes=EVENT_STRIKES, costs=EVENT_COSTS, trust_forwarded=TRUST_FORWARDED_FOR,
+                   on_reject=metrics.rejected_events.inc)
+metrics.watch_spectators(lambda: len(spectators))
+# Every connected sid sits in the namespace-wide room None
+metrics.watch_connections(lambda: sum(1 for _ in sio.manager.get_participants("/", None)))
+
+async def close_game(game_id: str):
+    move_log.append("drop", game_id)
+    await sio.emit("game_timeout", {"gameId": game_id, "message": "Game closed after being idle"}, room=game_id)
+    await sio.close_room(game_id)
+    await spectators.close(game_id, "Game closed after being idle")
+
+async def notify_game_timeout(game: Game):
+    metrics.timeouts.inc(game.GAME_TYPE)
+    exporter.append(game)
+    await close_game(game.game_id)
+
+async def expire_archive():
+    for game_id in archive.pop_expired(datetime.now()):
+        # Only players who reconnected to the finished game are still bound
+        connections.forget_game_id(game_id)
+        await close_game(game_id)
+
 scheduler = AsyncIOScheduler()
 scheduler.add_job(
     check_game_timeout,
-    trigger=IntervalTrigger(minutes=15),
-    args=[games, GAME_IDLE_TIMEOUT],
+    trigger=IntervalTrigger(seconds=EXPIRY_CHECK_INTERVAL.total_seconds()),
+    args=[games, expiry, connections, notify_game_timeout],
     id="check_game_timeout",
-    name="Check game timeout every 10 seconds",
+    name="Evict games idle for longer than GAME_IDLE_TIMEOUT",
+    replace_existing=True,
+)
+scheduler.add_job(
+    expire_archive,
+    trigger=IntervalTrigger(seconds=EXPIRY_CHECK_INTERVAL.total_seconds()),
+    id="expire_archive",
+    name="Drop games finished longer than GAME_IDLE_TIMEOUT ago",
     replace_existing=True,
 )
-scheduler.start()
 
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins=[])
-app.mount("/socket.io", socketio.ASGIApp(sio))
+async def compact_move_log():
+    # A coroutine so the scheduler runs it on the event loop rather than in its
+    # thread pool: the snapshot has to see the registry between two events
+    if move_log.records_since_snapshot >= MOVE_LOG_COMPACT_AFTER:
+        # Archived games are still in the log until they expire
+        move_log.compact({**{game.game_id: game for game in archive.games()}, **games})
 
-# Serve static files (like HTML, CSS, JS)
-app.mount("/static", StaticFiles(directory="static"), name="static")
+scheduler.add_job(
+    compact_move_log,
+    trigger=IntervalTrigger(minutes=1),
+    id="compact_move_log",
+    name="Snapshot live games once the move log has grown",
+    replace_existing=True,
+)
+async def sweep_rate_limits():
+    # On the event loop, like the handlers that share the buckets
+    guard.sweep(games)
+
+scheduler.add_job(
+    sweep_rate_limits,
+    trigger=IntervalTrigger(minutes=1),
+    id="sweep_rate_limits",
+    name="Drop the token buckets that have refilled",
+    replace_existing=True,
+)
 
-@app.get("/")
-async def get():
-    with open("static/index.html", "r") as f:
-        return HTMLResponse(content=f.read())
+@app.on_event("startup")
+async def start_scheduler():
+    # AsyncIOScheduler binds to the running loop, which only exists once uvicorn has started
+    scheduler.start()
+
+@app.on_event("startup")
+async def serve_forwarded_events():
+    if router.sharded:
+        asyncio.create_task(router.serve())
+
+@app.on_event("startup")
+async def fan_out_to_spectators():
+    asyncio.create_task(spectators.run())
+
+@app.on_event("startup")
+async def warm_up_bots():
+    # Off the loop, so the first guess bot game does not wait for the tables
+    asyncio.create_task(asyncio.to_thread(BullsAndCowsSolver.warm_up))
+
+@app.on_event("shutdown")
+async def close_move_log():
+    await asyncio.to_thread(move_log.close)
+    await asyncio.to_thread(exporter.close)
+    if bus is not None:
+        await bus.close()
+    connect4_bot.shutdown()
+    logs.shutdown()
+
+# Serve static files (like HTML, CSS, JS) from memory, JS/CSS under content-hashed URLs.
+# HEAD as well, proxies revalidate with it; the server leaves the body out
+@app.api_route("/static/{path:path}", methods=["GET", "HEAD"])
+async def get_static(request: Request, path: str):
+    return assets.serve(request, path, immutable=True)
+
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/export/games")
+async def export_games(since: datetime = None, until: datetime = None, format: str = "arrow"):
+    # Finished games in [since, until) as an Arrow IPC stream or Parquet, read
+    # and encoded a batch at a time on the threadpool
+    if format not in ("arrow", "parquet"):
+        raise HTTPException(status_code=400, detail="format must be arrow or parquet")
+    return StreamingResponse(exporter.stream(since, until, format),
+                             media_type=PARQUET if format == "parquet" else ARROW_STREAM,
+                             headers={"Content-Disposition": f'attachment; filename="games.{format}"'})
+
+@app.api_route("/", methods=["GET", "HEAD"])
+async def get(request: Request):
+    return assets.serve(request, "index.html")
     
-@app.get("/game.html")
-async def get_game():
-    with open("static/game.html", "r") as f:
-        return HTMLResponse(content=f.read())
-
-@app.get("/tictactoe.html")
-async def get_tictactoe():
-    with open("static/tictactoe.html", "r") as f:
-        return HTMLResponse(content=f.read())
-
-@app.get("/connect4.html")
-async def get_connect4():
-    with open("static/connect4.html", "r") as f:
-        return HTMLResponse(content=f.read())
+@app.api_route("/game.html", methods=["GET", "HEAD"])
+async def get_game(request: Request):
+    return assets.serve(request, "game.html")
+
+@app.api_route("/tictactoe.html", methods=["GET", "HEAD"])
+async def get_tictactoe(request: Request):
+    return assets.serve(request, "tictactoe.html")
+
+@app.api_route("/connect4.html", methods=["GET", "HEAD"])
+async def get_connect4(request: Request):
+    return assets.serve(request, "connect4.html")
+
+@app.api_route("/spectate.html", methods=["GET", "HEAD"])
+async def get_spectate(request: Request):
+    return assets.serve(request, "spectate.html")
     
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -81,13 +273,20 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.send_text(f"Message text was: {data}")
 
 @sio.event
+@metrics.timed
 async def connect(sid, environ):
-    print("connect ", sid)
-    # print(environ)
-    # print("-" * 20)
+    log.debug("connect", sid=sid)
+    if not guard.connect(sid, environ):
+        return False
+
+def games_open(sid: str) -> int:
+    # Live games only, finished ones are archived and cost nothing to keep
+    return sum(1 for game_id in connections.games_of(sid) if game_id in games)
 
 
 @sio.event
+@metrics.timed
+@guard.guard
 async def create_game(sid, data):
     user_name = data.get("username")
     game_type = data.get("game_type", "guess_secret")
@@ -95,26 +294,43 @@ async def create_game(sid, data):
     if not user_name:
         await sio.emit("error", {"message": "Invalid user name"}, room=sid)
         return
+
+    if games_open(sid) >= MAX_GAMES_PER_CONNECTION:
+        await sio.emit("error", {"message": "Too many games for this connection"}, room=sid)
+        return
+
+    if guard.games_created(sid, games) >= MAX_GAMES_PER_ADDRESS:
+        await sio.emit("error", {"message": "Too many games for this address"}, room=sid)
+        return
        
-    game_id = generate_custom_id()
-    if game_type == "guess_secret":
-        game = GuessSecretGame(game_id)
-        first_player = GuessPlayer(user_name, sid, game_id)
-    elif game_type == "tictactoe":
-        game = TicTacToeGame(game_id)
-        first_player = TicTacToePlayer(user_name, sid, game_id, symbol="X")
-    elif game_type == "connect4":
-        game = Connect4Game(game_id)
-        first_player = Connect4Player(user_name, sid, game_id, color="Red")
-    else:
+    bot_type = BOT_GAME_TYPES.get(game_type)
+    if bot_type is not None:
+        game_type = bot_type.GAME_TYPE
+        try:
+            bot = bot_type(data.get("difficulty"))
+        except ValueError:
+            await sio.emit("error", {"message": "Invalid difficulty"}, room=sid)
+            return
+
+    if game_type not in GAME_TYPES:
         await sio.emit("error", {"message": "Invalid game type"}, room=sid)
         return
 
+    game_id = router.new_game_id()
+    game = GAME_TYPES[game_type](game_id)
+    first_player = game.new_player(user_name, sid, seat=0)
     game.add_player(first_player)
 
     games[game_id] = game
+    connections.bind(sid, game_id, first_player.uuid)
+    guard.created(sid, game_id)
+    moves.negotiate(sid, data)
+    expiry.schedule(game)
+    move_log.append("create", game_id, type=game_type, name=user_name, uuid=first_player.uuid, seat=0)
+    if bot_type is not None:
+        add_bot(game, bot)
 
-    print(f"Game {game_id} ({game_type}) created by {user_name} with player id {first_player.uuid}")
+    log.info("game_created", game_id=game_id, type=game_type, username=user_name, uuid=first_player.uuid)
 
     await sio.emit("game_created", {
         "gameId": game_id,
@@ -123,7 +339,41 @@ async def create_game(sid, data):
         "gameType": game_type
     }, room=sid)
 
+def add_bot(game: Game, bot: Bot):
+    player = game.new_player(bot.NAME, None, seat=1, uuid=bot_uuid(bot.level))
+    game.add_player(player)
+    move_log.append("join", game.game_id, name=player.name, uuid=player.uuid, seat=1)
+    secret = bot.pick_secret()
+    if secret is not None:
+        game.set_secret(player, secret)
+        move_log.append("secret", game.game_id, uuid=player.uuid, secret=secret)
+
+async def play_bot_turn(game: Game):
+    found = bot_for(game)
+    if found is None:
+        return
+    bot, player = found
+    if game.state.is_game_over or not game.is_okay_start() or game.state.who_will_play != player.uuid:
+        return
+
+    move = await bot.choose_move(game, player)
+    # The game may have been closed while the bot was thinking
+    if games.get(game.game_id) is not game:
+        return
+    _, opponent = game.get_player_and_opponent(player.uuid)
+    try:
+        winner = game.play(player.uuid, move)
+    except InputError as e:
+        metrics.input_errors.inc(str(e))
+        log.warning("bot_move_rejected", game_id=game.game_id, move=move, message=str(e))
+        return
+    move_log.append("play", game.game_id, uuid=player.uuid, move=move)
+    await moves.send(game, player, opponent, move, winner)
+
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def join_game(sid, data):
     user_name = data.get("username")
     game_id = data.get("gameId")
@@ -133,38 +383,40 @@ async def join_game(sid, data):
         return
 
     if game_id not in games:
-        print("Game not found")
+        log.debug("game_not_found", game_id=game_id, sid=sid)
         await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
         return
+
+    if games_open(sid) >= MAX_GAMES_PER_CONNECTION:
+        await sio.emit("error", {"message": "Too many games for this connection"}, room=sid)
+        return
     
     game = games[game_id]
-    
-    # Add the player to the game room
-    await sio.enter_room(sid, game_id)
 
-    if isinstance(game, GuessSecretGame):
-        new_player = GuessPlayer(user_name, sid, game_id)
-        game_type = "guess_secret"
-    elif isinstance(game, TicTacToeGame):
-        new_player = TicTacToePlayer(user_name, sid, game_id, symbol="O")
-        game_type = "tictactoe"
-    elif isinstance(game, Connect4Game):
-        new_player = Connect4Player(user_name, sid, game_id, color="Yellow")
-        game_type = "connect4"
-    else:
-        await sio.emit("error", {"message": "Unknown game type"}, room=sid)
+    new_player = game.new_player(user_name, sid, seat=1)
+    try:
+        game.add_player(new_player)
+    except ValueError as e:
+        await sio.emit("error", {"message": str(e)}, room=sid)
         return
 
-    game.add_player(new_player)
+    # Add the player to the game room
+    await sio.enter_room(sid, game_id)
+    connections.bind(sid, game_id, new_player.uuid)
+    moves.negotiate(sid, data)
+    move_log.append("join", game_id, name=user_name, uuid=new_player.uuid, seat=1)
 
     await sio.emit("game_joined", {
         "gameId": game_id,
         "username": user_name,
         "uuid": new_player.uuid,
-        "gameType": game_type
+        "gameType": game.GAME_TYPE
     }, room=sid)
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def submit_secret(sid, data):
     game_id = data.get("gameId")
     secret = data.get("secret")
@@ -180,31 +432,26 @@ async def submit_secret(sid, data):
         return
     
     game = games[game_id]
+    if not isinstance(game, GuessSecretGame):
+        await sio.emit("error", {"message": "Not a guess the secret game"}, room=sid)
+        return
 
     # Check UUID
-    if uuid not in [p.uuid for p in game.players]:
+    player = game.get_player(uuid)
+    if not player:
         await sio.emit("error", {"message": "Invalid UUID for this game"}, room=sid)
         return
 
     if not GuessSecretGame.is_valid_input(secret):
         await sio.emit("error", {"message": "Invalid secret"}, room=sid)
         return
-    
-    player = None
-    for p in game.players:
-        if p.uuid == uuid:
-            player = p
-            break
-    
-    if not player:
-        await sio.emit("error", {"message": "Player not found in game"}, room=sid)
-        return
 
     try:
-        player.secret = secret
+        game.set_secret(player, secret)
     except MutabilityError:
         await sio.emit("error", {"message": "Secret already submitted"}, room=sid)
         return
+    move_log.append("secret", game_id, uuid=uuid, secret=secret)
 
     await sio.emit("secret_submitted", {
         "gameId": game_id,
@@ -212,73 +459,59 @@ async def submit_secret(sid, data):
         "uuid": uuid
     }, room=sid)
 
-    game.state.is_secret_set[uuid] = True
-
     who_will_play = getattr(game.state, 'who_will_play', None)
+    spectators.publish(game)
     await sio.emit("opponent_status", {"players": [{"name": p.name, "uuid": p.uuid} for p in game.players], "gameStatus": game.get_status(), "who_will_play": who_will_play}, room=game_id)
+    await play_bot_turn(game)
 
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def submit_guess(sid, data):
     game_id = data.get("gameId")
     guess = data.get("guess")
     username = data.get("username")
     uuid = data.get("uuid")
-    print(f"Guess: {guess}")
 
     if not game_id or not guess or not uuid:
         await sio.emit("error", {"message": "Invalid game id, guess or username"}, room=sid)
         return
 
     if game_id not in games:
-        await sio.emit("error", {"message": "Game not found"}, room=sid)
+        await sio.emit("error", {"message": "Game is already over" if game_id in archive else "Game not found"}, room=sid)
         return
 
     game = games[game_id]
 
     # Check UUID
-    if uuid not in [p.uuid for p in game.players]:
+    player, opponent = game.get_player_and_opponent(uuid)
+    if not player:
         await sio.emit("error", {"message": "Invalid UUID for this game"}, room=sid)
         return
-    opponent = game.player2 if game.player1.uuid == uuid else game.player1
 
     if not opponent:
         await sio.emit("error", {"message": "Opponent not found"}, room=sid)
         return
 
-    print(f"Opponent: {opponent.name} - {opponent.uuid}")
     try:
         winner = game.play(uuid, guess)
     except InputError as e:
-        print(f"Input error: {e}")
+        metrics.input_errors.inc(str(e))
+        log.debug("input_error", game_id=game_id, uuid=uuid, message=str(e))
         await sio.emit("error", {"message": str(e)}, room=sid)
         return
-    print(f"Winner: {winner}")
-    if winner:
-        # Game over - send the winner to both players
-        await sio.emit("game_over", {
-            "gameId": game_id,
-            "winner": winner.name,
-        }, room=game_id)
-
-    await sio.emit("guess_submitted", {
-        "gameId": game_id,
-        "username": username,
-        "guess": guess,
-    }, room=sid)
-    game.state.who_will_play = opponent.uuid
-
-    await sio.emit("guess_turn", {
-        "gameId": game_id,
-        "username": opponent.name,
-    }, room=opponent.sid)
-
-    await sio.emit("update_history",  game.turn_history
-    , room=game_id)
-    print(sid == game.player1.sid, sid == game.player2.sid)
-    print("Guess results emitted")
+    move_log.append("play", game_id, uuid=uuid, move=guess)
+    log.debug("move", game_id=game_id, uuid=uuid, move=guess, winner=winner.uuid if winner else None)
+    await moves.send(game, player, opponent, guess, winner)
+    await play_bot_turn(game)
+    retire(game)
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def submit_tictactoe_move(sid, data):
     game_id = data.get("gameId")
     move = data.get("move")
@@ -290,7 +523,7 @@ async def submit_tictactoe_move(sid, data):
         return
 
     if game_id not in games:
-        await sio.emit("error", {"message": "Game not found"}, room=sid)
+        await sio.emit("error", {"message": "Game is already over" if game_id in archive else "Game not found"}, room=sid)
         return
 
     game = games[game_id]
@@ -298,10 +531,10 @@ async def submit_tictactoe_move(sid, data):
         await sio.emit("error", {"message": "Not a Tic-Tac-Toe game"}, room=sid)
         return
 
-    if uuid not in [p.uuid for p in game.players]:
+    player, opponent = game.get_player_and_opponent(uuid)
+    if not player:
         await sio.emit("error", {"message": "Invalid UUID for this game"}, room=sid)
         return
-    opponent = game.get_opponent(next((p for p in game.players if p.uuid == uuid), None))
 
     if not opponent:
         await sio.emit("error", {"message": "Opponent not found"}, room=sid)
@@ -310,31 +543,19 @@ async def submit_tictactoe_move(sid, data):
     try:
         winner = game.play(uuid, move)
     except InputError as e:
+        metrics.input_errors.inc(str(e))
         await sio.emit("error", {"message": str(e)}, room=sid)
         return
-
-    await sio.emit("move_submitted", {
-        "gameId": game_id,
-        "username": username,
-        "move": move,
-    }, room=sid)
-
-    await sio.emit("guess_turn", {
-        "gameId": game_id,
-        "username": opponent.name,
-    }, room=opponent.sid)
-
-    await sio.emit("update_board", {
-        "board": game.state.board,
-        "history": game.turn_history
-    }, room=game_id)
-
-    if winner == "draw":
-        await sio.emit("game_over", {"gameId": game_id, "winner": "draw"}, room=game_id)
-    elif winner:
-        await sio.emit("game_over", {"gameId": game_id, "winner": winner.name}, room=game_id)
+    move_log.append("play", game_id, uuid=uuid, move=move)
+    log.debug("move", game_id=game_id, uuid=uuid, move=move, winner=getattr(winner, "uuid", winner))
+    await moves.send(game, player, opponent, move, winner)
+    await play_bot_turn(game)
+    retire(game)
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def submit_connect4_move(sid, data):
     game_id = data.get("gameId")
     col = data.get("col")
@@ -346,7 +567,7 @@ async def submit_connect4_move(sid, data):
         return
 
     if game_id not in games:
-        await sio.emit("error", {"message": "Game not found"}, room=sid)
+        await sio.emit("error", {"message": "Game is already over" if game_id in archive else "Game not found"}, room=sid)
         return
 
     game = games[game_id]
@@ -354,10 +575,10 @@ async def submit_connect4_move(sid, data):
         await sio.emit("error", {"message": "Not a Connect 4 game"}, room=sid)
         return
 
-    if uuid not in [p.uuid for p in game.players]:
+    player, opponent = game.get_player_and_opponent(uuid)
+    if not player:
         await sio.emit("error", {"message": "Invalid UUID for this game"}, room=sid)
         return
-    opponent = game.get_opponent(next((p for p in game.players if p.uuid == uuid), None))
 
     if not opponent:
         await sio.emit("error", {"message": "Opponent not found"}, room=sid)
@@ -366,58 +587,83 @@ async def submit_connect4_move(sid, data):
     try:
         winner = game.play(uuid, col)
     except InputError as e:
+        metrics.input_errors.inc(str(e))
         await sio.emit("error", {"message": str(e)}, room=sid)
         return
+    move_log.append("play", game_id, uuid=uuid, move=col)
+    log.debug("move", game_id=game_id, uuid=uuid, move=col, winner=getattr(winner, "uuid", winner))
+    await moves.send(game, player, opponent, col, winner)
+    await play_bot_turn(game)
+    retire(game)
 
-    await sio.emit("move_submitted", {
-        "gameId": game_id,
-        "username": username,
-        "col": col,
-    }, room=sid)
+@sio.event
+@metrics.timed
+@guard.guard
+@router.route
+async def request_snapshot(sid, data):
+    game_id = data.get("gameId")
 
-    await sio.emit("guess_turn", {
-        "gameId": game_id,
-        "username": opponent.name,
-    }, room=opponent.sid)
+    game = find_game(game_id)
+    if not isinstance(game, (TicTacToeGame, Connect4Game)):
+        await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
+        return
+
+    await moves.send_snapshot(game, sid)
+
+@sio.event
+@metrics.timed
+@guard.guard
+@router.route
+async def request_history(sid, data):
+    # Read-only, for a client that noticed a gap in the guess history
+    game_id = data.get("gameId")
+    last_seq = data.get("lastSeq", 0)
+
+    if not isinstance(last_seq, int):
+        await sio.emit("error", {"message": "Invalid last sequence"}, room=sid)
+        return
 
-    await sio.emit("update_board", {
-        "board": game.state.board,
-        "history": game.turn_history
-    }, room=game_id)
+    game = find_game(game_id)
+    if not isinstance(game, GuessSecretGame):
+        await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
+        return
 
-    if winner == "draw":
-        await sio.emit("game_over", {"gameId": game_id, "winner": "draw"}, room=game_id)
-    elif winner:
-        await sio.emit("game_over", {"gameId": game_id, "winner": winner.name}, room=game_id)
+    await sio.emit("append_history", game.history_since(last_seq), room=sid)
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def reconnect_player(sid, data):
     game_id = data.get("gameId")
     username = data.get("username")
     uuid = data.get("uuid")
+    last_seq = data.get("lastSeq", 0)
 
     if not game_id or not username:
         await sio.emit("error", {"message": "Invalid game ID or username"}, room=sid)
         return
 
-    if game_id not in games:
+    if not isinstance(last_seq, int):
+        await sio.emit("error", {"message": "Invalid last sequence"}, room=sid)
+        return
+
+    game = find_game(game_id)
+    if game is None:
         await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
         return
 
-    game = games[game_id]
-    found = False
+    player = game.get_player(uuid)
 
-    for player in game.players:
-        if player.uuid == uuid:
-            player.sid = sid
-            found = True
-            break
-    
-    if not found:
+    if not player:
         await sio.emit("error", {"message": "Player not found in game"}, room=sid)
         return
+
+    connections.rebind(player.sid, sid, game_id, uuid)
+    game.set_player_sid(player, sid)
+    moves.negotiate(sid, data)
     
-    print(f"Player {username} reconnected to game {game_id} with uuid {uuid}")
+    log.info("player_reconnected", game_id=game_id, username=username, uuid=uuid)
     await sio.enter_room(sid, game_id)
     secret = getattr(player, 'secret', None)
     
@@ -426,33 +672,61 @@ async def reconnect_player(sid, data):
         "is_game_ready": game.state.is_game_ready,
         "is_game_started": game.state.is_game_started,
         "is_game_full": game.state.is_game_full,
-        "who_will_play": game.state.who_will_play
+        "who_will_play": game.state.who_will_play,
+        "seq": game.seq
     }
 
     if isinstance(game, GuessSecretGame):
         state_dict["is_secret_set"] = game.state.is_secret_set.get(uuid, False)
-        game_type = "guess_secret"
-    elif isinstance(game, TicTacToeGame):
-        state_dict["board"] = game.state.board
-        game_type = "tictactoe"
-    elif isinstance(game, Connect4Game):
-        state_dict["board"] = game.state.board
-        game_type = "connect4"
+    else:
+        state_dict.update(game.board_snapshot())
 
     await sio.emit("reconnected", {
         "gameId": game_id,
-        "gameType": game_type,
+        "gameType": game.GAME_TYPE,
         "username": username,
         "uuid": uuid,
         "secret": secret,
-        "history": game.turn_history,
+        "history": game.history_since(last_seq),
         "state": state_dict
     }, room=sid)
 
     who_will_play = getattr(game.state, 'who_will_play', None)
+    spectators.publish(game)
     await sio.emit("opponent_status", {"players": [{"name": p.name, "uuid": p.uuid} for p in game.players], "gameStatus": game.get_status(), "who_will_play": who_will_play}, room=game_id)
 
 @sio.event
+@metrics.timed
+@guard.guard
+@router.route
+async def spectate_game(sid, data):
+    game_id = data.get("gameId")
+
+    game = find_game(game_id)
+    if game is None:
+        await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
+        return
+
+    log.debug("spectator_joined", game_id=game_id, sid=sid)
+    await spectators.join(sid, game)
+
+@sio.event
+@metrics.timed
+@guard.guard
+@router.route
+async def stop_spectating(sid, data):
+    game_id = data.get("gameId")
+
+    if not game_id:
+        await sio.emit("error", {"message": "Invalid game ID"}, room=sid)
+        return
+
+    await spectators.leave(sid, game_id)
+
+@sio.event
+@metrics.timed
+@guard.guard
+@router.route
 async def quit_game(sid, data):
     game_id = data.get("gameId")
     username = data.get("username")
@@ -462,45 +736,56 @@ async def quit_game(sid, data):
         await sio.emit("error", {"message": "Invalid game ID, username or uuid"}, room=sid)
         return
 
-    if game_id not in games:
+    game = find_game(game_id)
+    if game is None:
         await sio.emit("game_not_found", {"message": "Game not found"}, room=sid)
         return
 
-    game = games[game_id]
-
     # Check UUID
-    if uuid not in [p.uuid for p in game.players]:
+    player = game.get_player(uuid)
+    if not player:
         await sio.emit("error", {"message": "Invalid UUID for this game"}, room=sid)
         return
 
-    was_active = len(game.players) == 2 and not game.state.is_game_over
+    if game_id in games:
+        was_active = game.leave(player)
+    else:
+        archive.leave(game, player)
+        was_active = False
+    move_log.append("quit", game_id, uuid=uuid)
+    connections.unbind(player.sid, game_id)
+    await sio.leave_room(sid, game_id)
 
-    for player in game.players:
-        if player.uuid == uuid:
-            game.players.remove(player)
-            sio.leave_room(sid, game_id)
-            break
-            
     if was_active:
-        game.state.is_game_over = True
         await sio.emit("error", {"message": f"{username} has left the game. Game over."}, room=game_id)
     
     if not game.players:
-        del games[game_id]
+        games.pop(game_id, None)
+        await spectators.close(game_id, "Game closed, every player left")
+    retire(game, [player])
 
-    print(f"Player {username} quit game {game_id}")
+    log.info("player_quit", game_id=game_id, username=username, uuid=uuid)
 
     who_will_play = getattr(game.state, 'who_will_play', None)
+    spectators.publish(game)
     await sio.emit("opponent_status", {"players": [{"name": p.name, "uuid": p.uuid} for p in game.players], "gameStatus": game.get_status(), "who_will_play": who_will_play}, room=game_id)
 
 @sio.event
+@metrics.timed
+@router.broadcast
 async def disconnect(sid):
-    print("disconnect ", sid)
-    for game_id, game in games.items():
-        for player in game.players:
-            if player.sid == sid:
-                sio.leave_room(sid, game_id)
-                # game.players.remove(player)
-                who_will_play = getattr(game.state, 'who_will_play', None)
-                await sio.emit("opponent_status", {"players": [{"name": p.name, "uuid": p.uuid} for p in game.players], "gameStatus": game.get_status(), "who_will_play": who_will_play}, room=game_id)
-                break
\ No newline at end of file
+    log.debug("disconnect", sid=sid)
+    moves.forget(sid)
+    spectators.forget(sid)
+    guard.forget(sid)
+    for game_id in connections.pop(sid):
+        # A finished game has nothing to tell its room, and rebuilding an
+        # archived one here would push live entries out of the cache
+        game = games.get(game_id)
+        if game is None:
+            continue
+        await sio.leave_room(sid, game_id)
+        # game.players.remove(player)
+        who_will_play = getattr(game.state, 'who_will_play', None)
+        spectators.publish(game)
+        await sio.emit("opponent_status", {"players": [{"name": p.name, "uuid": p.uuid} for p in game.players], "gameStatus": game.get_status(), "who_will_play": who_will_play}, room=game_id)
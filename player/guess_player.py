@@ -3,6 +3,8 @@ from errors.mutability_error import MutabilityError
 from uuid import uuid4
 
 class GuessPlayer(Player):
+    __slots__ = ("_secret",)
+
     def __init__(self, name, sid: str, game_id, uuid=None):
         super().__init__(name, sid, game_id, uuid)
         self._secret = None
@@ -4,6 +4,8 @@ from abc import ABC, abstractmethod
 from uuid import uuid4
 
 class Player(ABC):
+    __slots__ = ("name", "sid", "game_id", "score", "_uuid")
+
     def __init__(self, name, sid: str, game_id, uuid=None):
         self.name = name
         self.sid = sid
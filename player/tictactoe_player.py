@@ -1,6 +1,8 @@
 from player.player import Player
 
 class TicTacToePlayer(Player):
+    __slots__ = ("symbol",)
+
     def __init__(self, name: str, sid: str, game_id: str, symbol: str, uuid: str = None):
         super().__init__(name, sid, game_id, uuid)
         self.symbol = symbol # 'X' or 'O'
@@ -0,0 +1,192 @@
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from games.game import Game
+from games.game_types import GAME_TYPES
+from player.player import Player
+from server.move_log import MOVE_ARGUMENTS, REPLAY_ERRORS
+
+# Finished games leave the live registry for this archive. A record keeps only
+# what replaying the game through play() needs: each player once, which of
+# them moved first and the moves packed as the arguments play() took, one
+# byte per move for the boards (the column for Connect 4, the cell for
+# Tic-Tac-Toe) and two for a guess. Every later turn belongs to
+# state.who_will_play.
+#
+# Player uuids are kept as their 16 bytes when they are canonical UUIDs.
+#
+# Games are rebuilt on demand, the most recently used ones stay rebuilt in an
+# LRU cache so a burst of reconnects after a game ends replays it once.
+
+MOVE_TYPECODES = {"guess_secret": "H", "tictactoe": "B", "connect4": "B"}
+# Turns a packed move back into the argument Game.play takes
+PLAY_ARGUMENTS: Dict[str, Callable[[int], object]] = {
+    "guess_secret": str,
+    "tictactoe": int,
+    "connect4": int,
+}
+
+
+class ArchivedGame:
+    __slots__ = ("game_id", "game_type", "players", "first", "moves", "left",
+                 "created_at", "started_at", "last_played_at", "archived_at")
+
+    def __init__(self, game_id: str, game_type: str, players: Tuple[Tuple[str, str, int, str], ...], first: int,
+                 moves: bytes, left: Tuple[str, ...], created_at: float, started_at: float,
+                 last_played_at: float, archived_at: datetime):
+        self.game_id = game_id
+        self.game_type = game_type
+        self.players = players # (name, uuid, seat, secret) in seat order
+        self.first = first # index in players of the first mover
+        self.moves = moves
+        self.left = left # uuids of the players who quit
+        self.created_at = created_at
+        self.started_at = started_at
+        self.last_played_at = last_played_at
+        self.archived_at = archived_at
+
+
+def pack_uuid(uuid: str) -> Union[bytes, str]:
+    try:
+        packed = UUID(uuid).bytes
+    except ValueError:
+        return uuid
+    return packed if str(UUID(bytes=packed)) == uuid else uuid
+
+
+def unpack_uuid(packed: Union[bytes, str]) -> str:
+    return str(UUID(bytes=packed)) if isinstance(packed, bytes) else packed
+
+
+def pack(game: Game, now: datetime, departed: Sequence[Player] = ()) -> ArchivedGame:
+    # departed names players who quit before their first move, the turn
+    # history does not know them and the replay needs their seat
+    history = game.turn_history
+    players = list(game.players)
+    players += [p for p in list(history.players) + list(departed) if p not in players]
+    # The first seat has to be added first, add_player hands it the first turn
+    players.sort(key=game.seat_of)
+
+    to_argument = MOVE_ARGUMENTS[game.GAME_TYPE]
+    moves = array(MOVE_TYPECODES[game.GAME_TYPE], (int(to_argument(code)) for code in history.moves))
+    first = players.index(history.players[history.slots[0]]) if len(history) else 0
+    return ArchivedGame(
+        game.game_id, game.GAME_TYPE,
+        tuple((p.name, pack_uuid(p.uuid), game.seat_of(p), getattr(p, "secret", None)) for p in players),
+        first, moves.tobytes(), tuple(pack_uuid(p.uuid) for p in players if p not in game.players),
+        game.created_at.timestamp(), game.started_at.timestamp() if game.started_at else None,
+        game.last_played_at.timestamp(), now,
+    )
+
+
+def rebuild(record: ArchivedGame) -> Game:
+    game = GAME_TYPES[record.game_type](record.game_id)
+    for name, uuid, seat, _ in record.players:
+        game.add_player(game.new_player(name, None, seat, uuid=unpack_uuid(uuid)))
+    for _, uuid, _, secret in record.players:
+        if secret:
+            game.set_secret(game.get_player(unpack_uuid(uuid)), secret)
+
+    first = unpack_uuid(record.players[record.first][1])
+    to_argument = PLAY_ARGUMENTS[record.game_type]
+    moves = array(MOVE_TYPECODES[record.game_type])
+    moves.frombytes(record.moves)
+    for move in moves:
+        game.play(game.state.who_will_play or first, to_argument(move))
+    for uuid in record.left:
+        game.leave(game.get_player(unpack_uuid(uuid)))
+
+    game.state.is_game_over = True
+    game.created_at = datetime.fromtimestamp(record.created_at)
+    game.last_played_at = datetime.fromtimestamp(record.last_played_at)
+    if record.started_at is not None:
+        game.started_at = datetime.fromtimestamp(record.started_at)
+    return game
+
+
+class GameArchive:
+    def __init__(self, ttl: timedelta, cache_size: int = 1000):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        # Insertion order is archive order, the oldest record is first
+        self._records: "OrderedDict[str, ArchivedGame]" = OrderedDict()
+        self._cache: "OrderedDict[str, Game]" = OrderedDict()
+
+    def add(self, game: Game, now: datetime = None, departed: Sequence[Player] = ()) -> ArchivedGame:
+        record = pack(game, now or datetime.now(), departed)
+        self._records.pop(game.game_id, None)
+        self._records[game.game_id] = record
+        # Its players are the likeliest to reconnect
+        self._remember(game)
+        return record
+
+    def get(self, game_id: str) -> Optional[Game]:
+        game = self._cache.get(game_id)
+        if game is not None:
+            self._cache.move_to_end(game_id)
+            return game
+        record = self._records.get(game_id)
+        if record is None:
+            return None
+        try:
+            game = rebuild(record)
+        except REPLAY_ERRORS:
+            self.discard(game_id)
+            return None
+        self._remember(game)
+        return game
+
+    def games(self) -> Iterator[Game]:
+        # Every archived game, for the move log snapshot; the cache is left as is
+        for game_id, record in list(self._records.items()):
+            game = self._cache.get(game_id)
+            if game is None:
+                try:
+                    game = rebuild(record)
+                except REPLAY_ERRORS:
+                    continue
+            yield game
+
+    def _remember(self, game: Game) -> None:
+        self._cache[game.game_id] = game
+        self._cache.move_to_end(game.game_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def leave(self, game: Game, player: Player) -> None:
+        # Quitting a finished game sticks after the game drops out of the cache
+        game.leave(player)
+        if not game.players:
+            self.discard(game.game_id)
+            return
+        record = self._records.get(game.game_id)
+        uuid = pack_uuid(player.uuid)
+        if record is not None and uuid not in record.left:
+            record.left += (uuid,)
+
+    def discard(self, game_id: str) -> None:
+        self._records.pop(game_id, None)
+        self._cache.pop(game_id, None)
+
+    def pop_expired(self, now: datetime) -> List[str]:
+        expired = []
+        while self._records:
+            game_id, record = next(iter(self._records.items()))
+            if record.archived_at + self.ttl > now:
+                break
+            self.discard(game_id)
+            expired.append(game_id)
+        return expired
+
+    @property
+    def cached(self) -> int:
+        return len(self._cache)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
@@ -0,0 +1,140 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import time
+from typing import Dict, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# static/... references in the HTML pages, with or without a ?v= suffix
+ASSET_REFERENCE = re.compile(r'(href|src)="(static/[^"?#]+)(\?[^"#]*)?"')
+
+COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+
+
+class Asset:
+    __slots__ = ("path", "mtime", "content_type", "version", "variants", "dependencies")
+
+    def __init__(self, path: str, mtime: float, body: bytes, content_type: str, dependencies: Dict[str, str] = None):
+        self.path = path
+        self.mtime = mtime
+        self.content_type = content_type
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        # encoding -> (body, etag), built once when the file is loaded
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (body, f'"{self.version}"')}
+        self.dependencies = dependencies or {}
+        if content_type.startswith(COMPRESSIBLE_TYPES) and len(body) > 256:
+            self.variants["gzip"] = (gzip.compress(body, 9, mtime=0), f'"{self.version}-gz"')
+            if brotli is not None:
+                self.variants["br"] = (brotli.compress(body, quality=11), f'"{self.version}-br"')
+
+    def select(self, accept_encoding: str) -> Tuple[str, bytes, str]:
+        accepted = {token.split(";")[0].strip() for token in accept_encoding.lower().split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                return (encoding,) + self.variants[encoding]
+        return ("identity",) + self.variants["identity"]
+
+    def matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        etags = {etag for _, etag in self.variants.values()}
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag in etags:
+                return True
+        return False
+
+
+class AssetCache:
+    def __init__(self, root: str = "static", check_interval: float = 1.0):
+        self.root = os.path.realpath(root)
+        self.check_interval = check_interval
+        self._assets: Dict[str, Asset] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    def _resolve(self, path: str) -> str:
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([full_path, self.root]) != self.root:
+            raise FileNotFoundError(path)
+        return full_path
+
+    def get(self, path: str) -> Asset:
+        now = time.monotonic()
+        asset = self._assets.get(path)
+        if asset is not None and now - self._checked_at[path] < self.check_interval:
+            return asset
+
+        full_path = self._resolve(path)
+        mtime = os.stat(full_path).st_mtime
+        self._checked_at[path] = now
+        if asset is not None and asset.mtime == mtime and not self._dependencies_changed(asset):
+            return asset
+
+        with open(full_path, "rb") as f:
+            body = f.read()
+        content_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+        dependencies = None
+        if content_type == "text/html":
+            body, dependencies = self._pin_references(body)
+            content_type = "text/html; charset=utf-8"
+        asset = Asset(path, mtime, body, content_type, dependencies)
+        self._assets[path] = asset
+        return asset
+
+    def _dependencies_changed(self, asset: Asset) -> bool:
+        for path, version in asset.dependencies.items():
+            try:
+                if self.get(path).version != version:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _pin_references(self, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+        # Point the page at content-hashed URLs so the JS/CSS can be cached forever
+        dependencies = {}
+
+        def pin(match):
+            path = match.group(2)[len("static/"):]
+            try:
+                dependencies[path] = self.get(path).version
+            except OSError:
+                return match.group(0)
+            return f'{match.group(1)}="static/{path}?v={dependencies[path]}"'
+
+        text = ASSET_REFERENCE.sub(pin, body.decode("utf-8"))
+        return text.encode("utf-8"), dependencies
+
+    def serve(self, request: Request, path: str, immutable: bool = False) -> Response:
+        try:
+            asset = self.get(path)
+        except (OSError, ValueError):
+            return Response(status_code=404)
+
+        # Only a URL carrying the current content hash may be cached forever
+        if immutable and request.query_params.get("v") == asset.version:
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            cache_control = REVALIDATE_CACHE_CONTROL
+
+        encoding, body, etag = asset.select(request.headers.get("accept-encoding", ""))
+        headers = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if asset.matches(request.headers.get("if-none-match", "")):
+            return Response(status_code=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=asset.content_type, headers=headers)
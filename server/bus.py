@@ -0,0 +1,193 @@
+import argparse
+import asyncio
+import pickle
+import struct
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Set
+from urllib.parse import urlparse
+
+from server.log import get_logger
+
+# Frames on the broker connection: 4-byte big endian length + pickled payload.
+# The broker is meant for processes of one deployment on one host or private
+# network, the same trust model as python-socketio's own pub/sub managers.
+FRAME_HEADER = struct.Struct(">I")
+RECONNECT_DELAYS = (0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+log = get_logger(__name__)
+
+
+async def _read_frame(reader: asyncio.StreamReader):
+    header = await reader.readexactly(FRAME_HEADER.size)
+    (length,) = FRAME_HEADER.unpack(header)
+    return pickle.loads(await reader.readexactly(length))
+
+
+def _frame(obj) -> bytes:
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+class MessageBus(ABC):
+    @abstractmethod
+    async def publish(self, channel: str, message) -> None:
+        pass
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalBus(MessageBus):
+    # In-process stand-in, every subscriber of a channel gets its own queue
+    def __init__(self):
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+
+    async def publish(self, channel: str, message) -> None:
+        for subscriber in self._subscribers.get(channel, ()):
+            subscriber.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator:
+        subscriber: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(subscriber)
+        try:
+            while True:
+                yield await subscriber.get()
+        finally:
+            self._subscribers[channel].remove(subscriber)
+
+
+class BrokerBus(MessageBus):
+    # Client of a BusBroker, lets the worker processes of one host share channels.
+    # When the connection drops it is opened again, with a growing delay while
+    # the broker is away, and the channels are subscribed again; what was
+    # published in between is lost, as with any pub/sub.
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self._writer: asyncio.StreamWriter = None
+        self._connecting: asyncio.Lock = None
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._reader_task: asyncio.Task = None
+        self._closed = False
+
+    @classmethod
+    def from_url(cls, url: str) -> "BrokerBus":
+        parsed = urlparse(url)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 7000)
+
+    async def _connect(self) -> asyncio.StreamWriter:
+        if self._connecting is None:
+            self._connecting = asyncio.Lock()
+        async with self._connecting:
+            if self._writer is None:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                for channel, subscribers in self._subscribers.items():
+                    if subscribers:
+                        writer.write(_frame(("sub", channel, None)))
+                await writer.drain()
+                self._writer = writer
+                self._reader_task = asyncio.create_task(self._read(reader, writer))
+        return self._writer
+
+    async def _read(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                channel, message = await _read_frame(reader)
+                for subscriber in self._subscribers.get(channel, ()):
+                    subscriber.put_nowait(message)
+        except (asyncio.IncompleteReadError, OSError) as e:
+            log.warning("bus_connection_lost", host=self.host, port=self.port, error=repr(e))
+        except Exception:
+            log.error("bus_read_failed", exc_info=True, host=self.host, port=self.port)
+        self._drop(writer)
+        await self._reconnect()
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        if self._writer is writer:
+            self._writer = None
+        writer.close()
+
+    async def _reconnect(self) -> None:
+        attempt = 0
+        while not self._closed and self._writer is None:
+            await asyncio.sleep(RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)])
+            try:
+                await self._connect()
+            except OSError as e:
+                attempt += 1
+                log.warning("bus_reconnect_failed", host=self.host, port=self.port, attempt=attempt, error=repr(e))
+            else:
+                log.info("bus_reconnected", host=self.host, port=self.port, attempt=attempt + 1)
+
+    async def publish(self, channel: str, message) -> None:
+        writer = await self._connect()
+        try:
+            writer.write(_frame(("pub", channel, message)))
+            await writer.drain()
+        except OSError:
+            # The next publish opens a new connection
+            self._drop(writer)
+            raise
+
+    async def subscribe(self, channel: str) -> AsyncIterator:
+        subscriber: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, []).append(subscriber)
+        writer = await self._connect()
+        writer.write(_frame(("sub", channel, None)))
+        await writer.drain()
+        try:
+            while True:
+                yield await subscriber.get()
+        finally:
+            self._subscribers[channel].remove(subscriber)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class BusBroker:
+    # Fans every published frame out to the connections subscribed to its channel
+    def __init__(self):
+        self._channels: Dict[str, Set[asyncio.StreamWriter]] = {}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        subscribed: Set[str] = set()
+        try:
+            while True:
+                op, channel, message = await _read_frame(reader)
+                if op == "sub":
+                    self._channels.setdefault(channel, set()).add(writer)
+                    subscribed.add(channel)
+                elif op == "pub":
+                    frame = _frame((channel, message))
+                    for subscriber in self._channels.get(channel, ()):
+                        if not subscriber.is_closing():
+                            subscriber.write(frame)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for channel in subscribed:
+                self._channels[channel].discard(writer)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 7000) -> None:
+        server = await asyncio.start_server(self._handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Message bus broker for sharded workers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    args = parser.parse_args()
+    asyncio.run(BusBroker().serve(args.host, args.port))
@@ -0,0 +1,92 @@
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import List
+
+# Runs the broker and SHARD_COUNT uvicorn workers on consecutive ports:
+#
+#   python -m server.cluster --workers 4 --port 8000
+#
+# Put a load balancer with sticky sessions in front of the workers (e.g.
+# nginx "ip_hash" or a cookie): a Socket.IO sid only exists on the worker it
+# connected to. Any worker accepts any event, events for a game owned by
+# another worker are forwarded to it over the bus.
+
+
+def wait_for_port(host: str, port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def start_cluster(workers: int, host: str, port: int, bus_port: int, move_log_dir: str, export_dir: str,
+                  env=None, stdout=None) -> List[subprocess.Popen]:
+    # The broker, then one worker per shard with its own move log and export
+    # directories; stop_cluster undoes it
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ if env is None else env)
+    processes: List[subprocess.Popen] = [
+        subprocess.Popen([sys.executable, "-m", "server.bus", "--port", str(bus_port)], cwd=root, stdout=stdout)
+    ]
+    try:
+        wait_for_port("127.0.0.1", bus_port)
+        for shard in range(workers):
+            shard_env = dict(env,
+                             SHARD_INDEX=str(shard),
+                             SHARD_COUNT=str(workers),
+                             BUS_URL=f"tcp://127.0.0.1:{bus_port}",
+                             MOVE_LOG_DIR=os.path.join(move_log_dir, f"shard-{shard}"),
+                             EXPORT_DIR=os.path.join(export_dir, f"shard-{shard}"))
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--host", host, "--port", str(port + shard)],
+                cwd=root, env=shard_env, stdout=stdout,
+            ))
+    except BaseException:
+        stop_cluster(processes)
+        raise
+    return processes
+
+
+def stop_cluster(processes: List[subprocess.Popen]) -> None:
+    # Workers before the broker, so they do not try to reconnect to it
+    broker, workers = processes[0], processes[1:]
+    for process in workers:
+        process.terminate()
+    for process in workers:
+        process.wait()
+    broker.terminate()
+    broker.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the game server as several sharded worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000, help="port of the first worker")
+    parser.add_argument("--bus-port", type=int, default=7000)
+    parser.add_argument("--move-log-dir", default=os.environ.get("MOVE_LOG_DIR", "data/move_log"))
+    parser.add_argument("--export-dir", default=os.environ.get("EXPORT_DIR", "data/export"))
+    args = parser.parse_args()
+
+    processes = start_cluster(args.workers, args.host, args.port, args.bus_port, args.move_log_dir, args.export_dir)
+    try:
+        print(f"{args.workers} workers on ports {args.port}-{args.port + args.workers - 1}, bus on {args.bus_port}")
+        while all(process.poll() is None for process in processes):
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_cluster(processes)
+
+
+if __name__ == "__main__":
+    main()
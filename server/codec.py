@@ -0,0 +1,62 @@
+from typing import Dict, List, Sequence
+
+import msgpack
+
+# Compact payloads for clients that negotiated encoding "msgpack". A payload
+# is one msgpack array sent as a Socket.IO binary attachment:
+#
+#   move_result    [gameId, seq, player, username, move, next, winner, detail]
+#                  detail is [seq, cell, mark] for boards and a list of
+#                  history records for guess the secret
+#   board_snapshot [gameId, seq, packed board]
+#
+# Boards take two bits per cell (0 empty, 1 first player, 2 second player),
+# history entries become positional records in HISTORY_FIELDS order.
+# static/js/codec.js decodes them back into the JSON shapes.
+
+MARKS = {"tictactoe": ("X", "O"), "connect4": ("Red", "Yellow")}
+HISTORY_FIELDS = {
+    "guess_secret": ("seq", "uuid", "player", "guess", "result", "correct_positions", "correct_digits"),
+    "tictactoe": ("seq", "uuid", "player", "move", "symbol"),
+    "connect4": ("seq", "uuid", "player", "col", "row", "color"),
+}
+
+
+def mark_codes(game_type: str) -> Dict[str, int]:
+    first, second = MARKS[game_type]
+    return {"": 0, first: 1, second: 2}
+
+
+def pack_board(board: Sequence[str], game_type: str) -> bytes:
+    codes = mark_codes(game_type)
+    packed = bytearray((len(board) + 3) // 4)
+    for cell, value in enumerate(board):
+        if value:
+            packed[cell >> 2] |= codes[value] << ((cell & 3) << 1)
+    return bytes(packed)
+
+
+def unpack_board(packed: bytes, size: int, game_type: str) -> List[str]:
+    marks = ("",) + MARKS[game_type]
+    return [marks[(packed[cell >> 2] >> ((cell & 3) << 1)) & 3] for cell in range(size)]
+
+
+def history_records(entries: List[Dict], game_type: str) -> List[List]:
+    fields = HISTORY_FIELDS[game_type]
+    return [[entry[field] for field in fields] for entry in entries]
+
+
+def pack_outcome(outcome: Dict, game_type: str) -> bytes:
+    if "delta" in outcome:
+        delta = outcome["delta"]
+        detail = [delta["seq"], delta["cell"], mark_codes(game_type)[delta["value"]]]
+    else:
+        detail = history_records(outcome["history"], game_type)
+    return msgpack.packb([
+        outcome["gameId"], outcome["seq"], outcome["player"], outcome["username"],
+        outcome["move"], outcome["next"], outcome["winner"], detail,
+    ])
+
+
+def pack_snapshot(game_id: str, snapshot: Dict, game_type: str) -> bytes:
+    return msgpack.packb([game_id, snapshot["seq"], pack_board(snapshot["board"], game_type)])
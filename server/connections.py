@@ -0,0 +1,58 @@
+from typing import Dict, Set
+from games.game import Game
+
+
+class ConnectionRegistry:
+    def __init__(self):
+        # sid -> {game_id: player uuid}, one sid can sit in several games
+        self._games_by_sid: Dict[str, Dict[str, str]] = {}
+        # and the reverse, for a game that goes away while its sids stay connected
+        self._sids_by_game: Dict[str, Set[str]] = {}
+
+    def bind(self, sid: str, game_id: str, uuid: str) -> None:
+        self._games_by_sid.setdefault(sid, {})[game_id] = uuid
+        self._sids_by_game.setdefault(game_id, set()).add(sid)
+
+    def unbind(self, sid: str, game_id: str) -> None:
+        games = self._games_by_sid.get(sid)
+        if games is None:
+            return
+        games.pop(game_id, None)
+        if not games:
+            del self._games_by_sid[sid]
+        self._forget_sid(sid, game_id)
+
+    def _forget_sid(self, sid: str, game_id: str) -> None:
+        sids = self._sids_by_game.get(game_id)
+        if sids is not None:
+            sids.discard(sid)
+            if not sids:
+                del self._sids_by_game[game_id]
+
+    def rebind(self, old_sid: str, sid: str, game_id: str, uuid: str) -> None:
+        if old_sid != sid:
+            self.unbind(old_sid, game_id)
+        self.bind(sid, game_id, uuid)
+
+    def games_of(self, sid: str) -> Dict[str, str]:
+        return self._games_by_sid.get(sid, {})
+
+    def pop(self, sid: str) -> Dict[str, str]:
+        games = self._games_by_sid.pop(sid, {})
+        for game_id in games:
+            self._forget_sid(sid, game_id)
+        return games
+
+    def forget_game(self, game: Game) -> None:
+        self.forget_game_id(game.game_id)
+
+    def forget_game_id(self, game_id: str) -> None:
+        # Every sid bound to the game, including ones its players have since left
+        for sid in list(self._sids_by_game.get(game_id, ())):
+            self.unbind(sid, game_id)
+
+    def __contains__(self, sid: str) -> bool:
+        return sid in self._games_by_sid
+
+    def __len__(self) -> int:
+        return len(self._games_by_sid)
@@ -0,0 +1,37 @@
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+from games.game import Game
+
+
+class GameExpiry:
+    # Min-heap of (deadline, game_id) with lazy deletion: moves never touch the
+    # heap, an entry whose game was played since it was pushed is simply pushed
+    # again with the new deadline when it surfaces, and entries of games that
+    # are already gone are dropped when popped.
+    def __init__(self, timeout: timedelta):
+        self.timeout = timeout
+        self._heap: List[Tuple[datetime, str]] = []
+
+    def schedule(self, game: Game) -> None:
+        heapq.heappush(self._heap, (game.last_played_at + self.timeout, game.game_id))
+
+    def pop_expired(self, games: Dict[str, Game], now: datetime) -> List[Game]:
+        expired = {}
+        while self._heap and self._heap[0][0] <= now:
+            _, game_id = heapq.heappop(self._heap)
+            game = games.get(game_id)
+            if game is None or game_id in expired:
+                continue
+            deadline = game.last_played_at + self.timeout
+            if deadline > now:
+                heapq.heappush(self._heap, (deadline, game_id))
+            else:
+                expired[game_id] = game
+        return list(expired.values())
+
+    def next_deadline(self) -> datetime:
+        return self._heap[0][0] if self._heap else None
+
+    def __len__(self) -> int:
+        return len(self._heap)
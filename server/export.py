@@ -0,0 +1,343 @@
+import glob
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from games.game import Game
+from player.player import Player
+from server.log import get_logger
+from server.move_log import MOVE_ARGUMENTS
+
+# Finished games for offline analytics, one row per game. moves are the
+# arguments play() took (the column, the cell or the guess) and movers the
+# index in players of who made each of them; winner is an index in players
+# too. outcome is "win", "draw", "abandoned" when a player quit or "timeout"
+# for games evicted while still running.
+#
+# append() only puts the row on a queue. A writer thread appends batches of
+# rows to an Arrow IPC stream, games-<ms of its first row>.arrows, which can
+# be read up to its last complete batch while it is open or after a crash.
+# Once a stream holds rows_per_file rows or is rotate_seconds old it is
+# rewritten as games-<ms>.parquet in row groups of row_group_size rows and
+# removed; streams left over by a crash are rewritten on start.
+#
+# A batch the writer fails to write is logged, counted in errors and
+# dropped, and the stream it was going to is left for the next start to seal;
+# the thread carries on with a new stream.
+#
+# batches() reads the rows finished in a time range one batch at a time, the
+# files are named by their first row so only the ones that overlap are read.
+
+TIMESTAMP = pa.timestamp("ms", tz="UTC")
+SCHEMA = pa.schema([
+    ("game_id", pa.string()),
+    ("game_type", pa.string()),
+    ("outcome", pa.string()),
+    ("winner", pa.int8()),
+    ("created_at", TIMESTAMP),
+    ("started_at", TIMESTAMP),
+    ("last_played_at", TIMESTAMP),
+    ("finished_at", TIMESTAMP),
+    ("players", pa.list_(pa.struct([
+        ("name", pa.string()),
+        ("uuid", pa.string()),
+        ("seat", pa.int8()),
+        ("left", pa.bool_()),
+    ]))),
+    ("moves", pa.list_(pa.int16())),
+    ("movers", pa.list_(pa.int8())),
+])
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+
+FILE_PATTERN = re.compile(r"games-(\d+)\.(arrows|parquet)$")
+WRITE_OPTIONS = pa.ipc.IpcWriteOptions(compression="zstd")
+
+log = get_logger(__name__)
+
+
+def _ms(at: datetime) -> Optional[int]:
+    return int(at.timestamp() * 1000) if at is not None else None
+
+
+def outcome_of(game: Game, index: Dict[str, int]) -> Tuple[str, Optional[int]]:
+    winner = getattr(game.state, "winner", None)
+    if game.GAME_TYPE == "guess_secret" and len(game.turn_history):
+        last = game.turn_history[-1]
+        winner = last["uuid"] if last["result"] else None
+    if winner == "draw":
+        return "draw", None
+    if winner is not None:
+        return "win", index.get(winner)
+    return ("abandoned" if game.state.is_game_over else "timeout"), None
+
+
+def game_row(game: Game, finished_at: datetime, departed: Sequence[Player] = ()) -> Dict:
+    # departed names players who quit before their first move
+    history = game.turn_history
+    players = list(game.players)
+    players += [p for p in list(history.players) + list(departed) if p not in players]
+    players.sort(key=game.seat_of)
+    index = {player.uuid: i for i, player in enumerate(players)}
+    outcome, winner = outcome_of(game, index)
+    to_argument = MOVE_ARGUMENTS[game.GAME_TYPE]
+    return {
+        "game_id": game.game_id,
+        "game_type": game.GAME_TYPE,
+        "outcome": outcome,
+        "winner": winner,
+        "created_at": _ms(game.created_at),
+        "started_at": _ms(game.started_at),
+        "last_played_at": _ms(game.last_played_at),
+        "finished_at": _ms(finished_at),
+        "players": [{"name": p.name, "uuid": p.uuid, "seat": game.seat_of(p), "left": p not in game.players}
+                    for p in players],
+        "moves": [int(to_argument(code)) for code in history.moves],
+        "movers": [index[history.players[slot].uuid] for slot in history.slots],
+    }
+
+
+def read_stream(path: str) -> Iterator[pa.RecordBatch]:
+    with pa.OSFile(path) as source:
+        try:
+            reader = pa.ipc.open_stream(source)
+        except pa.ArrowInvalid:
+            # Nothing but a torn schema
+            return
+        while True:
+            try:
+                yield reader.read_next_batch()
+            except StopIteration:
+                return
+            except (pa.ArrowInvalid, OSError):
+                # A torn last batch from a crash mid-write
+                return
+
+
+def seal(path: str, row_group_size: int) -> Optional[str]:
+    # Rewrites a closed stream as Parquet, batches merged into row groups
+    target = path[:-len(".arrows")] + ".parquet"
+    partial = target + ".partial"
+    writer = None
+    pending: List[pa.RecordBatch] = []
+    rows = 0
+    for batch in read_stream(path):
+        pending.append(batch)
+        rows += batch.num_rows
+        if rows >= row_group_size:
+            writer = writer or pq.ParquetWriter(partial, SCHEMA, compression="zstd")
+            writer.write_table(pa.Table.from_batches(pending, SCHEMA), row_group_size=row_group_size)
+            pending, rows = [], 0
+    if pending:
+        writer = writer or pq.ParquetWriter(partial, SCHEMA, compression="zstd")
+        writer.write_table(pa.Table.from_batches(pending, SCHEMA), row_group_size=row_group_size)
+    if writer is None:
+        os.remove(path)
+        return None
+    writer.close()
+    os.replace(partial, target)
+    os.remove(path)
+    return target
+
+
+class _Chunks:
+    # File-like sink handing out what the Arrow writers wrote so far
+    closed = False
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class GameExporter:
+    def __init__(self, directory: str, batch_size: int = 1000, flush_interval: float = 5.0,
+                 rows_per_file: int = 100000, rotate_seconds: float = 3600, row_group_size: int = 10000):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows_per_file = rows_per_file
+        self.rotate_seconds = rotate_seconds
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self.errors = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: threading.Thread = None
+        self._stream = None
+        self._sink = None
+        self._stream_path: str = None
+        self._stream_rows = 0
+        self._stream_opened = 0.0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="game-exporter", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _failed(self, what: str, **fields) -> None:
+        self.errors += 1
+        log.error("export_write_failed", exc_info=True, what=what, **fields)
+
+    def append(self, game: Game, departed: Sequence[Player] = (), finished_at: datetime = None) -> None:
+        # The row is built here, between two events; the writer thread only converts it
+        self._queue.put(game_row(game, finished_at or datetime.now(), departed))
+
+    def _run(self) -> None:
+        for path in glob.glob(os.path.join(self.directory, "games-*.arrows")):
+            try:
+                if os.path.exists(path[:-len(".arrows")] + ".parquet"):
+                    # Sealed just before a crash
+                    os.remove(path)
+                else:
+                    seal(path, self.row_group_size)
+            except Exception:
+                self._failed("seal", path=path)
+
+        rows: List[Dict] = []
+        first_at = 0.0
+        while True:
+            try:
+                row = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                row = False
+            if row is None:
+                self._write(rows)
+                self._rotate()
+                return
+            if row:
+                if not rows:
+                    first_at = time.monotonic()
+                rows.append(row)
+            if rows and (len(rows) >= self.batch_size or time.monotonic() - first_at >= self.flush_interval):
+                self._write(rows)
+                rows = []
+            if self._stream is not None and (self._stream_rows >= self.rows_per_file
+                                             or time.monotonic() - self._stream_opened >= self.rotate_seconds):
+                self._rotate()
+
+    def _write(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        try:
+            self._write_batch(rows)
+        except Exception:
+            self._failed("batch", rows=len(rows), path=self._stream_path)
+            self._abandon()
+
+    def _write_batch(self, rows: List[Dict]) -> None:
+        if self._stream is None:
+            self._stream_path = os.path.join(self.directory, f"games-{rows[0]['finished_at']}.arrows")
+            self._sink = pa.OSFile(self._stream_path, "wb")
+            self._stream = pa.ipc.new_stream(self._sink, SCHEMA, options=WRITE_OPTIONS)
+            self._stream_rows = 0
+            self._stream_opened = time.monotonic()
+        self._stream.write_batch(pa.RecordBatch.from_pylist(rows, SCHEMA))
+        self._sink.flush()
+        self._stream_rows += len(rows)
+        self.rows_written += len(rows)
+
+    def _rotate(self) -> None:
+        if self._stream is None:
+            return
+        try:
+            self._stream.close()
+            self._sink.close()
+            self._stream = self._sink = None
+            seal(self._stream_path, self.row_group_size)
+        except Exception:
+            self._failed("seal", path=self._stream_path)
+            self._abandon()
+
+    def _abandon(self) -> None:
+        # What was written so far stays readable, the next start seals it
+        for closable in (self._stream, self._sink):
+            if closable is not None:
+                try:
+                    closable.close()
+                except Exception:
+                    pass
+        self._stream = self._sink = None
+
+    def files(self) -> List[Tuple[int, str]]:
+        # (first finished_at, path) in order, the Parquet file once a stream is sealed
+        found: Dict[int, str] = {}
+        for path in glob.glob(os.path.join(self.directory, "games-*")):
+            match = FILE_PATTERN.search(path)
+            if match and (match.group(2) == "parquet" or int(match.group(1)) not in found):
+                found[int(match.group(1))] = path
+        return sorted(found.items())
+
+    @staticmethod
+    def _read(path: str) -> Iterator[pa.RecordBatch]:
+        if path.endswith(".parquet"):
+            yield from pq.ParquetFile(path).iter_batches()
+            return
+        try:
+            yield from read_stream(path)
+        except FileNotFoundError:
+            # Sealed since it was listed
+            yield from pq.ParquetFile(path[:-len(".arrows")] + ".parquet").iter_batches()
+
+    def batches(self, since: datetime = None, until: datetime = None) -> Iterator[pa.RecordBatch]:
+        since_ms, until_ms = _ms(since), _ms(until)
+        files = self.files()
+        for i, (first, path) in enumerate(files):
+            if until_ms is not None and first >= until_ms:
+                return
+            if since_ms is not None and i + 1 < len(files) and files[i + 1][0] <= since_ms:
+                continue
+            for batch in self._read(path):
+                finished = batch.column("finished_at")
+                mask = None
+                if since_ms is not None:
+                    mask = pc.greater_equal(finished, pa.scalar(since_ms, TIMESTAMP))
+                if until_ms is not None:
+                    before = pc.less(finished, pa.scalar(until_ms, TIMESTAMP))
+                    mask = before if mask is None else pc.and_(mask, before)
+                if mask is not None:
+                    batch = batch.filter(mask)
+                if batch.num_rows:
+                    yield batch
+
+    def stream(self, since: datetime = None, until: datetime = None, format: str = "arrow") -> Iterator[bytes]:
+        # Encodes batches() as they are read, for a streaming HTTP response
+        sink = _Chunks()
+        writer = pq.ParquetWriter(sink, SCHEMA, compression="zstd") if format == "parquet" \
+            else pa.ipc.new_stream(sink, SCHEMA, options=WRITE_OPTIONS)
+        for batch in self.batches(since, until):
+            writer.write_batch(batch)
+            yield sink.take()
+        writer.close()
+        yield sink.take()
@@ -0,0 +1,127 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from typing import Dict, TextIO
+
+# Structured event logging off the event loop. A call site names an event and
+# passes plain fields:
+#
+#   log = get_logger(__name__)
+#   log.debug("move", game_id=game_id, uuid=uuid, move=move)
+#
+# The level check and the sampling draw happen first, so a disabled or
+# sampled-out event costs a method call and nothing is formatted. Records that
+# pass go through a QueueHandler into a queue; a QueueListener thread turns
+# them into JSON lines and does the blocking write.
+#
+# LOG_LEVEL sets the level of the "game" loggers (default INFO) and
+# LOG_SAMPLE keeps a fraction of chosen events, e.g. "move=0.01,connect=0.1".
+
+ROOT = "game"
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_SAMPLE = os.environ.get("LOG_SAMPLE", "")
+
+_sample_rates: Dict[str, float] = {}
+_listener: logging.handlers.QueueListener = None
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        event, _, rate = item.partition("=")
+        rate = float(rate)
+        if not 0 <= rate <= 1:
+            raise ValueError(f"Sample rate for {event.strip()} must be between 0 and 1")
+        rates[event.strip()] = rate
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    # QueueHandler.prepare formats the message on the calling thread; fields
+    # are already a fresh dict of plain values, so hand the record over as is
+    # and leave formatting to the listener
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class EventLogger:
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def enabled(self, level: int, event: str) -> bool:
+        if not self.logger.isEnabledFor(level):
+            return False
+        rate = _sample_rates.get(event)
+        return rate is None or random.random() < rate
+
+    def log(self, level: int, event: str, exc_info=None, **fields) -> None:
+        if self.enabled(level, event):
+            self.logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
+
+    def debug(self, event: str, **fields) -> None:
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields) -> None:
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields) -> None:
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, exc_info=None, **fields) -> None:
+        self.log(logging.ERROR, event, exc_info=exc_info, **fields)
+
+
+def get_logger(name: str) -> EventLogger:
+    # Module names are put under the "game" logger so configure() covers them
+    return EventLogger(logging.getLogger(f"{ROOT}.{name}"))
+
+
+def configure(level: str = LOG_LEVEL, sample: str = LOG_SAMPLE, stream: TextIO = None) -> None:
+    # Safe to call again, e.g. to change the level or the sampling at runtime
+    global _listener
+    _sample_rates.clear()
+    _sample_rates.update(parse_sample_rates(sample))
+    root = logging.getLogger(ROOT)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    if _listener is not None:
+        return
+
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(records, output)
+    root.handlers = [_DeferredQueueHandler(records)]
+    root.propagate = False
+    _listener.start()
+
+
+def shutdown() -> None:
+    # Flushes what is still queued
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        root = logging.getLogger(ROOT)
+        root.handlers = []
+        root.propagate = True
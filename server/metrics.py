@@ -0,0 +1,230 @@
+import bisect
+import functools
+import inspect
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from socketio import packet
+
+# Prometheus text exposition (format 0.0.4) without the client library.
+# Updating a metric is a dict lookup and an add on the event loop thread, so
+# everything here stays enabled on the move path; sums, label formatting and
+# callbacks only run when /metrics is scraped.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    TYPE = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    @abstractmethod
+    def samples(self) -> Iterable[str]:
+        pass
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self.samples())
+        return lines
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class CallbackGauge(Metric):
+    # Computed at scrape time, for values that already live elsewhere
+    TYPE = "gauge"
+
+    def __init__(self, name: str, help: str, collect: Callable[[], Dict[Labels, float]], labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.collect().items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class CallbackCounter(CallbackGauge):
+    # A count kept elsewhere, e.g. by a writer thread
+    TYPE = "counter"
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # labels -> [count per bucket (last one is +Inf)..., sum]; buckets are
+        # made cumulative when rendering
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, counts in sorted(self.values.items()):
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {total}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {counts[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {total}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def callback_gauge(self, name: str, help: str, collect: Callable[[], Dict[Labels, float]],
+                       labels: Tuple[str, ...] = ()) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help, collect, labels))
+
+    def callback_counter(self, name: str, help: str, collect: Callable[[], Dict[Labels, float]],
+                         labels: Tuple[str, ...] = ()) -> CallbackCounter:
+        return self.register(CallbackCounter(name, help, collect, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class ServerMetrics:
+    # The game server's own metrics, see main.py for where each is updated
+    def __init__(self, registry: Registry = None):
+        self.registry = registry or Registry()
+        self.handler_latency = self.registry.histogram(
+            "game_handler_latency_seconds", "Time spent in a Socket.IO event handler", ("event",))
+        self.handler_errors = self.registry.counter(
+            "game_handler_exceptions_total", "Unhandled exceptions raised by a Socket.IO event handler", ("event",))
+        self.emits = self.registry.counter(
+            "game_emits_total", "Socket.IO events encoded for sending, once per emit however many recipients", ("event",))
+        self.emit_bytes = self.registry.counter(
+            "game_emit_bytes_total", "Size of the encoded Socket.IO events", ("event",))
+        self.input_errors = self.registry.counter(
+            "game_input_errors_total", "Moves rejected by a game with an InputError", ("message",))
+        self.timeouts = self.registry.counter(
+            "game_timeout_evictions_total", "Games closed by check_game_timeout after being idle", ("type",))
+        self.rejected_events = self.registry.counter(
+            "game_rejected_events_total", "Events and connections refused by the EventGuard", ("event", "reason"))
+
+    def watch_games(self, games: Dict) -> None:
+        def live_games() -> Dict[Labels, float]:
+            counts = {}
+            for game in list(games.values()):
+                key = (game.GAME_TYPE, game.get_status())
+                counts[key] = counts.get(key, 0) + 1
+            return counts
+
+        self.registry.callback_gauge("game_live_games", "Games held in memory", live_games, ("type", "status"))
+
+    def watch_connections(self, count: Callable[[], int]) -> None:
+        self.registry.callback_gauge("game_connected_sids", "Socket.IO clients connected to this worker",
+                                     lambda: {(): count()})
+
+    def watch_archive(self, archive) -> None:
+        self.registry.callback_gauge("game_archived_games", "Finished games in the archive, and those kept rebuilt",
+                                     lambda: {("archived",): len(archive), ("cached",): archive.cached}, ("tier",))
+
+    def watch_spectators(self, count: Callable[[], int]) -> None:
+        self.registry.callback_gauge("game_spectators", "Socket.IO clients spectating a game on this worker",
+                                     lambda: {(): count()})
+
+    def watch_writers(self, writers: Dict[str, object]) -> None:
+        # Background writer threads, each with an alive flag and an errors count
+        self.registry.callback_gauge("game_writer_up", "1 while the writer thread is running",
+                                     lambda: {(name,): int(w.alive) for name, w in writers.items()}, ("writer",))
+        self.registry.callback_counter("game_writer_errors_total", "Writes the writer thread failed and skipped",
+                                       lambda: {(name,): w.errors for name, w in writers.items()}, ("writer",))
+
+    def timed(self, handler: Callable) -> Callable:
+        # Wraps a Socket.IO handler, keeps its name for sio.event. socketio
+        # retries connect and disconnect with fewer arguments on a TypeError,
+        # so extra arguments the handler does not declare are dropped here
+        name = handler.__name__
+        observe = self.handler_latency.observe
+        params = inspect.signature(handler).parameters.values()
+        arity = None if any(p.kind == p.VAR_POSITIONAL for p in params) else len(params)
+
+        @functools.wraps(handler)
+        async def wrapper(*args):
+            started = time.perf_counter()
+            try:
+                return await handler(*args[:arity])
+            except Exception:
+                self.handler_errors.inc(name)
+                raise
+            finally:
+                observe(time.perf_counter() - started, name)
+
+        return wrapper
+
+    def packet_class(self, base: type = packet.Packet) -> type:
+        # A serializer for socketio.AsyncServer that counts what it encodes.
+        # AsyncManager encodes a broadcast once and reuses it for every
+        # recipient, so this costs a len() per emit
+        emits, emit_bytes = self.emits, self.emit_bytes
+
+        class MeteredPacket(base):
+            def encode(self):
+                encoded = super().encode()
+                if self.packet_type in (packet.EVENT, packet.BINARY_EVENT) and self.data:
+                    event = self.data[0]
+                    emits.inc(event)
+                    size = sum(map(len, encoded)) if isinstance(encoded, list) else len(encoded)
+                    emit_bytes.inc(event, amount=size)
+                return encoded
+
+        return MeteredPacket
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -0,0 +1,116 @@
+from typing import Dict, List, Set
+
+import socketio
+
+from games.game import Game
+from player.player import Player
+from server import codec
+from server.spectators import SpectatorFanout
+
+# Field the legacy confirmation event used for the move, per game type
+LEGACY_MOVE_FIELDS = {"guess_secret": "guess", "tictactoe": "move", "connect4": "col"}
+
+
+class MoveBroadcast:
+    # Sends the result of a move. Clients that asked for it with
+    # "moveResult": true get a single move_result room broadcast, encoded once
+    # by the manager for every recipient; each client tells its own turn and
+    # confirmation apart by comparing "player" and "next" with its uuid.
+    # Other players get the events the handlers used to emit one by one:
+    # game_over, guess_submitted/move_submitted, guess_turn and
+    # append_history/board_delta.
+    #
+    # Clients that also sent "encoding": "msgpack" get move_result and
+    # board_snapshot packed by server/codec.py, everyone else JSON.
+    #
+    # Spectators only get the outcome queued, see server/spectators.py.
+    def __init__(self, sio: socketio.AsyncServer, spectators: SpectatorFanout = None):
+        self.sio = sio
+        self.spectators = spectators
+        self.coalesced: Set[str] = set()
+        self.packed: Set[str] = set()
+
+    def negotiate(self, sid: str, data: Dict) -> None:
+        for sids, wanted in ((self.coalesced, data.get("moveResult") is True),
+                             (self.packed, data.get("encoding") == "msgpack")):
+            if wanted:
+                sids.add(sid)
+            else:
+                sids.discard(sid)
+
+    def forget(self, sid: str) -> None:
+        self.coalesced.discard(sid)
+        self.packed.discard(sid)
+
+    async def send_snapshot(self, game: Game, sid: str) -> None:
+        snapshot = game.board_snapshot()
+        if sid in self.packed:
+            await self.sio.emit("board_snapshot", codec.pack_snapshot(game.game_id, snapshot, game.GAME_TYPE), room=sid)
+        else:
+            await self.sio.emit("board_snapshot", {"gameId": game.game_id, **snapshot}, room=sid)
+
+    @staticmethod
+    def outcome(game: Game, player: Player, move, winner) -> Dict:
+        result = {
+            "gameId": game.game_id,
+            "seq": game.seq,
+            "player": player.uuid,
+            "username": player.name,
+            "move": move,
+            "next": None if game.state.is_game_over else game.state.who_will_play,
+            "winner": None if not winner else ("draw" if winner == "draw" else winner.name),
+        }
+        if game.GAME_TYPE == "guess_secret":
+            result["history"] = game.history_since(game.seq - 1)
+        else:
+            result["delta"] = game.board_delta()
+        return result
+
+    async def send(self, game: Game, player: Player, opponent: Player, move, winner) -> None:
+        outcome = self.outcome(game, player, move, winner)
+        if self.spectators is not None:
+            self.spectators.publish(game, outcome)
+        seated = [p for p in game.players if p.sid is not None]
+        legacy = [p for p in seated if p.sid not in self.coalesced]
+        packed = [p.sid for p in seated if p.sid in self.coalesced and p.sid in self.packed]
+        if len(legacy) + len(packed) < len(seated):
+            skip = [p.sid for p in legacy] + packed
+            await self.sio.emit("move_result", outcome, room=game.game_id, skip_sid=skip or None)
+        if packed:
+            payload = codec.pack_outcome(outcome, game.GAME_TYPE)
+            await self._emit_to("move_result", payload, [game.game_id] if len(packed) == len(seated) else packed)
+        if legacy:
+            # With nobody on move_result the room broadcasts go out as before,
+            # otherwise to each legacy player
+            rooms = [game.game_id] if len(legacy) == len(seated) else [p.sid for p in legacy]
+            sids = {p.sid for p in legacy}
+            await self._send_legacy(outcome, game, player, opponent, rooms, sids)
+
+    async def _send_legacy(self, outcome: Dict, game: Game, player: Player, opponent: Player,
+                           rooms: List[str], sids: Set[str]) -> None:
+        game_id = game.game_id
+        game_over = {"gameId": game_id, "winner": outcome["winner"]}
+        turn = {"gameId": game_id, "username": opponent.name} if opponent is not None else None
+        submitted = {"gameId": game_id, "username": player.name, LEGACY_MOVE_FIELDS[game.GAME_TYPE]: outcome["move"]}
+
+        if "history" in outcome:
+            if outcome["winner"]:
+                await self._emit_to("game_over", game_over, rooms)
+            if player.sid in sids:
+                await self.sio.emit("guess_submitted", submitted, room=player.sid)
+            if turn is not None and opponent.sid in sids:
+                await self.sio.emit("guess_turn", turn, room=opponent.sid)
+            await self._emit_to("append_history", outcome["history"], rooms)
+            return
+
+        if player.sid in sids:
+            await self.sio.emit("move_submitted", submitted, room=player.sid)
+        if turn is not None and opponent.sid in sids:
+            await self.sio.emit("guess_turn", turn, room=opponent.sid)
+        await self._emit_to("board_delta", {"gameId": game_id, **outcome["delta"]}, rooms)
+        if outcome["winner"]:
+            await self._emit_to("game_over", game_over, rooms)
+
+    async def _emit_to(self, event: str, data, rooms: List[str]) -> None:
+        for room in rooms:
+            await self.sio.emit(event, data, room=room)
@@ -0,0 +1,293 @@
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List
+
+from errors.input_error import InputError
+from errors.mutability_error import MutabilityError
+from games.game import Game
+from games.game_types import GAME_TYPES
+from games.connect4_board import Connect4Board
+from server.log import get_logger
+
+log = get_logger(__name__)
+
+# Turns a TurnHistory move code back into the argument Game.play was called with
+MOVE_ARGUMENTS: Dict[str, Callable[[int], object]] = {
+    "guess_secret": lambda code: str(code // 100),
+    "tictactoe": lambda code: code,
+    "connect4": lambda code: code % Connect4Board.COLS,
+}
+
+REPLAY_ERRORS = (InputError, MutabilityError, ValueError, KeyError, AttributeError, TypeError)
+
+
+class _Snapshot:
+    __slots__ = ("records",)
+
+    def __init__(self, records: List[Dict]):
+        self.records = records
+
+
+class MoveLog:
+    # Append-only log of everything needed to rebuild the games registry.
+    #
+    # append() only puts the record on a queue; a writer thread writes whatever
+    # accumulated every flush_interval seconds and fsyncs once per batch. Files
+    # are numbered by generation: snapshot.<g>.jsonl holds the live games at
+    # the moment moves.<g>.jsonl was started, so recovery replays the newest
+    # complete snapshot and every move log of the same or a later generation.
+    def __init__(self, directory: str, flush_interval: float = 0.05):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.records_since_snapshot = 0
+        # Batches, records or snapshots the writer thread failed to put on disk
+        self.errors = 0
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: threading.Thread = None
+        self._file = None
+        self._generation = max(self._generations("moves") + self._generations("snapshot"), default=0)
+
+    def _path(self, kind: str, generation: int) -> str:
+        return os.path.join(self.directory, f"{kind}.{generation}.jsonl")
+
+    def _generations(self, kind: str) -> List[int]:
+        pattern = re.compile(rf"{kind}\.(\d+)\.jsonl$")
+        found = []
+        for path in glob.glob(os.path.join(self.directory, f"{kind}.*.jsonl")):
+            match = pattern.search(path)
+            if match:
+                found.append(int(match.group(1)))
+        return sorted(found)
+
+    def start(self) -> None:
+        # A crash mid-write leaves a torn last line, appending after it would
+        # glue the next record onto it
+        path = self._path("moves", self._generation)
+        if os.path.exists(path):
+            _truncate_torn_tail(path)
+        self._thread = threading.Thread(target=self._run, name="move-log-writer", daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def append(self, op: str, game_id: str, **fields) -> None:
+        self._queue.put({"op": op, "game": game_id, "ts": time.time(), **fields})
+        self.records_since_snapshot += 1
+
+    def compact(self, games: Dict[str, Game]) -> None:
+        # Call it on the event loop thread, between two events: a move queued
+        # before the snapshot goes to the generation the snapshot replaces, so
+        # the snapshot has to include it. The writer thread puts it on disk in
+        # queue order.
+        self._queue.put(_Snapshot(list(snapshot_records(games))))
+        self.records_since_snapshot = 0
+
+    @property
+    def alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _failed(self, what: str, **fields) -> None:
+        self.errors += 1
+        log.error("move_log_write_failed", exc_info=True, what=what, **fields)
+
+    def _run(self) -> None:
+        # Errors are logged and counted and the thread carries on with the
+        # next batch: a full disk may come back, a dead writer would let the
+        # queue grow without bound
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            time.sleep(self.flush_interval)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            lines = []
+            for item in batch:
+                if item is None:
+                    running = False
+                elif isinstance(item, _Snapshot):
+                    self._write_lines(lines)
+                    lines = []
+                    try:
+                        self._rotate(item)
+                    except Exception:
+                        self._failed("snapshot", generation=self._generation)
+                else:
+                    try:
+                        lines.append(json.dumps(item, separators=(",", ":")))
+                    except (TypeError, ValueError):
+                        self._failed("record", op=item.get("op"), game_id=item.get("game"))
+            self._write_lines(lines)
+        self._close_file()
+
+    def _write_lines(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self._path("moves", self._generation), "a", encoding="utf-8")
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception:
+            self._failed("batch", records=len(lines))
+            # Opened again for the next batch
+            self._close_file()
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+            self._file = None
+
+    def _rotate(self, snapshot: _Snapshot) -> None:
+        # The old generation is only removed once the snapshot is on disk; if
+        # writing it fails, recovery replays the old snapshot and every move
+        # log, the new one included
+        previous = self._generation
+        self._close_file()
+        self._generation += 1
+
+        tmp_path = self._path("snapshot", self._generation) + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in snapshot.records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._path("snapshot", self._generation))
+
+        for kind in ("snapshot", "moves"):
+            for generation in self._generations(kind):
+                if generation <= previous:
+                    os.remove(self._path(kind, generation))
+
+    def recover(self) -> Dict[str, Game]:
+        games: Dict[str, Game] = {}
+        snapshots = self._generations("snapshot")
+        base = snapshots[-1] if snapshots else 0
+        paths = [self._path("snapshot", base)] if snapshots else []
+        paths += [self._path("moves", g) for g in self._generations("moves") if g >= base]
+        for path in paths:
+            for record in _read_records(path):
+                try:
+                    apply_record(games, record)
+                except REPLAY_ERRORS:
+                    continue
+        return games
+
+
+def _truncate_torn_tail(path: str) -> None:
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        end = size
+        while end > 0:
+            f.seek(max(0, end - 4096))
+            chunk = f.read(end - max(0, end - 4096))
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                end = end - len(chunk) + newline + 1
+                break
+            end -= len(chunk)
+        if end != size:
+            f.truncate(end)
+
+
+def _read_records(path: str) -> Iterator[Dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A torn line from a crash mid-write, whatever follows it was
+                # written after the restart
+                continue
+
+
+def apply_record(games: Dict[str, Game], record: Dict) -> None:
+    op = record["op"]
+    game_id = record["game"]
+    ts = datetime.fromtimestamp(record["ts"])
+
+    if op == "create":
+        game = GAME_TYPES[record["type"]](game_id)
+        game.add_player(game.new_player(record["name"], None, record["seat"], uuid=record["uuid"]))
+        game.created_at = game.last_played_at = ts
+        games[game_id] = game
+        return
+    if op == "drop":
+        games.pop(game_id, None)
+        return
+
+    game = games[game_id]
+    if op == "join":
+        game.add_player(game.new_player(record["name"], None, record["seat"], uuid=record["uuid"]))
+    elif op == "secret":
+        game.set_secret(game.get_player(record["uuid"]), record["secret"])
+    elif op == "play":
+        first_move = game.started_at is None
+        game.play(record["uuid"], record["move"])
+        game.last_played_at = ts
+        if first_move:
+            game.started_at = ts
+    elif op == "quit":
+        game.leave(game.get_player(record["uuid"]))
+        if not game.players:
+            del games[game_id]
+    elif op == "restore":
+        game.created_at = datetime.fromtimestamp(record["created_at"])
+        game.last_played_at = datetime.fromtimestamp(record["last_played_at"])
+        if record["started_at"] is not None:
+            game.started_at = datetime.fromtimestamp(record["started_at"])
+        game.state.who_will_play = record["who_will_play"]
+        game.state.is_game_over = record["is_game_over"]
+
+
+def snapshot_records(games: Dict[str, Game]) -> Iterator[Dict]:
+    # The shortest record sequence that rebuilds each live game through play()
+    ts = time.time()
+    for game_id, game in games.items():
+        history = game.turn_history
+        players = list(game.players)
+        players += [p for p in history.players if p not in players]
+        if not players:
+            continue
+        # The first seat has to be created first, add_player hands it the first turn
+        players.sort(key=game.seat_of)
+
+        for i, player in enumerate(players):
+            yield {"op": "create" if i == 0 else "join", "game": game_id, "ts": ts, "type": game.GAME_TYPE,
+                   "name": player.name, "uuid": player.uuid, "seat": game.seat_of(player)}
+        for player in players:
+            secret = getattr(player, "secret", None)
+            if secret:
+                yield {"op": "secret", "game": game_id, "ts": ts, "uuid": player.uuid, "secret": secret}
+        to_argument = MOVE_ARGUMENTS[game.GAME_TYPE]
+        for slot, code in zip(history.slots, history.moves):
+            yield {"op": "play", "game": game_id, "ts": ts, "uuid": history.players[slot].uuid,
+                   "move": to_argument(code)}
+        for player in players:
+            if player not in game.players:
+                yield {"op": "quit", "game": game_id, "ts": ts, "uuid": player.uuid}
+        yield {"op": "restore", "game": game_id, "ts": ts,
+               "created_at": game.created_at.timestamp(),
+               "started_at": game.started_at.timestamp() if game.started_at else None,
+               "last_played_at": game.last_played_at.timestamp(),
+               "who_will_play": game.state.who_will_play,
+               "is_game_over": game.state.is_game_over}
@@ -0,0 +1,182 @@
+import functools
+import time
+from typing import Callable, Container, Dict, List, Optional, Set
+
+from server.log import get_logger
+
+# Socket.IO events are checked here before any handler logic runs, on the
+# worker the client is connected to so a flood is never forwarded to the
+# shard owning the game. An event has to pass three checks:
+#
+# - its payload is a flat dict of a few scalars with short strings,
+# - the sid's token bucket holds its cost,
+# - so does the bucket of the client's address, shared by every sid from it.
+#
+# A rejected event gets an "error" and costs the sid a strike; strikes are a
+# bucket too, refilled slowly, and a sid that runs out of them is
+# disconnected. Connecting costs the address as well.
+#
+# Buckets bound how fast games are created, not how many stay allocated: the
+# games created from an address are remembered until they are gone from the
+# registry, so create_game can be refused past a cap. create_game always runs
+# on the worker the client is connected to, and with sticky sessions that is
+# the same worker for every connection from the address.
+
+log = get_logger(__name__)
+
+Handler = Callable[..., object]
+SCALARS = (str, int, float, bool, type(None))
+
+
+class TokenBuckets:
+    # key -> [tokens, monotonic time they were counted at], refilled lazily
+    # when taken from
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self._buckets: Dict[str, List[float]] = {}
+
+    def take(self, key: str, cost: float = 1) -> bool:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] < cost:
+            return False
+        bucket[0] -= cost
+        return True
+
+    def forget(self, key: str) -> None:
+        self._buckets.pop(key, None)
+
+    def sweep(self) -> int:
+        # A bucket that has refilled is the same as none at all
+        now = self.clock()
+        full = [key for key, (tokens, at) in self._buckets.items() if tokens + (now - at) * self.rate >= self.burst]
+        for key in full:
+            del self._buckets[key]
+        return len(full)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._buckets
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def address_of(environ: Dict, trust_forwarded: bool = False) -> str:
+    # The ASGI driver leaves REMOTE_ADDR at 127.0.0.1, the peer is in the scope
+    if trust_forwarded:
+        forwarded = environ.get("HTTP_X_FORWARDED_FOR")
+        if forwarded:
+            # The last entry is the one our own proxy added
+            return forwarded.rsplit(",", 1)[-1].strip()
+    client = environ.get("asgi.scope", {}).get("client")
+    return client[0] if client else environ.get("REMOTE_ADDR", "")
+
+
+def check_payload(data, max_keys: int = 8, max_length: int = 128) -> bool:
+    if not isinstance(data, dict) or len(data) > max_keys:
+        return False
+    for key, value in data.items():
+        if not isinstance(key, str) or not isinstance(value, SCALARS):
+            return False
+        if isinstance(value, str) and len(value) > max_length:
+            return False
+    return True
+
+
+class EventGuard:
+    def __init__(self, sio, rate: float = 10, burst: float = 20, address_rate: float = 50, address_burst: float = 100,
+                 strikes: float = 20, strike_rate: float = 1, costs: Dict[str, float] = None,
+                 trust_forwarded: bool = False, on_reject: Callable[[str, str], None] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.sio = sio
+        self.costs = costs or {}
+        self.trust_forwarded = trust_forwarded
+        self.on_reject = on_reject
+        self.sids = TokenBuckets(rate, burst, clock)
+        self.addresses = TokenBuckets(address_rate, address_burst, clock)
+        self.strikes = TokenBuckets(strike_rate, strikes, clock)
+        self._address_of_sid: Dict[str, str] = {}
+        self._created: Dict[str, Set[str]] = {}
+
+    def connect(self, sid: str, environ: Dict) -> bool:
+        address = address_of(environ, self.trust_forwarded)
+        if not self.addresses.take(address, self.costs.get("connect", 1)):
+            self._rejected("connect", "rate")
+            log.warning("connection_refused", sid=sid, address=address)
+            return False
+        self._address_of_sid[sid] = address
+        return True
+
+    def check(self, sid: str, event: str, data) -> Optional[str]:
+        # The reason an event is rejected, None when it may run
+        if not check_payload(data):
+            return "payload"
+        cost = self.costs.get(event, 1)
+        if not self.sids.take(sid, cost):
+            return "rate"
+        address = self._address_of_sid.get(sid)
+        if address is not None and not self.addresses.take(address, cost):
+            return "address"
+        return None
+
+    def guard(self, handler: Handler) -> Handler:
+        # For handlers taking (sid, data), keeps the name for sio.event
+        event = handler.__name__
+
+        @functools.wraps(handler)
+        async def guarded(sid, data=None):
+            reason = self.check(sid, event, data)
+            if reason is None:
+                return await handler(sid, data)
+            self._rejected(event, reason)
+            if not self.strikes.take(sid):
+                log.warning("client_disconnected", sid=sid, handler=event, reason=reason,
+                            address=self._address_of_sid.get(sid))
+                await self.sio.disconnect(sid)
+                return
+            message = "Invalid payload" if reason == "payload" else "Too many requests"
+            await self.sio.emit("error", {"message": message}, room=sid)
+
+        return guarded
+
+    def created(self, sid: str, game_id: str) -> None:
+        address = self._address_of_sid.get(sid)
+        if address is not None:
+            self._created.setdefault(address, set()).add(game_id)
+
+    def games_created(self, sid: str, live: Container[str]) -> int:
+        # Games created from the sid's address that are still in live
+        address = self._address_of_sid.get(sid)
+        created = self._created.get(address)
+        if not created:
+            return 0
+        created.difference_update([game_id for game_id in created if game_id not in live])
+        if not created:
+            del self._created[address]
+        return len(created)
+
+    def _rejected(self, event: str, reason: str) -> None:
+        if self.on_reject is not None:
+            self.on_reject(event, reason)
+
+    def forget(self, sid: str) -> None:
+        self.sids.forget(sid)
+        self.strikes.forget(sid)
+        self._address_of_sid.pop(sid, None)
+
+    def sweep(self, live: Container[str] = ()) -> None:
+        # Address buckets outlive their sids, drop the refilled ones and the
+        # games that are gone
+        for buckets in (self.sids, self.addresses, self.strikes):
+            buckets.sweep()
+        for address, created in list(self._created.items()):
+            created.difference_update([game_id for game_id in created if game_id not in live])
+            if not created:
+                del self._created[address]
@@ -0,0 +1,144 @@
+import asyncio
+import functools
+import zlib
+from typing import Awaitable, Callable, Dict, Hashable
+
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from server.bus import MessageBus
+from server.log import get_logger
+from utils import generate_custom_id
+
+Handler = Callable[..., Awaitable]
+
+log = get_logger(__name__)
+
+
+def shard_of(game_id: str, shard_count: int) -> int:
+    return zlib.crc32(game_id.encode("utf-8")) % shard_count
+
+
+def generate_shard_id(shard: int, shard_count: int) -> str:
+    # Redraw the random part until the id hashes to the wanted shard, on
+    # average shard_count draws
+    while True:
+        game_id = generate_custom_id()
+        if shard_of(game_id, shard_count) == shard:
+            return game_id
+
+
+class BusClientManager(AsyncPubSubManager):
+    # Room emits, enter/leave room and disconnects for sids held by another
+    # worker go through the bus, python-socketio does the rest
+    name = "bus"
+
+    def __init__(self, bus: MessageBus, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.bus = bus
+
+    async def _publish(self, data):
+        await self.bus.publish(self.channel, data)
+
+    async def _listen(self):
+        async for message in self.bus.subscribe(self.channel):
+            yield message
+
+
+class ShardRouter:
+    # Every game lives on exactly one worker, picked by hashing its id. A
+    # client stays on the worker its socket is connected to; an event naming
+    # a game owned by another worker is forwarded there over the bus and the
+    # handler runs on the owner with the original sid, its emits find the
+    # client through BusClientManager.
+    def __init__(self, bus: MessageBus = None, shard: int = 0, shard_count: int = 1):
+        if shard_count > 1 and bus is None:
+            raise ValueError("A message bus is required to run more than one shard")
+        if not 0 <= shard < shard_count:
+            raise ValueError(f"Shard {shard} out of range for {shard_count} shards")
+        self.bus = bus
+        self.shard = shard
+        self.shard_count = shard_count
+        self.handlers: Dict[str, Handler] = {}
+        # The last forwarded event started for each game, the next one waits for it
+        self._running: Dict[Hashable, asyncio.Task] = {}
+
+    @property
+    def sharded(self) -> bool:
+        return self.shard_count > 1
+
+    @staticmethod
+    def channel_of(shard: int) -> str:
+        return f"shard.{shard}"
+
+    def owner_of(self, game_id: str) -> int:
+        return shard_of(game_id, self.shard_count)
+
+    def owns(self, game_id) -> bool:
+        # Ids that are not strings are left to the local handler to reject
+        return not self.sharded or not isinstance(game_id, str) or self.owner_of(game_id) == self.shard
+
+    def new_game_id(self) -> str:
+        if not self.sharded:
+            return generate_custom_id()
+        return generate_shard_id(self.shard, self.shard_count)
+
+    def route(self, handler: Handler) -> Handler:
+        # For handlers taking (sid, data) where data may carry a gameId
+        self.handlers[handler.__name__] = handler
+        if not self.sharded:
+            return handler
+
+        @functools.wraps(handler)
+        async def routed(sid, data):
+            game_id = data.get("gameId") if isinstance(data, dict) else None
+            if game_id is None or self.owns(game_id):
+                return await handler(sid, data)
+            await self.forward(self.owner_of(game_id), handler.__name__, sid, data)
+
+        return routed
+
+    def broadcast(self, handler: Handler) -> Handler:
+        # For handlers taking only a sid, e.g. disconnect: every shard may
+        # hold games the sid was playing
+        self.handlers[handler.__name__] = handler
+        if not self.sharded:
+            return handler
+
+        @functools.wraps(handler)
+        async def broadcasted(sid):
+            await handler(sid)
+            for shard in range(self.shard_count):
+                if shard != self.shard:
+                    await self.forward(shard, handler.__name__, sid)
+
+        return broadcasted
+
+    async def forward(self, shard: int, event: str, sid: str, *args) -> None:
+        await self.bus.publish(self.channel_of(shard), {"event": event, "sid": sid, "args": args})
+
+    async def serve(self) -> None:
+        # Forwarded events for one game run one at a time and keep their
+        # order, so a slow one (a bot search) only holds up its own game.
+        # Events without a game, e.g. disconnect, are ordered per sid.
+        async for message in self.bus.subscribe(self.channel_of(self.shard)):
+            handler = self.handlers.get(message.get("event"))
+            if handler is None:
+                continue
+            data = message["args"][0] if message["args"] else None
+            game_id = data.get("gameId") if isinstance(data, dict) else None
+            key = ("game", game_id) if isinstance(game_id, str) else ("sid", message["sid"])
+            task = asyncio.create_task(self._run(self._running.get(key), handler, message))
+            self._running[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+
+    async def _run(self, previous: asyncio.Task, handler: Handler, message: Dict) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            await handler(message["sid"], *message["args"])
+        except Exception:
+            log.error("forwarded_event_failed", exc_info=True, handler=message["event"], sid=message["sid"])
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._running.get(key) is task:
+            del self._running[key]
@@ -0,0 +1,188 @@
+import asyncio
+from typing import Dict, List, Set, Tuple
+
+import socketio
+
+from games.game import Game
+from server.log import get_logger
+
+log = get_logger(__name__)
+
+# Spectators are kept apart from the players: they sit in their own room per
+# game and a move only appends to that game's pending list. A background task
+# sends each watched game at most one spectator_update per interval with the
+# moves batched, so however large the audience the players' handlers never
+# wait on it.
+#
+# Player uuids let whoever holds them act as that player and secrets are
+# private, so spectator payloads name players by seat and never carry either.
+# Moves and history entries keep their seq, a client drops what its snapshot
+# already covers.
+
+
+def room_of(game_id: str) -> str:
+    return f"{game_id}:spectators"
+
+
+def seats_of(game: Game) -> Dict[str, int]:
+    return {player.uuid: seat for seat, player in enumerate(game.players)}
+
+
+def public_entry(entry: Dict, seats: Dict[str, int]) -> Dict:
+    public = {key: value for key, value in entry.items() if key != "uuid"}
+    public["seat"] = seats.get(entry["uuid"])
+    return public
+
+
+def public_move(outcome: Dict, seats: Dict[str, int]) -> Dict:
+    move = {
+        "seq": outcome["seq"],
+        "seat": seats.get(outcome["player"]),
+        "username": outcome["username"],
+        "move": outcome["move"],
+        "nextSeat": seats.get(outcome["next"]),
+        "winner": outcome["winner"],
+    }
+    if "history" in outcome:
+        move["history"] = [public_entry(entry, seats) for entry in outcome["history"]]
+    else:
+        move["delta"] = outcome["delta"]
+    return move
+
+
+class SpectatorFanout:
+    def __init__(self, sio: socketio.AsyncServer, interval: float = 0.5):
+        self.sio = sio
+        self.interval = interval
+        # game_id -> spectating sids, and the reverse for disconnects
+        self.watchers: Dict[str, Set[str]] = {}
+        self.watching: Dict[str, Set[str]] = {}
+        self.pending: Dict[str, List[Dict]] = {}
+        self.dirty: Dict[str, Game] = {}
+        self._sent_status: Dict[str, Dict] = {}
+        self._snapshots: Dict[str, Tuple[Tuple, Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self.watching)
+
+    async def join(self, sid: str, game: Game) -> None:
+        self.watchers.setdefault(game.game_id, set()).add(sid)
+        self.watching.setdefault(sid, set()).add(game.game_id)
+        await self.sio.enter_room(sid, room_of(game.game_id))
+        await self.sio.emit("spectator_snapshot", self.snapshot(game), room=sid)
+
+    async def leave(self, sid: str, game_id: str) -> None:
+        self._unwatch(sid, game_id)
+        await self.sio.leave_room(sid, room_of(game_id))
+
+    def forget(self, sid: str) -> None:
+        # A disconnected sid has already left its rooms
+        for game_id in self.watching.pop(sid, ()):
+            watchers = self.watchers.get(game_id)
+            if watchers is not None:
+                watchers.discard(sid)
+                if not watchers:
+                    self._drop(game_id)
+
+    def _unwatch(self, sid: str, game_id: str) -> None:
+        games = self.watching.get(sid)
+        if games is not None:
+            games.discard(game_id)
+            if not games:
+                del self.watching[sid]
+        watchers = self.watchers.get(game_id)
+        if watchers is not None:
+            watchers.discard(sid)
+            if not watchers:
+                self._drop(game_id)
+
+    def _drop(self, game_id: str) -> None:
+        self.watchers.pop(game_id, None)
+        self.pending.pop(game_id, None)
+        self.dirty.pop(game_id, None)
+        self._sent_status.pop(game_id, None)
+        self._snapshots.pop(game_id, None)
+
+    def publish(self, game: Game, outcome: Dict = None) -> None:
+        # Called on the move path: nothing is sent here
+        if game.game_id not in self.watchers:
+            return
+        if outcome is not None:
+            self.pending.setdefault(game.game_id, []).append(public_move(outcome, seats_of(game)))
+        self.dirty[game.game_id] = game
+
+    @staticmethod
+    def status(game: Game) -> Dict:
+        seats = seats_of(game)
+        return {
+            "players": [{"name": player.name, "seat": seat} for seat, player in enumerate(game.players)],
+            "gameStatus": game.get_status(),
+            "nextSeat": seats.get(game.state.who_will_play),
+        }
+
+    def snapshot(self, game: Game) -> Dict:
+        # Built once per game state however many spectators join
+        version = (game.seq, len(game.players), game.state.is_game_over, game.get_status())
+        cached = self._snapshots.get(game.game_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        seats = seats_of(game)
+        snapshot = {
+            "gameId": game.game_id,
+            "gameType": game.GAME_TYPE,
+            "seq": game.seq,
+            "isGameOver": game.state.is_game_over,
+            **self.status(game),
+        }
+        if game.GAME_TYPE == "guess_secret":
+            history = game.history_since(0)
+            snapshot["history"] = [public_entry(entry, seats) for entry in history]
+            snapshot["winner"] = history[-1]["player"] if history and history[-1]["result"] else None
+        else:
+            snapshot["board"] = list(game.state.board)
+            winner = game.state.winner
+            snapshot["winner"] = winner if winner in (None, "draw") else getattr(game.get_player(winner), "name", None)
+        self._snapshots[game.game_id] = (version, snapshot)
+        return snapshot
+
+    async def flush(self) -> None:
+        dirty, self.dirty = self.dirty, {}
+        for game_id, game in dirty.items():
+            moves = self.pending.pop(game_id, [])
+            update = {"gameId": game_id, "moves": moves}
+            status = self.status(game)
+            if status != self._sent_status.get(game_id):
+                update["status"] = status
+            try:
+                await self.sio.emit("spectator_update", update, room=room_of(game_id))
+            except Exception:
+                log.error("spectator_update_failed", exc_info=True, game_id=game_id, moves=len(moves))
+                self._retry(game, moves)
+                continue
+            if "status" in update:
+                self._sent_status[game_id] = status
+
+    def _retry(self, game: Game, moves: List[Dict]) -> None:
+        # Ahead of whatever was published while the emit was awaited
+        if game.game_id not in self.watchers:
+            return
+        if moves:
+            self.pending[game.game_id] = moves + self.pending.get(game.game_id, [])
+        self.dirty[game.game_id] = game
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                log.error("spectator_flush_failed", exc_info=True)
+
+    async def close(self, game_id: str, message: str) -> None:
+        if game_id not in self.watchers:
+            return
+        await self.sio.emit("spectator_closed", {"gameId": game_id, "message": message}, room=room_of(game_id))
+        await self.sio.close_room(room_of(game_id))
+        for sid in self.watchers.get(game_id, set()).copy():
+            self._unwatch(sid, game_id)
@@ -0,0 +1,53 @@
+// Decodes the msgpack payloads of server/codec.py back into the JSON shapes.
+// Without the msgpack library the pages ask for JSON and never see them.
+
+const MSGPACK = typeof MessagePack !== 'undefined';
+const ENCODING = MSGPACK ? { encoding: 'msgpack' } : {};
+
+const MARKS = { tictactoe: ['', 'X', 'O'], connect4: ['', 'Red', 'Yellow'] };
+const HISTORY_FIELDS = {
+    guess_secret: ['seq', 'uuid', 'player', 'guess', 'result', 'correct_positions', 'correct_digits'],
+    tictactoe: ['seq', 'uuid', 'player', 'move', 'symbol'],
+    connect4: ['seq', 'uuid', 'player', 'col', 'row', 'color'],
+};
+
+function isPacked(data) {
+    return data instanceof ArrayBuffer || ArrayBuffer.isView(data);
+}
+
+function unpackBoard(packed, size, gameType) {
+    const marks = MARKS[gameType];
+    const board = [];
+    for (let cell = 0; cell < size; cell++) {
+        board.push(marks[(packed[cell >> 2] >> ((cell & 3) << 1)) & 3]);
+    }
+    return board;
+}
+
+function historyEntries(records, gameType) {
+    const fields = HISTORY_FIELDS[gameType];
+    return records.map((record) => {
+        const entry = {};
+        fields.forEach((field, i) => { entry[field] = record[i]; });
+        return entry;
+    });
+}
+
+function decodeMoveResult(data, gameType) {
+    if (!isPacked(data)) return data;
+    const [gameId, seq, player, username, move, next, winner, detail] = MessagePack.decode(data);
+    const result = { gameId, seq, player, username, move, next, winner };
+    if (gameType === 'guess_secret') {
+        result.history = historyEntries(detail, gameType);
+    } else {
+        const [deltaSeq, cell, mark] = detail;
+        result.delta = { seq: deltaSeq, cell, value: MARKS[gameType][mark] };
+    }
+    return result;
+}
+
+function decodeSnapshot(data, gameType, size) {
+    if (!isPacked(data)) return data;
+    const [gameId, seq, packed] = MessagePack.decode(data);
+    return { gameId, seq, board: unpackBoard(packed, size, gameType) };
+}
@@ -19,6 +19,9 @@ function copyGameId() {
 
 const socket = io();
 
+// Sequence number of the last history entry rendered
+let historySeq = 0;
+
 // Join the game room
 socket.emit('join_room', { gameId, username, uuid });
 
@@ -78,26 +81,37 @@ function setGuess(guess) {
     document.getElementById('guess').value = guess;
 }
 
-function updateHistory(history) {
+function appendHistory(entries) {
     const historyList = document.getElementById('history');
-    historyList.innerHTML = history.map(entry => {
-        const isCurrentUser = entry.uuid === uuid;
-        const alignmentClass = isCurrentUser ? 'current-user' : 'opponent';
-        return `
-            <li class="${entry.result ? 'correct' : 'incorrect'} ${alignmentClass}">
-                <span class="icon">${entry.result ? '✅' : '❌'}</span>
-                <div class="details">
-                    <div class="player">${entry.player}</div>
-                    <div class="guess">Guessed: ${entry.guess}</div>
-                    <div class="result">Correct Digits in Correct Position: <strong>${entry.correct_positions}</strong>, Correct but Misplaced Digits: <strong>${entry.correct_digits}</strong></div>
-                    <div class="timestamp">${new Date().toLocaleTimeString()}</div>
-                </div>
-            </li>
-        `;
-    }).join('');
+    for (const entry of entries) {
+        if (entry.seq <= historySeq) continue;
+        if (entry.seq !== historySeq + 1) {
+            // Missed entries, ask for everything after the last one we have
+            socket.emit('request_history', { gameId, lastSeq: historySeq });
+            break;
+        }
+        historyList.insertAdjacentHTML('beforeend', renderHistoryEntry(entry));
+        historySeq = entry.seq;
+    }
     historyList.scrollTop = historyList.scrollHeight;
 }
 
+function renderHistoryEntry(entry) {
+    const isCurrentUser = entry.uuid === uuid;
+    const alignmentClass = isCurrentUser ? 'current-user' : 'opponent';
+    return `
+        <li class="${entry.result ? 'correct' : 'incorrect'} ${alignmentClass}">
+            <span class="icon">${entry.result ? '✅' : '❌'}</span>
+            <div class="details">
+                <div class="player">${entry.player}</div>
+                <div class="guess">Guessed: ${entry.guess}</div>
+                <div class="result">Correct Digits in Correct Position: <strong>${entry.correct_positions}</strong>, Correct but Misplaced Digits: <strong>${entry.correct_digits}</strong></div>
+                <div class="timestamp">${new Date().toLocaleTimeString()}</div>
+            </div>
+        </li>
+    `;
+}
+
 function updateOpponentStatus(opponentName, status) {
     const opponentNameText = document.getElementById('opponentNameText');
     const gameStatusText = document.getElementById('gameStatusText');
@@ -111,23 +125,39 @@ socket.on('secret_submitted', () => {
     secretEnable(true);
 });
 
-socket.on('guess_turn', (data) => {
+function onGuessTurn() {
     guessEnable(false);
-});
+}
 
-socket.on('guess_submitted', (data) => {
+function onGuessSubmitted() {
     setGuess('');
     guessEnable(true);
-});
+}
 
-socket.on('update_history', (history) => {
-    updateHistory(history);
-});
+function onGameOver(data) {
+    alert(`Game Over! ${data.winner} wins!`);
+}
 
-socket.on('game_over', (winner) => {
-    alert(`Game Over! ${winner.winner} wins!`);
+// One event per move, the page asks for it when reconnecting
+socket.on('move_result', (packed) => {
+    const data = decodeMoveResult(packed, 'guess_secret');
+    if (data.player === uuid) {
+        onGuessSubmitted();
+    } else if (data.next === uuid) {
+        onGuessTurn();
+    }
+    appendHistory(data.history);
+    if (data.winner) {
+        onGameOver(data);
+    }
 });
 
+// Sent by servers that predate move_result
+socket.on('guess_turn', onGuessTurn);
+socket.on('guess_submitted', onGuessSubmitted);
+socket.on('append_history', appendHistory);
+socket.on('game_over', onGameOver);
+
 // Listen for errors
 socket.on('error', (message) => {
     alert(message.message);
@@ -136,7 +166,7 @@ socket.on('error', (message) => {
 socket.on('connect', () => {
     console.log('Connected to server');
     if (gameId && username && uuid) {
-        socket.emit('reconnect_player', { gameId, username, uuid });
+        socket.emit('reconnect_player', { gameId, username, uuid, lastSeq: historySeq, moveResult: true, ...ENCODING });
     }
 });
 
@@ -157,7 +187,12 @@ socket.on('reconnected', (data) => {
     } else {
         guessEnable(false);
     }
-    updateHistory(history);
+    appendHistory(history);
+});
+
+socket.on('game_timeout', (data) => {
+    alert(data.message);
+    window.location.href = '/';
 });
 
 socket.on('game_not_found', () => {
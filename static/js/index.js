@@ -14,15 +14,31 @@ const gameRulesMap = {
         <li>After each guess, hints are provided about correct digits and their positions.</li>
         <li>The first player to guess the full number correctly wins!</li>
     `,
+    'guess_secret_bot': `
+        <li>You and the computer each have a secret number, the computer picks its own.</li>
+        <li>You guess first, then take turns guessing each other's secret number.</li>
+        <li>After each guess, hints are provided about correct digits and their positions.</li>
+        <li>Guess the full number before the computer does to win!</li>
+    `,
     'tictactoe': `
         <li>Players take turns placing their marks (X or O) in empty squares.</li>
         <li>The first player to get 3 of their marks in a row (up, down, across, or diagonally) is the winner.</li>
         <li>When all 9 squares are full, the game is over. If no player has 3 marks in a row, the game ends in a tie.</li>
     `,
+    'tictactoe_bot': `
+        <li>You play X against the computer and move first.</li>
+        <li>The first player to get 3 of their marks in a row (up, down, across, or diagonally) is the winner.</li>
+        <li>On Hard the computer never loses, a draw is the best you can do.</li>
+    `,
     'connect4': `
         <li>Players take turns dropping their colored discs from the top into a seven-column, six-row vertically suspended grid.</li>
         <li>The pieces fall straight down, occupying the lowest available space within the column.</li>
         <li>The objective of the game is to be the first to form a horizontal, vertical, or diagonal line of four of one's own discs.</li>
+    `,
+    'connect4_bot': `
+        <li>You play Red against the computer and drop the first disc.</li>
+        <li>The pieces fall straight down, occupying the lowest available space within the column.</li>
+        <li>The objective of the game is to be the first to form a horizontal, vertical, or diagonal line of four of one's own discs.</li>
     `
 };
 
@@ -31,6 +47,7 @@ document.getElementById('gameType').addEventListener('change', function () {
     if (rulesList && gameRulesMap[this.value]) {
         rulesList.innerHTML = gameRulesMap[this.value];
     }
+    document.getElementById('difficulty').style.display = this.value.endsWith('_bot') ? 'block' : 'none';
 });
 
 document.addEventListener('DOMContentLoaded', () => {
@@ -56,6 +73,11 @@ function createGame() {
         return;
     }
     showLoading();
+    if (gameType.endsWith('_bot')) {
+        const difficulty = document.getElementById('difficulty').value;
+        socket.emit('create_game', { username, game_type: gameType, difficulty });
+        return;
+    }
     socket.emit('create_game', { username, game_type: gameType });
 }
 
@@ -71,6 +93,16 @@ function joinGame() {
     socket.emit('join_game', { gameId, username });
 }
 
+function watchGame() {
+    const gameId = document.getElementById('gameId').value.trim();
+
+    if (!gameId) {
+        alert("Please enter a game ID!");
+        return;
+    }
+    window.location.href = `/spectate.html?gameId=${encodeURIComponent(gameId)}`;
+}
+
 socket.on('game_created', (data) => {
     hideLoading();
     const page = data.gameType === 'tictactoe' ? 'tictactoe.html' : (data.gameType === 'connect4' ? 'connect4.html' : 'game.html');
@@ -0,0 +1,138 @@
+const socket = io();
+
+const urlParams = new URLSearchParams(window.location.search);
+const gameId = urlParams.get('gameId');
+
+const TITLES = { guess_secret: 'Guess The Secret', tictactoe: 'Tic-Tac-Toe', connect4: 'Connect 4' };
+
+let gameType = null;
+let players = [];
+// Updates batch moves the snapshot may already cover, anything up to seq is drawn
+let seq = 0;
+let winnerShown = false;
+
+if (!gameId) {
+    window.location.href = '/';
+}
+
+document.getElementById('gameIdDisplay').innerText = gameId;
+
+socket.on('connect', () => {
+    socket.emit('spectate_game', { gameId });
+});
+
+function stopWatching() {
+    socket.emit('stop_spectating', { gameId });
+    window.location.href = '/';
+}
+
+function updateStatus(msg) {
+    document.getElementById('status-message').innerText = msg;
+}
+
+function nameOf(seat) {
+    const player = players.find((p) => p.seat === seat);
+    return player ? player.name : 'Waiting for a player';
+}
+
+function renderPlayers(status) {
+    players = status.players;
+    document.getElementById('players').innerText = `${nameOf(0)} vs ${nameOf(1)}`;
+    if (status.gameStatus === 'Game over') {
+        if (!winnerShown) updateStatus('Game over');
+        return;
+    }
+    updateStatus(status.nextSeat === null || status.nextSeat === undefined
+        ? status.gameStatus
+        : `${nameOf(status.nextSeat)}'s turn`);
+}
+
+function buildBoard(size) {
+    const boardElement = document.getElementById('board');
+    boardElement.innerHTML = '';
+    boardElement.className = gameType === 'connect4' ? 'c4-board' : 'tictactoe-board';
+    for (let i = 0; i < size; i++) {
+        const cell = document.createElement('div');
+        cell.id = `cell-${i}`;
+        boardElement.appendChild(cell);
+        renderCell(i, '');
+    }
+}
+
+function renderCell(i, value) {
+    const cell = document.getElementById(`cell-${i}`);
+    if (gameType === 'connect4') {
+        cell.className = 'c4-cell ' + (value === 'Red' ? 'red' : (value === 'Yellow' ? 'yellow' : ''));
+        return;
+    }
+    cell.className = 'cell ' + (value === 'X' ? 'x-mark' : (value === 'O' ? 'o-mark' : ''));
+    cell.innerText = value || '';
+}
+
+function appendHistory(entries) {
+    const historyList = document.getElementById('history');
+    for (const entry of entries) {
+        historyList.insertAdjacentHTML('beforeend', `
+            <li class="${entry.result ? 'correct' : 'incorrect'} ${entry.seat === 0 ? 'current-user' : 'opponent'}">
+                <span class="icon">${entry.result ? '✅' : '❌'}</span>
+                <div class="details">
+                    <div class="player">${entry.player}</div>
+                    <div class="guess">Guessed: ${entry.guess}</div>
+                    <div class="result">Correct Digits in Correct Position: <strong>${entry.correct_positions}</strong>, Correct but Misplaced Digits: <strong>${entry.correct_digits}</strong></div>
+                </div>
+            </li>
+        `);
+    }
+    historyList.scrollTop = historyList.scrollHeight;
+}
+
+function showWinner(winner) {
+    winnerShown = true;
+    updateStatus(winner === 'draw' ? "It's a draw!" : `${winner} wins!`);
+}
+
+socket.on('spectator_snapshot', (data) => {
+    if (data.gameId !== gameId) return;
+    gameType = data.gameType;
+    seq = data.seq;
+    document.getElementById('title').innerText = `Watching ${TITLES[gameType]}`;
+    renderPlayers(data);
+    if (gameType === 'guess_secret') {
+        document.getElementById('historyPanel').style.display = 'block';
+        document.getElementById('history').innerHTML = '';
+        appendHistory(data.history);
+    } else {
+        buildBoard(data.board.length);
+        data.board.forEach((value, i) => renderCell(i, value));
+    }
+    if (data.winner) {
+        showWinner(data.winner);
+    }
+});
+
+socket.on('spectator_update', (data) => {
+    if (data.gameId !== gameId || gameType === null) return;
+    if (data.status) {
+        renderPlayers(data.status);
+    }
+    for (const move of data.moves) {
+        if (move.seq <= seq) continue;
+        seq = move.seq;
+        if (move.history) {
+            appendHistory(move.history);
+        } else {
+            renderCell(move.delta.cell, move.delta.value);
+        }
+        if (move.winner) {
+            showWinner(move.winner);
+        }
+    }
+});
+
+socket.on('spectator_closed', (data) => {
+    updateStatus(data.message);
+});
+
+socket.on('game_not_found', () => {
+    updateStatus('Game not found');
+});
@@ -8,6 +8,7 @@ const username = localStorage.getItem('username');
 
 let myTurn = false;
 let gameOver = false;
+let boardSeq = 0;
 
 if (!gameId || !uuid || !username) {
     window.location.href = '/';
@@ -21,22 +22,28 @@ function copyGameId() {
     });
 }
 
-// Reconnect to the room
+// Reconnect to the room, asking for a single move_result event per move
 socket.emit('reconnect_player', {
     gameId: gameId,
     username: username,
-    uuid: uuid
+    uuid: uuid,
+    moveResult: true,
+    ...ENCODING
 });
 
 function updateStatus(msg) {
     document.getElementById('status-message').innerText = msg;
 }
 
+function renderCell(i, value) {
+    const cell = document.getElementById(`cell-${i}`);
+    cell.innerText = value;
+    cell.className = 'cell ' + (value === 'X' ? 'x-mark' : (value === 'O' ? 'o-mark' : ''));
+}
+
 function renderBoard(board) {
     for (let i = 0; i < 9; i++) {
-        const cell = document.getElementById(`cell-${i}`);
-        cell.innerText = board[i];
-        cell.className = 'cell ' + (board[i] === 'X' ? 'x-mark' : (board[i] === 'O' ? 'o-mark' : ''));
+        renderCell(i, board[i]);
     }
 }
 
@@ -66,6 +73,7 @@ socket.on('reconnected', (data) => {
     }
 
     renderBoard(data.state.board);
+    boardSeq = data.state.seq;
     myTurn = data.state.who_will_play === uuid;
     gameOver = data.state.is_game_over;
 
@@ -82,21 +90,34 @@ socket.on('reconnected', (data) => {
     }
 });
 
-socket.on('update_board', (data) => {
-    renderBoard(data.board);
-});
+function onBoardDelta(data) {
+    if (data.seq <= boardSeq) return;
+    if (data.seq !== boardSeq + 1) {
+        // Missed a move, resync from a full snapshot
+        socket.emit('request_snapshot', { gameId });
+        return;
+    }
+    renderCell(data.cell, data.value);
+    boardSeq = data.seq;
+}
 
-socket.on('guess_turn', (data) => {
+function onTurn() {
     myTurn = true;
     updateStatus("Your turn!");
-});
+}
 
-socket.on('move_submitted', (data) => {
+function onMoveSubmitted() {
     myTurn = false;
     updateStatus("Opponent's turn");
+}
+
+socket.on('board_snapshot', (packed) => {
+    const data = decodeSnapshot(packed, 'tictactoe', 9);
+    renderBoard(data.board);
+    boardSeq = data.seq;
 });
 
-socket.on('game_over', (data) => {
+function onGameOver(data) {
     gameOver = true;
     let message = "";
     if (data.winner === "draw") {
@@ -110,8 +131,27 @@ socket.on('game_over', (data) => {
     document.getElementById('endGameMessage').innerText = message;
     document.getElementById('endGameModal').style.display = 'block';
     document.getElementById('modalOverlay').style.display = 'block';
+}
+
+socket.on('move_result', (packed) => {
+    const data = decodeMoveResult(packed, 'tictactoe');
+    onBoardDelta(data.delta);
+    if (data.player === uuid) {
+        onMoveSubmitted();
+    } else if (data.next === uuid) {
+        onTurn();
+    }
+    if (data.winner) {
+        onGameOver(data);
+    }
 });
 
+// Sent by servers that predate move_result
+socket.on('board_delta', onBoardDelta);
+socket.on('guess_turn', onTurn);
+socket.on('move_submitted', onMoveSubmitted);
+socket.on('game_over', onGameOver);
+
 socket.on('opponent_status', (data) => {
     if (!gameOver) {
         if (data.players.length < 2) {
@@ -129,6 +169,11 @@ socket.on('opponent_status', (data) => {
     }
 });
 
+socket.on('game_timeout', (data) => {
+    alert(data.message);
+    window.location.href = '/';
+});
+
 socket.on('error', (data) => {
     alert(data.message);
     if (data.message.includes("has left")) {
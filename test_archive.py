@@ -0,0 +1,101 @@
+import unittest
+from datetime import datetime, timedelta
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+from server.archive import GameArchive, pack, rebuild
+from fixtures import CONNECT4_WIN, finished_connect4, seated
+
+class TestArchive(unittest.TestCase):
+    def assertSameGame(self, rebuilt, game):
+        self.assertEqual(rebuilt.turn_history.to_list(), game.turn_history.to_list())
+        self.assertEqual([(p.name, p.uuid) for p in rebuilt.players], [(p.name, p.uuid) for p in game.players])
+        self.assertEqual((rebuilt.seq, rebuilt.state.is_game_over, rebuilt.get_status()),
+                         (game.seq, game.state.is_game_over, game.get_status()))
+        self.assertEqual(rebuilt.last_played_at.timestamp(), game.last_played_at.timestamp())
+
+    def test_connect4_is_its_column_sequence(self):
+        game = finished_connect4()
+        record = pack(game, datetime.now())
+        self.assertEqual(record.moves, bytes(CONNECT4_WIN))
+        rebuilt = rebuild(record)
+        self.assertSameGame(rebuilt, game)
+        self.assertEqual(rebuilt.board_snapshot(), game.board_snapshot())
+        self.assertEqual(rebuilt.state.winner, game.state.winner)
+
+    def test_tictactoe_draw(self):
+        game = TicTacToeGame("g")
+        seated(game)
+        for cell in [0, 1, 2, 4, 3, 5, 7, 6, 8]:
+            game.play(game.state.who_will_play, cell)
+        rebuilt = rebuild(pack(game, datetime.now()))
+        self.assertSameGame(rebuilt, game)
+        self.assertEqual(rebuilt.state.winner, "draw")
+
+    def test_guess_secret_keeps_secrets_and_first_mover(self):
+        game = GuessSecretGame("g")
+        a, b = seated(game)
+        game.set_secret(a, "1234")
+        game.set_secret(b, "5678")
+        for uuid, guess in ((b.uuid, "1243"), (a.uuid, "5687"), (b.uuid, "1234")):
+            game.play(uuid, guess)
+        record = pack(game, datetime.now())
+        self.assertEqual(len(record.moves), 6)
+        rebuilt = rebuild(record)
+        self.assertSameGame(rebuilt, game)
+        self.assertEqual([p.secret for p in rebuilt.players], ["1234", "5678"])
+
+    def test_quit_ends_the_game(self):
+        game = Connect4Game("g")
+        a, b = seated(game)
+        game.play(a.uuid, 3)
+        game.leave(b)
+        rebuilt = rebuild(pack(game, datetime.now(), [b]))
+        self.assertSameGame(rebuilt, game)
+        self.assertIsNone(rebuilt.get_player(b.uuid))
+
+    def test_guess_quit_before_moving(self):
+        game = GuessSecretGame("g")
+        a, b = seated(game)
+        game.set_secret(a, "1234")
+        game.set_secret(b, "5678")
+        game.play(a.uuid, "5687")
+        game.leave(b)
+        rebuilt = rebuild(pack(game, datetime.now(), [b]))
+        self.assertSameGame(rebuilt, game)
+
+    def test_lru_cache_and_rebuild(self):
+        archive = GameArchive(timedelta(minutes=10), cache_size=1)
+        first, second = finished_connect4("g1"), finished_connect4("g2")
+        archive.add(first)
+        archive.add(second)
+        self.assertEqual((len(archive), archive.cached), (2, 1))
+        self.assertIs(archive.get("g2"), second)
+
+        rebuilt = archive.get("g1")
+        self.assertIsNot(rebuilt, first)
+        self.assertSameGame(rebuilt, first)
+        self.assertIs(archive.get("g1"), rebuilt)
+        self.assertIsNone(archive.get("missing"))
+
+    def test_leave_survives_cache_eviction(self):
+        archive = GameArchive(timedelta(minutes=10), cache_size=1)
+        game = finished_connect4("g1")
+        archive.add(game)
+        archive.leave(game, game.players[0])
+        archive.add(finished_connect4("g2"))
+        self.assertEqual(len(archive.get("g1").players), 1)
+
+        archive.leave(archive.get("g1"), archive.get("g1").players[0])
+        self.assertNotIn("g1", archive)
+
+    def test_pop_expired(self):
+        archive = GameArchive(timedelta(minutes=10))
+        now = datetime.now()
+        archive.add(finished_connect4("old"), now - timedelta(minutes=11))
+        archive.add(finished_connect4("new"), now)
+        self.assertEqual(archive.pop_expired(now), ["old"])
+        self.assertEqual((len(archive), archive.cached, "new" in archive), (1, 1, True))
+
+if __name__ == "__main__":
+    unittest.main()
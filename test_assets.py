@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from server.assets import AssetCache
+
+class TestAssetCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "js"))
+        self.write("js/app.js", "console.log('v1');" * 40)
+        self.write("page.html", '<script src="static/js/app.js?v=3"></script>')
+        self.cache = AssetCache(self.root, check_interval=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text, mtime=None):
+        full_path = os.path.join(self.root, path)
+        with open(full_path, "w") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(full_path, (mtime, mtime))
+
+    def test_page_points_at_content_hash(self):
+        version = self.cache.get("js/app.js").version
+        page = self.cache.get("page.html").variants["identity"][0].decode()
+        self.assertEqual(page, f'<script src="static/js/app.js?v={version}"></script>')
+
+    def test_compressed_variant_and_etags(self):
+        asset = self.cache.get("js/app.js")
+        encoding, body, etag = asset.select("gzip, deflate")
+        self.assertEqual(encoding, "gzip")
+        self.assertLess(len(body), len(asset.variants["identity"][0]))
+        self.assertTrue(asset.matches(f'W/{etag}, "other"'))
+        self.assertFalse(asset.matches('"other"'))
+        self.assertEqual(asset.select("")[0], "identity")
+
+    def test_reload_on_mtime_change_updates_page(self):
+        old_page = self.cache.get("page.html")
+        self.write("js/app.js", "console.log('v2');" * 40, mtime=1)
+
+        new_page = self.cache.get("page.html")
+        self.assertNotEqual(old_page.version, new_page.version)
+        self.assertIn(self.cache.get("js/app.js").version, new_page.variants["identity"][0].decode())
+
+    def test_paths_outside_root_are_rejected(self):
+        with self.assertRaises(FileNotFoundError):
+            self.cache.get("../secret.txt")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import unittest
+import numpy as np
+from bots.bot import bot_level, bot_uuid, is_bot
+from bots.bulls_and_cows import CODES, CODE_INDEX, BullsAndCowsSolver, pack_score
+from games.guess_secret_game import GuessSecretGame
+from player.guess_player import GuessPlayer
+
+class TestBullsAndCowsSolver(unittest.TestCase):
+    def setUp(self):
+        self.game = GuessSecretGame("game1")
+        self.solver = BullsAndCowsSolver()
+
+    def test_codes_are_the_valid_secrets(self):
+        self.assertEqual(len(CODES), 9 * 9 * 8 * 7)
+        self.assertTrue(all(GuessSecretGame.is_valid_input(code) for code in CODES))
+
+    def test_matrix_matches_calculate_score(self):
+        matrix = BullsAndCowsSolver.matrix()
+        rng = random.Random(7)
+        for _ in range(2000):
+            guess, secret = rng.choice(CODES), rng.choice(CODES)
+            correct_digits, correct_positions = self.game.calculate_score(guess, secret)
+            self.assertEqual(matrix[CODE_INDEX[guess], CODE_INDEX[secret]], pack_score(correct_digits, correct_positions))
+
+    def test_partition_counts(self):
+        rng = random.Random(3)
+        candidates = sorted(rng.sample(range(len(CODES)), 300))
+        counts = self.solver.partition_counts(candidates, block=1000)
+        matrix = BullsAndCowsSolver.matrix()
+        for guess in rng.sample(range(len(CODES)), 50):
+            expected = [0] * 25
+            for candidate in candidates:
+                expected[matrix[guess, candidate]] += 1
+            self.assertEqual(counts[guess].tolist(), expected)
+
+    def test_candidates_fit_history(self):
+        history = [("1234", 1, 1), ("5678", 0, 2)]
+        for index in self.solver.candidates(history):
+            for guess, correct_digits, correct_positions in history:
+                self.assertEqual(self.game.calculate_score(guess, CODES[index]), (correct_digits, correct_positions))
+
+    def test_solves_every_sampled_secret(self):
+        for strategy in BullsAndCowsSolver.STRATEGIES:
+            solver = BullsAndCowsSolver(strategy, random.Random(5))
+            for secret in random.Random(3).sample(CODES, 20):
+                history = []
+                while not history or history[-1][2] != 4:
+                    guess = solver.next_guess(history)
+                    history.append((guess, *self.game.calculate_score(guess, secret)))
+                self.assertLessEqual(len(history), 8)
+
+    def test_ties_are_drawn_at_random(self):
+        for strategy in BullsAndCowsSolver.STRATEGIES:
+            solver = BullsAndCowsSolver(strategy, random.Random(1))
+            best = set(solver.best_guesses(np.arange(len(CODES))).tolist())
+            openings = [solver.next_guess([]) for _ in range(20)]
+            self.assertGreater(len(set(openings)), 10)
+            self.assertTrue(all(CODE_INDEX[guess] in best for guess in openings))
+
+            history = [(openings[0], 0, 0)]
+            ties = set(solver.best_guesses(solver.candidates(history)).tolist())
+            self.assertGreater(len(ties), 1)
+            self.assertEqual({CODE_INDEX[solver.next_guess(history)] for _ in range(50)} - ties, set())
+
+    def test_bot_uuid_carries_level(self):
+        bot = GuessPlayer("Computer", None, "game1", uuid=bot_uuid("hard"))
+        human = GuessPlayer("Alice", "sid1", "game1")
+        self.assertTrue(is_bot(bot))
+        self.assertFalse(is_bot(human))
+        self.assertEqual(bot_level(bot), "hard")
+
+if __name__ == '__main__':
+    unittest.main()
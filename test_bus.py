@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from server import bus as buses
+from server.bus import BrokerBus, BusBroker
+
+class TestBrokerBus(unittest.IsolatedAsyncioTestCase):
+    async def start_broker(self, port=0):
+        # What a broker process dying does: every connection is closed
+        broker = BusBroker()
+        self.connections = []
+
+        async def handle(reader, writer):
+            self.connections.append(writer)
+            await broker._handle(reader, writer)
+
+        self.server = await asyncio.start_server(handle, "127.0.0.1", port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop_broker(self):
+        self.server.close()
+        for writer in self.connections:
+            writer.close()
+        await self.server.wait_closed()
+
+    async def asyncSetUp(self):
+        self.delays = buses.RECONNECT_DELAYS
+        buses.RECONNECT_DELAYS = (0.01,)
+        await self.start_broker()
+        self.subscriber = BrokerBus("127.0.0.1", self.port)
+        self.publisher = BrokerBus("127.0.0.1", self.port)
+        self.received = asyncio.Queue()
+
+        async def listen():
+            async for message in self.subscriber.subscribe("events"):
+                self.received.put_nowait(message)
+
+        self.listener = asyncio.create_task(listen())
+        await asyncio.sleep(0.05)
+
+    async def asyncTearDown(self):
+        buses.RECONNECT_DELAYS = self.delays
+        self.listener.cancel()
+        await self.subscriber.close()
+        await self.publisher.close()
+        await self.stop_broker()
+
+    async def test_resubscribes_after_the_broker_restarts(self):
+        await self.publisher.publish("events", 1)
+        self.assertEqual(await asyncio.wait_for(self.received.get(), 1), 1)
+
+        await self.stop_broker()
+        await asyncio.sleep(0.05)
+        await self.start_broker(self.port)
+        await asyncio.sleep(0.1)
+
+        await self.publisher.publish("events", 2)
+        self.assertEqual(await asyncio.wait_for(self.received.get(), 1), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import msgpack
+from benchmarks.memory_footprint import CONNECT4_DRAW
+from benchmarks.serializers import GAMES
+from server import codec
+
+class TestCodec(unittest.TestCase):
+    def test_board_round_trip(self):
+        for game_type, size in (("tictactoe", 9), ("connect4", 42)):
+            first, second = codec.MARKS[game_type]
+            board = [("", first, second)[i % 3] for i in range(size)]
+            packed = codec.pack_board(board, game_type)
+            self.assertEqual(len(packed), (size + 3) // 4)
+            self.assertEqual(codec.unpack_board(packed, size, game_type), board)
+
+    def test_full_connect4_board_fits_in_eleven_bytes(self):
+        _, sent = GAMES["connect4"]()
+        event, snapshot = sent[-1]
+        self.assertEqual(event, "board_snapshot")
+        game_id, seq, packed = msgpack.unpackb(codec.pack_snapshot(snapshot["gameId"], snapshot, "connect4"))
+        self.assertEqual((game_id, seq, len(packed)), (snapshot["gameId"], len(CONNECT4_DRAW), 11))
+        self.assertEqual(codec.unpack_board(packed, 42, "connect4"), snapshot["board"])
+
+    def test_outcomes_are_positional(self):
+        for game_type in GAMES:
+            _, sent = GAMES[game_type]()
+            for event, outcome in sent:
+                if event != "move_result":
+                    continue
+                unpacked = msgpack.unpackb(codec.pack_outcome(outcome, game_type))
+                head = [outcome[key] for key in ("gameId", "seq", "player", "username", "move", "next", "winner")]
+                self.assertEqual(unpacked[:7], head)
+                if game_type == "guess_secret":
+                    fields = codec.HISTORY_FIELDS[game_type]
+                    self.assertEqual([dict(zip(fields, record)) for record in unpacked[7]], outcome["history"])
+                else:
+                    seq, cell, mark = unpacked[7]
+                    self.assertEqual((seq, cell), (outcome["delta"]["seq"], outcome["delta"]["cell"]))
+                    self.assertEqual(codec.mark_codes(game_type)[outcome["delta"]["value"]], mark)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from games.connect4_game import Connect4Game
+from games.connect4_board import Connect4Board
 from player.connect4_player import Connect4Player
 from errors.input_error import InputError
 from errors.mutability_error import MutabilityError
@@ -50,5 +51,65 @@ class TestConnect4Game(unittest.TestCase):
         self.assertTrue(self.game.state.is_game_over)
         self.assertEqual(self.game.state.winner, self.player1.uuid)
 
+    def test_board_list_tracks_bitboard(self):
+        self.game.play(self.player1.uuid, 3)
+        self.game.play(self.player2.uuid, 3)
+
+        self.assertEqual(self.game.state.board[5 * 7 + 3], "Red")
+        self.assertEqual(self.game.state.board[4 * 7 + 3], "Yellow")
+        self.assertEqual(self.game.get_lowest_empty_row(3), 3)
+        self.assertEqual(self.game.turn_history[1]["row"], 4)
+
+    def test_full_column_is_rejected(self):
+        players = [self.player1, self.player2]
+        for i in range(6):
+            self.game.play(players[i % 2].uuid, 0)
+
+        self.assertEqual(self.game.get_lowest_empty_row(0), -1)
+        with self.assertRaises(InputError):
+            self.game.play(self.player1.uuid, 0)
+
+    def test_play_game_diagonal_win(self):
+        # P1 builds the up-right diagonal (0,5) (1,4) (2,3) (3,2)
+        moves = [0, 1, 1, 2, 2, 3, 2, 3, 3, 6, 3]
+        players = [self.player1, self.player2]
+        winner = None
+        for i, col in enumerate(moves):
+            winner = self.game.play(players[i % 2].uuid, col)
+
+        self.assertEqual(winner, self.player1)
+        self.assertEqual(self.game.check_winner(), "Red")
+
+    def test_play_game_draw(self):
+        # A full board in which neither colour ever lines up four
+        order = [int(c) for c in "015502320345364356222230416104501114435666"]
+        players = [self.player1, self.player2]
+        winner = None
+        for i, col in enumerate(order):
+            winner = self.game.play(players[i % 2].uuid, col)
+
+        self.assertEqual(winner, "draw")
+        self.assertEqual(self.game.state.winner, "draw")
+
+
+class TestConnect4Board(unittest.TestCase):
+    def test_horizontal_line_does_not_wrap_columns(self):
+        board = Connect4Board()
+        for col in range(3):
+            board.play(col, 0)
+        self.assertFalse(board.has_won(0))
+        board.play(3, 0)
+        self.assertTrue(board.has_won(0))
+
+    def test_undo_restores_position(self):
+        board = Connect4Board()
+        board.play(2, 0)
+        board.play(2, 1)
+        board.undo(2, 1)
+
+        self.assertEqual(board.masks, [1 << (2 * Connect4Board.HEIGHT), 0])
+        self.assertEqual(board.heights[2], 1)
+        self.assertEqual(board.moves, 1)
+
 if __name__ == "__main__":
     unittest.main()
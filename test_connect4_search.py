@@ -0,0 +1,68 @@
+import random
+import unittest
+from bots.connect4_search import Connect4Search, winning_cells
+from games.connect4_board import Connect4Board
+
+class TestConnect4Search(unittest.TestCase):
+    def setUp(self):
+        self.board = Connect4Board()
+        self.search = Connect4Search()
+
+    def play(self, cols):
+        for i, col in enumerate(cols):
+            self.board.play(col, i % 2)
+
+    def best(self, slot, depth=8):
+        mask = self.board.masks[0] | self.board.masks[1]
+        return self.search.best_column(self.board.masks[slot], mask, depth, 1.0)
+
+    def test_winning_cells_match_brute_force(self):
+        rng = random.Random(5)
+        for _ in range(100):
+            board = Connect4Board()
+            for i in range(rng.randrange(25)):
+                col = rng.choice([c for c in range(7) if board.can_play(c)])
+                board.play(col, i % 2)
+                if board.has_won(i % 2):
+                    board.undo(col, i % 2)
+                    break
+            mask = board.masks[0] | board.masks[1]
+            for slot in (0, 1):
+                expected = 0
+                for bit in range(Connect4Board.HEIGHT * Connect4Board.COLS):
+                    if bit % Connect4Board.HEIGHT == Connect4Board.ROWS or (mask >> bit) & 1:
+                        continue
+                    if Connect4Board.is_winning_mask(board.masks[slot] | (1 << bit)):
+                        expected |= 1 << bit
+                self.assertEqual(winning_cells(board.masks[slot], mask), expected)
+
+    def test_takes_immediate_win(self):
+        self.play([0, 6, 1, 6, 2])
+        self.assertEqual(self.best(1), 3) # blocks Red's row
+        self.board.play(5, 1)
+        self.assertEqual(self.best(0), 3)
+
+    def test_avoids_open_double_threat(self):
+        # Red threatens to open the bottom row on both sides
+        self.play([3, 6, 2])
+        self.assertIn(self.best(1), (1, 4))
+
+    def test_beats_random_player(self):
+        rng = random.Random(11)
+        for game in range(4):
+            board = Connect4Board()
+            slot = 0
+            while True:
+                mask = board.masks[0] | board.masks[1]
+                if slot == game % 2:
+                    col = self.search.best_column(board.masks[slot], mask, 4, 1.0)
+                else:
+                    col = rng.choice([c for c in range(7) if board.can_play(c)])
+                board.play(col, slot)
+                if board.has_won(slot) or board.is_full():
+                    break
+                slot ^= 1
+            self.assertEqual(slot, game % 2)
+
+if __name__ == '__main__':
+    unittest.main()
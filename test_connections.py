@@ -0,0 +1,62 @@
+import unittest
+from server.connections import ConnectionRegistry
+from games.tictactoe_game import TicTacToeGame
+from player.tictactoe_player import TicTacToePlayer
+
+class TestConnectionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+
+    def test_one_sid_in_several_games(self):
+        self.registry.bind("sid1", "game_a", "uuid1")
+        self.registry.bind("sid1", "game_b", "uuid2")
+
+        self.assertEqual(self.registry.games_of("sid1"), {"game_a": "uuid1", "game_b": "uuid2"})
+        self.assertEqual(self.registry.pop("sid1"), {"game_a": "uuid1", "game_b": "uuid2"})
+        self.assertNotIn("sid1", self.registry)
+
+    def test_rebind_moves_player_to_new_sid(self):
+        self.registry.bind("old_sid", "game_a", "uuid1")
+        self.registry.rebind("old_sid", "new_sid", "game_a", "uuid1")
+
+        self.assertNotIn("old_sid", self.registry)
+        self.assertEqual(self.registry.games_of("new_sid"), {"game_a": "uuid1"})
+
+    def test_unbind_last_game_drops_sid(self):
+        self.registry.bind("sid1", "game_a", "uuid1")
+        self.registry.unbind("sid1", "game_a")
+        self.registry.unbind("sid1", "game_a")
+
+        self.assertEqual(len(self.registry), 0)
+        self.assertEqual(self.registry.games_of("sid1"), {})
+
+    def test_forget_game_unbinds_every_player(self):
+        game = TicTacToeGame("game_a")
+        game.add_player(TicTacToePlayer("Player1", "sid1", "game_a", "X", uuid="uuid1"))
+        game.add_player(TicTacToePlayer("Player2", "sid2", "game_a", "O", uuid="uuid2"))
+        self.registry.bind("sid1", "game_a", "uuid1")
+        self.registry.bind("sid2", "game_a", "uuid2")
+        self.registry.bind("sid2", "game_b", "uuid3")
+
+        self.registry.forget_game(game)
+
+        self.assertNotIn("sid1", self.registry)
+        self.assertEqual(self.registry.games_of("sid2"), {"game_b": "uuid3"})
+
+    def test_forget_game_id_unbinds_sids_players_have_left(self):
+        self.registry.bind("sid1", "game_a", "uuid1")
+        self.registry.rebind("sid1", "sid3", "game_a", "uuid1")
+        self.registry.bind("sid2", "game_a", "uuid2")
+        self.registry.bind("sid2", "game_b", "uuid3")
+        self.registry.pop("sid2")
+        self.registry.bind("sid2", "game_b", "uuid3")
+
+        self.registry.forget_game_id("game_a")
+
+        self.assertNotIn("sid3", self.registry)
+        self.assertEqual(self.registry.games_of("sid2"), {"game_b": "uuid3"})
+        self.registry.forget_game_id("game_b")
+        self.assertEqual(len(self.registry), 0)
+
+if __name__ == "__main__":
+    unittest.main()
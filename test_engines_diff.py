@@ -0,0 +1,34 @@
+import random
+import unittest
+from benchmarks import engines
+from benchmarks import reference_engines as reference
+from games.connect4_game import Connect4Game
+from games.tictactoe_game import TicTacToeGame
+
+class TestEnginesAgainstReference(unittest.TestCase):
+    def test_random_games_agree(self):
+        played, divergence = engines._diff_worker(seed=7, games=300)
+        self.assertEqual(divergence, "")
+        self.assertEqual(played, 300)
+
+    def test_drawn_games_agree(self):
+        for cls, reference_cls, moves in (
+            (Connect4Game, reference.ReferenceConnect4, engines.CONNECT4_DRAW),
+            (TicTacToeGame, reference.ReferenceTicTacToe, engines.TICTACTOE_DRAW),
+        ):
+            game = engines.played(cls, moves)
+            oracle = engines.reference_played(reference_cls, moves)
+            self.assertEqual(game.state.board, oracle.board)
+            self.assertEqual(game.check_winner(), "draw")
+            self.assertEqual(oracle.check_winner(), "draw")
+
+    def test_divergence_is_reported(self):
+        # A reference with a different error message has to be caught
+        class Broken(reference.ReferenceConnect4):
+            INVALID_MOVE = "broken"
+        rng = random.Random(1)
+        divergences = [engines.diff_board_game(rng, Connect4Game, Broken, 7, engines.connect4_legal) for _ in range(50)]
+        self.assertTrue(any(divergences))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from datetime import datetime, timedelta
+from server.expiry import GameExpiry
+from games.tictactoe_game import TicTacToeGame
+from utils import check_game_timeout
+
+class TestGameExpiry(unittest.TestCase):
+    def setUp(self):
+        self.timeout = timedelta(minutes=10)
+        self.expiry = GameExpiry(self.timeout)
+        self.now = datetime(2024, 1, 1, 12, 0, 0)
+        self.games = {}
+        for game_id in ("idle", "active"):
+            game = TicTacToeGame(game_id)
+            game.created_at = game.last_played_at = self.now
+            self.games[game_id] = game
+            self.expiry.schedule(game)
+
+    def test_nothing_expires_before_timeout(self):
+        expired = self.expiry.pop_expired(self.games, self.now + timedelta(minutes=5))
+        self.assertEqual(expired, [])
+        self.assertEqual(len(self.expiry), 2)
+
+    def test_played_game_is_rescheduled(self):
+        self.games["active"].last_played_at = self.now + timedelta(minutes=8)
+
+        expired = self.expiry.pop_expired(self.games, self.now + timedelta(minutes=11))
+        self.assertEqual([g.game_id for g in expired], ["idle"])
+        self.assertEqual(self.expiry.next_deadline(), self.now + timedelta(minutes=18))
+
+        expired = self.expiry.pop_expired(self.games, self.now + timedelta(minutes=18))
+        self.assertEqual([g.game_id for g in expired], ["active"])
+
+    def test_removed_games_are_dropped_lazily(self):
+        del self.games["idle"]
+        self.expiry.schedule(self.games["active"])
+
+        expired = self.expiry.pop_expired(self.games, self.now + timedelta(minutes=10))
+        self.assertEqual([g.game_id for g in expired], ["active"])
+        self.assertEqual(len(self.expiry), 0)
+
+class TestCheckGameTimeout(unittest.IsolatedAsyncioTestCase):
+    async def test_games_removed_while_notifying(self):
+        expiry = GameExpiry(timedelta(minutes=10))
+        games = {}
+        for game_id in ("a", "b", "c"):
+            game = TicTacToeGame(game_id)
+            game.last_played_at = datetime.now() - timedelta(minutes=11)
+            games[game_id] = game
+            expiry.schedule(game)
+
+        notified = []
+
+        async def notify(game):
+            notified.append(game.game_id)
+            # A quit handled while the timeout was being sent
+            games.pop("b", None)
+
+        expired = await check_game_timeout(games, expiry, notify=notify)
+        self.assertEqual(sorted(g.game_id for g in expired), ["a", "b", "c"])
+        self.assertEqual(sorted(notified), ["a", "b", "c"])
+        self.assertEqual(games, {})
+
+if __name__ == "__main__":
+    unittest.main()
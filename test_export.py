@@ -0,0 +1,126 @@
+import glob
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+import pyarrow as pa
+import pyarrow.parquet as pq
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from games.tictactoe_game import TicTacToeGame
+from server.export import SCHEMA, GameExporter, game_row
+from fixtures import CONNECT4_WIN, finished_connect4, seated
+
+START = datetime(2024, 5, 1, 12, 0, 0)
+
+class TestGameRow(unittest.TestCase):
+    def test_connect4_win(self):
+        game = finished_connect4("g")
+        row = game_row(game, START)
+        self.assertEqual((row["outcome"], row["winner"]), ("win", 0))
+        self.assertEqual(row["moves"], CONNECT4_WIN)
+        self.assertEqual(row["movers"], [0, 1, 0, 1, 0, 1, 0])
+        self.assertEqual([p["name"] for p in row["players"]], ["p0", "p1"])
+        self.assertEqual(row["finished_at"], int(START.timestamp() * 1000))
+
+    def test_tictactoe_draw(self):
+        game = TicTacToeGame("g")
+        seated(game)
+        for cell in [0, 1, 2, 4, 3, 5, 7, 6, 8]:
+            game.play(game.state.who_will_play, cell)
+        self.assertEqual((game_row(game, START)["outcome"], game_row(game, START)["winner"]), ("draw", None))
+
+    def test_guess_win_by_second_seat(self):
+        game = GuessSecretGame("g")
+        a, b = seated(game)
+        game.set_secret(a, "1234")
+        game.set_secret(b, "5678")
+        game.play(a.uuid, "5687")
+        game.play(b.uuid, "1234")
+        row = game_row(game, START)
+        self.assertEqual((row["outcome"], row["winner"], row["moves"], row["movers"]),
+                         ("win", 1, [5687, 1234], [0, 1]))
+
+    def test_quit_and_timeout(self):
+        game = Connect4Game("g")
+        a, b = seated(game)
+        game.play(a.uuid, 3)
+        self.assertEqual(game_row(game, START)["outcome"], "timeout")
+        game.leave(b)
+        row = game_row(game, START, [b])
+        self.assertEqual(row["outcome"], "abandoned")
+        self.assertEqual([p["left"] for p in row["players"]], [False, True])
+
+class TestGameExporter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def export(self, count, **options):
+        exporter = GameExporter(self.directory, flush_interval=0.01, **options)
+        exporter.start()
+        for i in range(count):
+            exporter.append(finished_connect4(f"g{i}"), finished_at=START + timedelta(minutes=i))
+        exporter.close()
+        return exporter
+
+    def test_rotates_into_parquet_row_groups(self):
+        self.export(25, batch_size=5, rows_per_file=10, row_group_size=10)
+        files = sorted(glob.glob(os.path.join(self.directory, "*")))
+        self.assertEqual(len(files), 3)
+        self.assertTrue(all(path.endswith(".parquet") for path in files))
+        self.assertEqual(pq.ParquetFile(files[0]).metadata.num_row_groups, 1)
+        table = pa.concat_tables([pq.read_table(path) for path in files])
+        self.assertEqual(table.column("game_id").to_pylist(), [f"g{i}" for i in range(25)])
+
+    def test_range_reads_only_matching_rows(self):
+        exporter = self.export(25, batch_size=5, rows_per_file=10)
+        batches = list(exporter.batches(START + timedelta(minutes=7), START + timedelta(minutes=13)))
+        ids = [game_id for batch in batches for game_id in batch.column("game_id").to_pylist()]
+        self.assertEqual(ids, [f"g{i}" for i in range(7, 13)])
+
+    def test_stream_formats(self):
+        exporter = self.export(12, batch_size=4)
+        arrow = b"".join(exporter.stream(until=START + timedelta(minutes=5)))
+        self.assertEqual(pa.ipc.open_stream(arrow).read_all().num_rows, 5)
+        parquet = b"".join(exporter.stream(format="parquet"))
+        self.assertEqual(pq.read_table(pa.BufferReader(parquet)).num_rows, 12)
+        empty = b"".join(exporter.stream(since=START + timedelta(days=1)))
+        self.assertEqual(pa.ipc.open_stream(empty).read_all().num_rows, 0)
+
+    def test_bad_batch_is_skipped(self):
+        exporter = GameExporter(self.directory, batch_size=1, flush_interval=0.01)
+        exporter.start()
+        exporter.append(finished_connect4("g0"), finished_at=START)
+        # A row the schema cannot hold
+        exporter._queue.put({"game_id": "bad", "winner": 1000})
+        exporter.append(finished_connect4("g1"), finished_at=START + timedelta(minutes=1))
+        exporter.close()
+        self.assertEqual(exporter.errors, 1)
+        ids = [game_id for batch in exporter.batches() for game_id in batch.column("game_id").to_pylist()]
+        self.assertEqual(ids, ["g0", "g1"])
+
+    def test_torn_stream_is_sealed_on_start(self):
+        # What a crash mid-batch leaves behind
+        path = os.path.join(self.directory, "games-1.arrows")
+        with pa.OSFile(path, "wb") as sink:
+            writer = pa.ipc.new_stream(sink, SCHEMA)
+            for batch in range(2):
+                rows = [game_row(finished_connect4(f"g{batch}{i}"), START) for i in range(3)]
+                writer.write_batch(pa.RecordBatch.from_pylist(rows, SCHEMA))
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:-10])
+
+        exporter = GameExporter(self.directory)
+        exporter.start()
+        exporter.close()
+        self.assertEqual(exporter.files(), [(1, path[:-len(".arrows")] + ".parquet")])
+        self.assertEqual(pq.read_table(exporter.files()[0][1]).num_rows, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -53,5 +53,37 @@ class TestGuessSecretGame(unittest.TestCase):
             self.game.play(self.player1.uuid, "1123") # Reused digit
         self.assertEqual(str(context.exception), "Guess must be a 4 digit number and every digit must be different")
 
+    def test_history_entries_are_numbered(self):
+        self.player1.secret = "1234"
+        self.player2.secret = "5678"
+        self.game.play(self.player1.uuid, "1357")
+        self.game.play(self.player2.uuid, "2468")
+
+        self.assertEqual([entry["seq"] for entry in self.game.turn_history], [1, 2])
+        self.assertEqual(self.game.history_since(1), self.game.turn_history[1:])
+        self.assertEqual(self.game.history_since(2), [])
+        self.assertEqual(len(self.game.history_since(-5)), 2)
+
+    def test_models_have_no_instance_dict(self):
+        for obj in (self.game, self.game.state, self.player1, self.game.turn_history):
+            self.assertFalse(hasattr(obj, "__dict__"), type(obj).__name__)
+        with self.assertRaises(AttributeError):
+            self.player1.nickname = "P1"
+
+    def test_player_index_lookups(self):
+        self.assertIs(self.game.get_player(self.player1.uuid), self.player1)
+        self.assertIs(self.game.get_player_by_sid("sid2"), self.player2)
+        self.assertEqual(self.game.get_player_and_opponent(self.player2.uuid), (self.player2, self.player1))
+        self.assertEqual(self.game.get_player_and_opponent("unknown"), (None, None))
+
+    def test_player_index_follows_sid_change_and_removal(self):
+        self.game.set_player_sid(self.player1, "sid9")
+        self.assertIsNone(self.game.get_player_by_sid("sid1"))
+        self.assertIs(self.game.get_player_by_sid("sid9"), self.player1)
+
+        self.game.remove_player(self.player2)
+        self.assertIsNone(self.game.get_player(self.player2.uuid))
+        self.assertEqual(self.game.get_player_and_opponent(self.player1.uuid), (self.player1, None))
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
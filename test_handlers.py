@@ -0,0 +1,183 @@
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from itertools import count
+from unittest import mock
+from fastapi.testclient import TestClient
+from server.archive import GameArchive
+from server.connections import ConnectionRegistry
+from server.move_broadcast import MoveBroadcast
+from server.spectators import SpectatorFanout
+from fixtures import CONNECT4_WIN, RecordingServer
+
+# Runs the Socket.IO handlers of main.py with everything they emit recorded,
+# and its HTTP routes through a test client.
+# main is imported once with its move log and export in a temporary directory;
+# every test gets its own registries and client address.
+
+main = None
+server = None
+data_dir = None
+addresses = count(1)
+
+
+def setUpModule():
+    global main, server, data_dir
+    data_dir = tempfile.TemporaryDirectory()
+    with mock.patch.dict(os.environ, {"MOVE_LOG_DIR": os.path.join(data_dir.name, "move_log"),
+                                      "EXPORT_DIR": os.path.join(data_dir.name, "export")}):
+        import main
+    server = main.sio
+
+
+def tearDownModule():
+    main.move_log.close()
+    main.exporter.close()
+    main.logs.shutdown()
+    data_dir.cleanup()
+
+
+class TestHandlers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sio = RecordingServer()
+        spectators = SpectatorFanout(self.sio)
+        for patch in (mock.patch.object(main, "sio", self.sio),
+                      mock.patch.object(main.guard, "sio", self.sio),
+                      mock.patch.object(main, "spectators", spectators),
+                      mock.patch.object(main, "moves", MoveBroadcast(self.sio, spectators)),
+                      mock.patch.object(main, "connections", ConnectionRegistry()),
+                      mock.patch.object(main, "archive", GameArchive(main.GAME_IDLE_TIMEOUT, main.ARCHIVE_CACHE_SIZE)),
+                      mock.patch.dict(main.games, clear=True)):
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.address = f"10.0.0.{next(addresses)}"
+
+    def received(self, event, room):
+        return [data for name, data, to, _ in self.sio.sent if name == event and to == room]
+
+    def errors(self):
+        return [(to, data["message"]) for name, data, to, _ in self.sio.sent if name == "error"]
+
+    async def connect(self, *sids):
+        for sid in sids:
+            # The guard is shared by every test, its buckets for the sid are not
+            self.addCleanup(main.guard.forget, sid)
+            self.assertIsNot(await main.connect(sid, {"asgi.scope": {"client": (self.address, 5000)}}), False)
+
+    async def start(self, game_type, negotiate=None):
+        # s1 creates the game and reconnects from the game page, s2 joins it
+        await self.connect("s1", "s2")
+        await main.create_game("s1", {"username": "alice", "game_type": game_type, **(negotiate or {})})
+        created, = self.received("game_created", "s1")
+        game_id = created["gameId"]
+        await main.reconnect_player("s1", {"gameId": game_id, "username": "alice", "uuid": created["uuid"],
+                                           "lastSeq": 0, **(negotiate or {})})
+        await main.join_game("s2", {"gameId": game_id, "username": "bob"})
+        joined, = self.received("game_joined", "s2")
+        return game_id, [("s1", "alice", created["uuid"]), ("s2", "bob", joined["uuid"])]
+
+    async def test_handlers_are_registered_through_every_wrapper(self):
+        for name in ("create_game", "join_game", "submit_connect4_move", "reconnect_player", "quit_game"):
+            self.assertIs(server.handlers["/"][name], getattr(main, name))
+            self.assertEqual(getattr(main, name).__name__, name)
+        self.assertIn("join_game", main.router.handlers)
+
+        await self.connect("s1")
+        rejected = main.metrics.rejected_events.values.get(("create_game", "payload"), 0)
+        await main.create_game("s1", {"username": {"nested": "alice"}})
+        self.assertEqual(self.errors(), [("s1", "Invalid payload")])
+        self.assertEqual(main.metrics.rejected_events.values[("create_game", "payload")], rejected + 1)
+        self.assertEqual(main.games, {})
+
+    async def test_connect4_game_is_archived_and_rejoined(self):
+        game_id, players = await self.start("connect4", {"moveResult": True})
+        self.assertEqual(self.sio.rooms[game_id], {"s1", "s2"})
+        for turn, col in enumerate(CONNECT4_WIN):
+            sid, name, uuid = players[turn % 2]
+            await main.submit_connect4_move(sid, {"gameId": game_id, "username": name, "uuid": uuid, "col": col})
+        self.assertEqual(self.errors(), [])
+
+        # alice negotiated one move_result per move, bob still gets the old events
+        moves = [(data, skip) for name, data, to, skip in self.sio.sent if name == "move_result"]
+        self.assertEqual([data["seq"] for data, _ in moves], list(range(1, len(CONNECT4_WIN) + 1)))
+        self.assertEqual({tuple(skip) for _, skip in moves}, {("s2",)})
+        self.assertEqual(moves[-1][0]["winner"], "alice")
+        self.assertEqual(len(self.received("board_delta", "s2")), len(CONNECT4_WIN))
+
+        # The finished game left the live registry for the archive
+        self.assertNotIn(game_id, main.games)
+        self.assertIn(game_id, main.archive)
+        self.assertEqual(len(main.connections), 0)
+        sid, name, uuid = players[0]
+        await main.submit_connect4_move(sid, {"gameId": game_id, "username": name, "uuid": uuid, "col": 3})
+        self.assertEqual(self.errors(), [("s1", "Game is already over")])
+
+        await main.quit_game(sid, {"gameId": game_id, "username": name, "uuid": uuid})
+        self.assertEqual(len(self.errors()), 1)
+        self.assertEqual(self.sio.rooms[game_id], {"s2"})
+
+        await self.connect("s3")
+        sid, name, uuid = players[1]
+        await main.reconnect_player("s3", {"gameId": game_id, "username": name, "uuid": uuid, "lastSeq": 5})
+        reconnected, = self.received("reconnected", "s3")
+        self.assertTrue(reconnected["state"]["is_game_over"])
+        self.assertEqual(len(reconnected["history"]), len(CONNECT4_WIN) - 5)
+        self.assertEqual(main.connections.games_of("s3"), {game_id: uuid})
+
+        main.archive.ttl = timedelta(0)
+        await main.expire_archive()
+        self.assertNotIn(game_id, main.archive)
+        self.assertEqual(len(main.connections), 0)
+        self.assertEqual(len(self.received("game_timeout", game_id)), 1)
+
+    async def test_full_game_turns_away_a_third_player(self):
+        game_id, players = await self.start("tictactoe")
+        await self.connect("s3")
+        await main.join_game("s3", {"gameId": game_id, "username": "carol"})
+        self.assertEqual(self.errors(), [("s3", "Game is full")])
+        self.assertEqual(self.sio.rooms[game_id], {"s1", "s2"})
+        self.assertNotIn("s3", main.connections)
+        self.assertEqual([player.name for player in main.games[game_id].players], ["alice", "bob"])
+
+    async def test_guess_history_resumes_from_last_seq(self):
+        game_id, players = await self.start("guess_secret")
+        base = {"gameId": game_id}
+        for (sid, name, uuid), secret in zip(players, ("1234", "5678")):
+            await main.submit_secret(sid, {**base, "username": name, "uuid": uuid, "secret": secret})
+        for turn, guess in enumerate(("9876", "4321", "5678")):
+            sid, name, uuid = players[turn % 2]
+            await main.submit_guess(sid, {**base, "username": name, "uuid": uuid, "guess": guess})
+        self.assertEqual(self.errors(), [])
+        self.assertIn(game_id, main.archive)
+
+        await self.connect("s3")
+        sid, name, uuid = players[1]
+        await main.reconnect_player("s3", {**base, "username": name, "uuid": uuid, "lastSeq": 1})
+        reconnected, = self.received("reconnected", "s3")
+        self.assertEqual([entry["guess"] for entry in reconnected["history"]], ["4321", "5678"])
+
+        await main.request_history("s3", {**base, "lastSeq": 2})
+        self.assertEqual([entry["guess"] for entry in self.received("append_history", "s3")[0]], ["5678"])
+        await main.request_history("s3", {**base, "lastSeq": "2"})
+        self.assertEqual(self.errors(), [("s3", "Invalid last sequence")])
+
+class TestPages(unittest.TestCase):
+    def setUp(self):
+        # Without the context manager the startup hooks do not run
+        self.client = TestClient(main.app)
+
+    def test_head_matches_get(self):
+        for url in ("/", "/static/js/game.js", "/static/css/styles.css"):
+            got = self.client.get(url)
+            head = self.client.head(url)
+            self.assertEqual((got.status_code, head.status_code), (200, 200))
+            self.assertEqual(head.content, b"")
+            for header in ("etag", "content-length", "content-type", "cache-control"):
+                self.assertEqual(head.headers[header], got.headers[header])
+
+            revalidated = self.client.head(url, headers={"If-None-Match": got.headers["etag"]})
+            self.assertEqual(revalidated.status_code, 304)
+
+if __name__ == "__main__":
+    unittest.main()
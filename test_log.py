@@ -0,0 +1,60 @@
+import io
+import json
+import logging
+import unittest
+from server import log as logs
+
+class TestEventLogging(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.log = logs.get_logger("test")
+
+    def tearDown(self):
+        logs.shutdown()
+        logs._sample_rates.clear()
+        logging.getLogger(logs.ROOT).setLevel(logging.NOTSET)
+
+    def lines(self):
+        logs.shutdown()
+        return [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_writes_json_lines_with_fields(self):
+        logs.configure(level="DEBUG", stream=self.stream)
+        self.log.info("game_created", game_id="g1", type="connect4")
+        [entry] = self.lines()
+        self.assertEqual(entry["event"], "game_created")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "game.test")
+        self.assertEqual((entry["game_id"], entry["type"]), ("g1", "connect4"))
+
+    def test_level_control(self):
+        logs.configure(level="INFO", stream=self.stream)
+        self.log.debug("move", game_id="g1")
+        self.log.warning("bot_move_rejected", game_id="g1")
+        self.assertEqual([entry["event"] for entry in self.lines()], ["bot_move_rejected"])
+
+    def test_sampling_per_event(self):
+        logs.configure(level="DEBUG", sample="move=0,connect=1", stream=self.stream)
+        for _ in range(100):
+            self.log.debug("move")
+        self.log.debug("connect")
+        self.log.debug("disconnect")
+        self.assertEqual([entry["event"] for entry in self.lines()], ["connect", "disconnect"])
+
+    def test_sampled_out_events_are_not_built(self):
+        logs.configure(level="DEBUG", sample="move=0", stream=self.stream)
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        logging.getLogger("game").addHandler(handler)
+        self.log.debug("move")
+        self.log.debug("kept")
+        self.assertEqual([record.getMessage() for record in records], ["kept"])
+
+    def test_rejects_bad_sample_rates(self):
+        with self.assertRaises(ValueError):
+            logs.parse_sample_rates("move=2")
+        self.assertEqual(logs.parse_sample_rates(" move=0.5, ,connect=0"), {"move": 0.5, "connect": 0.0})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import asyncio
+import unittest
+from socketio import packet
+from server.metrics import Metric, Registry, ServerMetrics
+
+class TestRegistry(unittest.TestCase):
+    def test_counter_and_histogram_render(self):
+        registry = Registry()
+        errors = registry.counter("errors_total", "Errors", ("message",))
+        latency = registry.histogram("latency_seconds", "Latency", ("event",), buckets=(0.1, 1.0))
+        errors.inc('Say "hi"')
+        errors.inc('Say "hi"')
+        latency.observe(0.05, "move")
+        latency.observe(0.1, "move")
+        latency.observe(5, "move")
+
+        text = registry.render()
+        self.assertIn('errors_total{message="Say \\"hi\\""} 2', text)
+        self.assertIn('latency_seconds_bucket{event="move",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{event="move",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{event="move",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_count{event="move"} 3', text)
+        self.assertTrue(text.endswith("\n"))
+
+    def test_metric_without_samples_fails_when_created(self):
+        class Broken(Metric):
+            TYPE = "gauge"
+
+        with self.assertRaises(TypeError):
+            Broken("broken", "Has no samples")
+
+class TestServerMetrics(unittest.TestCase):
+    def test_timed_drops_undeclared_arguments(self):
+        metrics = ServerMetrics()
+        seen = []
+
+        async def disconnect(sid):
+            seen.append(sid)
+
+        asyncio.run(metrics.timed(disconnect)("sid", "client disconnect"))
+        self.assertEqual(seen, ["sid"])
+        self.assertIn('game_handler_latency_seconds_count{event="disconnect"} 1', metrics.render())
+
+    def test_timed_counts_exceptions(self):
+        metrics = ServerMetrics()
+
+        async def broken(sid, data):
+            raise KeyError(data)
+
+        with self.assertRaises(KeyError):
+            asyncio.run(metrics.timed(broken)("sid", "x"))
+        self.assertEqual(metrics.handler_errors.values[("broken",)], 1)
+
+    def test_packet_class_counts_events_only(self):
+        metrics = ServerMetrics()
+        Packet = metrics.packet_class()
+        encoded = Packet(packet.EVENT, data=["board_delta", {"cell": 3}]).encode()
+        Packet(packet.CONNECT, data={"sid": "x"}).encode()
+
+        self.assertEqual(metrics.emits.values, {("board_delta",): 1})
+        self.assertEqual(metrics.emit_bytes.values[("board_delta",)], len(encoded))
+
+        header, attachment = Packet(packet.EVENT, data=["move_result", b"\x93\x01\x02\x03"]).encode()
+        self.assertEqual(metrics.emit_bytes.values[("move_result",)], len(header) + len(attachment))
+
+    def test_live_games_by_type_and_status(self):
+        from games.connect4_game import Connect4Game
+        metrics = ServerMetrics()
+        metrics.watch_games({"a": Connect4Game("a"), "b": Connect4Game("b")})
+        self.assertIn('game_live_games{type="connect4",status="Waiting for players"} 2', metrics.render())
+
+    def test_writer_health(self):
+        class Writer:
+            alive = False
+            errors = 3
+
+        metrics = ServerMetrics()
+        metrics.watch_writers({"move_log": Writer()})
+        rendered = metrics.render()
+        self.assertIn('game_writer_up{writer="move_log"} 0', rendered)
+        self.assertIn("# TYPE game_writer_errors_total counter", rendered)
+        self.assertIn('game_writer_errors_total{writer="move_log"} 3', rendered)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from server.move_broadcast import MoveBroadcast
+from fixtures import RecordingServer, seated
+
+class TestMoveBroadcast(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sio = RecordingServer()
+        self.moves = MoveBroadcast(self.sio)
+
+    def sent(self):
+        return [(event, room, skip_sid) for event, data, room, skip_sid in self.sio.sent]
+
+    async def _play_connect4(self, sids, col=3):
+        game = Connect4Game("g")
+        a, b = seated(game, sids)
+        winner = game.play(a.uuid, col)
+        await self.moves.send(game, a, b, col, winner)
+        return game, a, b
+
+    async def test_one_broadcast_when_everyone_negotiated(self):
+        for sid in ("s1", "s2"):
+            self.moves.negotiate(sid, {"moveResult": True})
+        game, a, b = await self._play_connect4(["s1", "s2"])
+        self.assertEqual(self.sent(), [("move_result", "g", None)])
+
+        outcome = MoveBroadcast.outcome(game, a, 3, None)
+        self.assertEqual((outcome["player"], outcome["next"], outcome["winner"]), (a.uuid, b.uuid, None))
+        self.assertEqual(outcome["delta"], game.board_delta())
+
+    async def test_legacy_events_without_negotiation(self):
+        await self._play_connect4(["s1", "s2"])
+        self.assertEqual(self.sent(), [
+            ("move_submitted", "s1", None),
+            ("guess_turn", "s2", None),
+            ("board_delta", "g", None),
+        ])
+
+    async def test_mixed_room(self):
+        self.moves.negotiate("s1", {"moveResult": True})
+        await self._play_connect4(["s1", "s2"])
+        self.assertEqual(self.sent(), [
+            ("move_result", "g", ["s2"]),
+            ("guess_turn", "s2", None),
+            ("board_delta", "s2", None),
+        ])
+
+    async def test_packed_and_json_clients(self):
+        self.moves.negotiate("s1", {"moveResult": True, "encoding": "msgpack"})
+        self.moves.negotiate("s2", {"moveResult": True})
+        await self._play_connect4(["s1", "s2"])
+        self.assertEqual(self.sent(), [("move_result", "g", ["s1"]), ("move_result", "s1", None)])
+
+        self.sio.sent.clear()
+        self.moves.negotiate("s2", {"moveResult": True, "encoding": "msgpack"})
+        await self._play_connect4(["s1", "s2"])
+        self.assertEqual(self.sent(), [("move_result", "g", None)])
+
+    async def test_forget_falls_back_to_legacy(self):
+        self.moves.negotiate("s1", {"moveResult": True})
+        self.moves.forget("s1")
+        self.moves.negotiate("s2", {})
+        self.assertEqual(self.moves.coalesced, set())
+
+    async def test_guess_game_over_against_bot(self):
+        game = GuessSecretGame("g")
+        a, bot = seated(game, ["s1", None])
+        game.set_secret(a, "1234")
+        game.set_secret(bot, "5678")
+        winner = game.play(a.uuid, "5678")
+        await self.moves.send(game, a, bot, "5678", winner)
+        self.assertEqual(self.sent(), [
+            ("game_over", "g", None),
+            ("guess_submitted", "s1", None),
+            ("append_history", "g", None),
+        ])
+        outcome = MoveBroadcast.outcome(game, a, "5678", winner)
+        self.assertEqual((outcome["winner"], outcome["next"]), ("p0", None))
+        self.assertEqual(outcome["history"], game.history_since(game.seq - 1))
+
+if __name__ == "__main__":
+    unittest.main()
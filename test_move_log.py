@@ -0,0 +1,123 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from server.move_log import MoveLog
+from games.guess_secret_game import GuessSecretGame
+from games.connect4_game import Connect4Game
+
+class TestMoveLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log = MoveLog(self.tmp.name, flush_interval=0)
+        self.log.start()
+        self.games = {}
+
+    def tearDown(self):
+        self.log.close()
+        self.tmp.cleanup()
+
+    def create(self, game, names):
+        self.games[game.game_id] = game
+        for seat, name in enumerate(names):
+            player = game.new_player(name, f"sid-{name}", seat, uuid=f"uuid-{name}")
+            game.add_player(player)
+            self.log.append("create" if seat == 0 else "join", game.game_id, type=game.GAME_TYPE,
+                            name=name, uuid=player.uuid, seat=seat)
+
+    def play(self, game, uuid, move):
+        game.play(uuid, move)
+        self.log.append("play", game.game_id, uuid=uuid, move=move)
+
+    def play_some_games(self):
+        c4 = Connect4Game("c4")
+        self.create(c4, ["a", "b"])
+        for col in [3, 3, 4, 2]:
+            self.play(c4, c4.state.who_will_play, col)
+
+        guess = GuessSecretGame("guess")
+        self.create(guess, ["c", "d"])
+        for player, secret in zip(guess.players, ["1234", "5678"]):
+            guess.set_secret(player, secret)
+            self.log.append("secret", "guess", uuid=player.uuid, secret=secret)
+        self.play(guess, "uuid-c", "5687")
+        self.play(guess, "uuid-d", "1243")
+
+    def recover(self):
+        self.log.close()
+        recovered = MoveLog(self.tmp.name).recover()
+        self.log = MoveLog(self.tmp.name, flush_interval=0)
+        self.log.start()
+        return recovered
+
+    def assertSameGames(self, recovered):
+        self.assertEqual(sorted(recovered), sorted(self.games))
+        for game_id, game in self.games.items():
+            self.assertEqual(recovered[game_id].turn_history, game.turn_history)
+            self.assertEqual(recovered[game_id].state.who_will_play, game.state.who_will_play)
+            self.assertEqual(recovered[game_id].seq, game.seq)
+
+    def test_replay_rebuilds_games(self):
+        self.play_some_games()
+        recovered = self.recover()
+
+        self.assertSameGames(recovered)
+        self.assertEqual(recovered["c4"].state.board, self.games["c4"].state.board)
+        self.assertEqual(recovered["guess"].player2.secret, "5678")
+
+    def test_snapshot_then_log(self):
+        self.play_some_games()
+        self.log.compact(self.games)
+        c4 = self.games["c4"]
+        self.play(c4, c4.state.who_will_play, 0)
+        self.log.append("drop", "guess")
+        del self.games["guess"]
+
+        recovered = self.recover()
+        self.assertSameGames(recovered)
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["moves.1.jsonl", "snapshot.1.jsonl"])
+
+    def test_torn_tail_is_ignored(self):
+        self.play_some_games()
+        self.log.close()
+        with open(os.path.join(self.tmp.name, "moves.0.jsonl"), "a") as f:
+            f.write('{"op": "play", "game": "c4", "uu')
+
+        self.assertSameGames(self.recover())
+
+    def test_appends_after_a_torn_tail_survive(self):
+        c4 = Connect4Game("c4")
+        self.create(c4, ["a", "b"])
+        self.log.close()
+        with open(os.path.join(self.tmp.name, "moves.0.jsonl"), "a") as f:
+            f.write('{"op": "play", "game": "c4", "uu')
+
+        # Restarted after the crash, then crashed again
+        self.recover()
+        self.play(c4, c4.state.who_will_play, 3)
+        guess = GuessSecretGame("guess")
+        self.create(guess, ["c", "d"])
+        self.assertSameGames(self.recover())
+
+    def test_write_errors_do_not_stop_the_writer(self):
+        c4 = Connect4Game("c4")
+        self.create(c4, ["a", "b"])
+        self.log.append("play", "c4", uuid="uuid-a", move=object())
+        time.sleep(0.05)
+        with mock.patch("server.move_log.os.fsync", side_effect=OSError(28, "No space left on device")):
+            self.log.append("drop", "missing")
+            time.sleep(0.05)
+        self.assertEqual((self.log.errors, self.log.alive), (2, True))
+        self.play(c4, "uuid-a", 3)
+
+        self.assertSameGames(self.recover())
+
+    def test_errors_are_counted(self):
+        self.log.append("play", "c4", move=object())
+        self.log.close()
+        self.assertEqual(self.log.errors, 1)
+        self.assertFalse(self.log.alive)
+
+if __name__ == "__main__":
+    unittest.main()
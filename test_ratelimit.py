@@ -0,0 +1,133 @@
+import unittest
+from server.ratelimit import EventGuard, TokenBuckets, address_of, check_payload
+from fixtures import RecordingServer
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def environ(address, forwarded=None):
+    found = {"REMOTE_ADDR": "127.0.0.1", "asgi.scope": {"client": (address, 5000)}}
+    if forwarded:
+        found["HTTP_X_FORWARDED_FOR"] = forwarded
+    return found
+
+class TestTokenBuckets(unittest.TestCase):
+    def test_burst_then_rate(self):
+        clock = Clock()
+        buckets = TokenBuckets(rate=2, burst=3, clock=clock)
+        self.assertEqual([buckets.take("a") for _ in range(4)], [True, True, True, False])
+        self.assertTrue(buckets.take("b"))
+        clock.now = 0.5
+        self.assertEqual([buckets.take("a") for _ in range(2)], [True, False])
+        clock.now = 100
+        self.assertFalse(buckets.take("a", cost=4))
+        self.assertTrue(buckets.take("a", cost=3))
+
+    def test_sweep_drops_refilled_buckets(self):
+        clock = Clock()
+        buckets = TokenBuckets(rate=1, burst=2, clock=clock)
+        buckets.take("a", cost=2)
+        buckets.take("b", cost=1)
+        clock.now = 1
+        self.assertEqual(buckets.sweep(), 1)
+        self.assertEqual(("a" in buckets, "b" in buckets), (True, False))
+
+class TestChecks(unittest.TestCase):
+    def test_address(self):
+        self.assertEqual(address_of(environ("10.0.0.1")), "10.0.0.1")
+        self.assertEqual(address_of(environ("10.0.0.1", "1.2.3.4, 5.6.7.8")), "10.0.0.1")
+        self.assertEqual(address_of(environ("10.0.0.1", "1.2.3.4, 5.6.7.8"), trust_forwarded=True), "5.6.7.8")
+        self.assertEqual(address_of({"REMOTE_ADDR": "127.0.0.1"}), "127.0.0.1")
+
+    def test_payload(self):
+        self.assertTrue(check_payload({"gameId": "abc", "col": 3, "moveResult": True, "lastSeq": None}))
+        self.assertFalse(check_payload(None))
+        self.assertFalse(check_payload(["gameId"]))
+        self.assertFalse(check_payload({"gameId": {"nested": 1}}))
+        self.assertFalse(check_payload({"username": "x" * 1000}))
+        self.assertFalse(check_payload({str(i): i for i in range(20)}))
+
+class TestEventGuard(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.sio = RecordingServer()
+        self.rejected = []
+        self.guard = EventGuard(self.sio, rate=1, burst=2, address_rate=1, address_burst=5, strikes=3,
+                                costs={"create_game": 2}, on_reject=lambda *labels: self.rejected.append(labels),
+                                clock=self.clock)
+        self.calls = []
+
+        async def submit_guess(sid, data):
+            self.calls.append((sid, data))
+
+        async def create_game(sid, data):
+            self.calls.append((sid, data))
+
+        self.submit_guess = self.guard.guard(submit_guess)
+        self.create_game = self.guard.guard(create_game)
+
+    def errors(self):
+        return [data["message"] for event, data, room, _ in self.sio.sent if event == "error"]
+
+    async def test_rejects_before_the_handler(self):
+        self.assertTrue(self.guard.connect("s1", environ("10.0.0.1")))
+        await self.submit_guess("s1", {"guess": "1234"})
+        await self.submit_guess("s1", {"guess": "x" * 1000})
+        await self.submit_guess("s1", {"guess": "5678"})
+        await self.submit_guess("s1", {"guess": "9012"})
+        self.assertEqual(self.calls, [("s1", {"guess": "1234"}), ("s1", {"guess": "5678"})])
+        self.assertEqual(self.errors(), ["Invalid payload", "Too many requests"])
+        self.assertEqual(self.rejected, [("submit_guess", "payload"), ("submit_guess", "rate")])
+        self.assertEqual(self.submit_guess.__name__, "submit_guess")
+
+    async def test_costs_and_shared_address(self):
+        self.guard.connect("s1", environ("10.0.0.1"))
+        self.guard.connect("s2", environ("10.0.0.1"))
+        await self.create_game("s1", {"username": "a"})
+        self.assertEqual(self.errors(), [])
+        await self.create_game("s1", {"username": "a"})
+        # Both connects and the first create_game leave one token for the address
+        await self.submit_guess("s2", {"guess": "1234"})
+        await self.submit_guess("s2", {"guess": "1234"})
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.rejected, [("create_game", "rate"), ("submit_guess", "address")])
+        self.assertFalse(self.guard.connect("s3", environ("10.0.0.1")))
+        self.assertTrue(self.guard.connect("s3", environ("10.0.0.2")))
+
+    async def test_disconnects_after_strikes(self):
+        self.guard.connect("s1", environ("10.0.0.1"))
+        for _ in range(6):
+            await self.submit_guess("s1", None)
+        self.assertEqual(len(self.errors()), 3)
+        self.assertEqual(self.sio.disconnected, ["s1"] * 3)
+        self.assertEqual(self.calls, [])
+
+        self.guard.forget("s1")
+        self.assertEqual((len(self.guard.sids), len(self.guard.strikes)), (0, 0))
+        self.clock.now = 100
+        self.guard.sweep()
+        self.assertEqual(len(self.guard.addresses), 0)
+
+    async def test_games_created_per_address(self):
+        self.guard.connect("s1", environ("10.0.0.1"))
+        self.guard.connect("s2", environ("10.0.0.1"))
+        self.guard.connect("s3", environ("10.0.0.2"))
+        live = {"g1", "g2"}
+        self.guard.created("s1", "g1")
+        self.guard.created("s1", "g2")
+        # A new connection from the same address counts the same games
+        self.guard.forget("s1")
+        self.assertEqual(self.guard.games_created("s2", live), 2)
+        self.assertEqual(self.guard.games_created("s3", live), 0)
+
+        live.discard("g1")
+        self.assertEqual(self.guard.games_created("s2", live), 1)
+        self.guard.sweep(set())
+        self.assertEqual(self.guard.games_created("s2", live), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import unittest
+from server.bus import LocalBus
+from server.sharding import ShardRouter, generate_shard_id, shard_of
+
+class TestShardRouter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = LocalBus()
+        self.calls = []
+        self.routers = [ShardRouter(self.bus, shard, 2) for shard in range(2)]
+        self.handlers = []
+        for router in self.routers:
+            self.handlers.append(self._register(router))
+        self.servers = [asyncio.create_task(router.serve()) for router in self.routers]
+        await asyncio.sleep(0)
+
+    async def asyncTearDown(self):
+        for server in self.servers:
+            server.cancel()
+
+    def _register(self, router):
+        shard = router.shard
+
+        @router.route
+        async def play(sid, data):
+            self.calls.append((shard, "play", sid, data["gameId"]))
+
+        @router.broadcast
+        async def disconnect(sid):
+            self.calls.append((shard, "disconnect", sid))
+
+        return play, disconnect
+
+    async def _settle(self):
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    def test_generated_ids_belong_to_their_shard(self):
+        for shard in range(3):
+            game_id = generate_shard_id(shard, 3)
+            self.assertEqual(shard_of(game_id, 3), shard)
+        self.assertEqual(shard_of("1700000000-ABCDEF", 4), shard_of("1700000000-ABCDEF", 4))
+
+    async def test_event_runs_on_owning_shard(self):
+        game_id = generate_shard_id(1, 2)
+        play, _ = self.handlers[0]
+
+        await play("sid1", {"gameId": game_id})
+        await self._settle()
+
+        self.assertEqual(self.calls, [(1, "play", "sid1", game_id)])
+
+    async def test_local_event_is_not_forwarded(self):
+        game_id = generate_shard_id(0, 2)
+        play, _ = self.handlers[0]
+
+        await play("sid1", {"gameId": game_id})
+        await self._settle()
+
+        self.assertEqual(self.calls, [(0, "play", "sid1", game_id)])
+
+    async def test_disconnect_reaches_every_shard(self):
+        _, disconnect = self.handlers[1]
+
+        await disconnect("sid1")
+        await self._settle()
+
+        self.assertEqual(sorted(self.calls), [(0, "disconnect", "sid1"), (1, "disconnect", "sid1")])
+
+    async def test_slow_event_only_holds_up_its_game(self):
+        router = ShardRouter(self.bus, 0, 2)
+        release = asyncio.Event()
+        started = []
+
+        @router.route
+        async def play(sid, data):
+            started.append(data["move"])
+            if data["move"] == "slow":
+                await release.wait()
+
+        server = asyncio.create_task(router.serve())
+        await asyncio.sleep(0)
+        slow_game, other_game = generate_shard_id(0, 2), generate_shard_id(0, 2)
+        for game_id, move in ((slow_game, "slow"), (slow_game, "next"), (other_game, "other")):
+            await router.forward(0, "play", "sid1", {"gameId": game_id, "move": move})
+        await self._settle()
+        self.assertEqual(started, ["slow", "other"])
+
+        release.set()
+        await self._settle()
+        self.assertEqual(started, ["slow", "other", "next"])
+        server.cancel()
+
+    def test_single_shard_leaves_handlers_alone(self):
+        router = ShardRouter()
+
+        async def handler(sid, data):
+            pass
+
+        self.assertIs(router.route(handler), handler)
+        self.assertTrue(router.owns("any-id"))
+        with self.assertRaises(ValueError):
+            ShardRouter(None, 0, 2)
+
+if __name__ == '__main__':
+    unittest.main()
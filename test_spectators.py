@@ -0,0 +1,125 @@
+import unittest
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from server.move_broadcast import MoveBroadcast
+from server.spectators import SpectatorFanout, room_of
+from fixtures import RecordingServer, seated
+
+class TestSpectators(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.sio = RecordingServer()
+        self.spectators = SpectatorFanout(self.sio)
+        self.moves = MoveBroadcast(self.sio, self.spectators)
+
+    def events(self, name):
+        return [(data, room) for event, data, room, _ in self.sio.sent if event == name]
+
+    async def test_snapshot_is_cached_and_hides_uuids(self):
+        game = Connect4Game("g")
+        a, b = seated(game, ["s1", "s2"])
+        game.play(a.uuid, 3)
+        await self.spectators.join("w1", game)
+        await self.spectators.join("w2", game)
+
+        (first, room), (second, _) = self.events("spectator_snapshot")
+        self.assertIs(first, second)
+        self.assertEqual(room, "w1")
+        self.assertEqual(self.sio.rooms[room_of("g")], {"w1", "w2"})
+        self.assertEqual(first["seq"], 1)
+        self.assertEqual(first["board"], game.board_snapshot()["board"])
+        self.assertEqual(first["nextSeat"], 1)
+        self.assertNotIn(a.uuid, repr(first))
+
+        game.play(b.uuid, 3)
+        await self.spectators.join("w3", game)
+        self.assertEqual(self.events("spectator_snapshot")[-1][0]["seq"], 2)
+
+    async def test_moves_are_batched_per_flush(self):
+        game = Connect4Game("g")
+        a, b = seated(game, ["s1", "s2"])
+        await self.spectators.join("w1", game)
+        for player, opponent, col in ((a, b, 0), (b, a, 1)):
+            winner = game.play(player.uuid, col)
+            await self.moves.send(game, player, opponent, col, winner)
+        self.assertEqual(self.events("spectator_update"), [])
+
+        await self.spectators.flush()
+        (update, room), = self.events("spectator_update")
+        self.assertEqual(room, room_of("g"))
+        self.assertEqual([move["seq"] for move in update["moves"]], [1, 2])
+        self.assertEqual([move["seat"] for move in update["moves"]], [0, 1])
+        self.assertEqual(update["status"]["nextSeat"], 0)
+        self.assertNotIn(a.uuid, repr(update))
+
+        # Nothing new, nothing sent
+        await self.spectators.flush()
+        self.assertEqual(len(self.events("spectator_update")), 1)
+
+    async def test_failed_update_is_sent_next_flush(self):
+        games = [Connect4Game("g1"), Connect4Game("g2")]
+        for game in games:
+            a, b = seated(game, ["s1", "s2"])
+            await self.spectators.join("w1", game)
+            winner = game.play(a.uuid, 0)
+            await self.moves.send(game, a, b, 0, winner)
+
+        emit = self.sio.emit
+
+        async def failing(event, data, room=None, skip_sid=None):
+            if room == room_of("g1"):
+                raise ConnectionError("gone")
+            await emit(event, data, room, skip_sid)
+
+        self.sio.emit = failing
+        with self.assertLogs("game.server.spectators", "ERROR"):
+            await self.spectators.flush()
+        self.assertEqual([room for _, room in self.events("spectator_update")], [room_of("g2")])
+
+        # A move published meanwhile goes after the one that failed
+        a, b = games[0].players
+        winner = games[0].play(b.uuid, 1)
+        await self.moves.send(games[0], b, a, 1, winner)
+        self.sio.emit = emit
+        await self.spectators.flush()
+        (update, room), = self.events("spectator_update")[1:]
+        self.assertEqual(room, room_of("g1"))
+        self.assertEqual([move["seq"] for move in update["moves"]], [1, 2])
+        self.assertIn("status", update)
+
+    async def test_unwatched_games_queue_nothing(self):
+        game = Connect4Game("g")
+        a, b = seated(game, ["s1", "s2"])
+        winner = game.play(a.uuid, 0)
+        await self.moves.send(game, a, b, 0, winner)
+        self.assertEqual((self.spectators.pending, self.spectators.dirty), ({}, {}))
+
+    async def test_guess_history_without_secrets(self):
+        game = GuessSecretGame("g")
+        a, b = seated(game, ["s1", "s2"])
+        game.set_secret(a, "1234")
+        game.set_secret(b, "5678")
+        await self.spectators.join("w1", game)
+        winner = game.play(a.uuid, "5679")
+        await self.moves.send(game, a, b, "5679", winner)
+        await self.spectators.flush()
+
+        (update, _), = self.events("spectator_update")
+        self.assertEqual(update["moves"][0]["history"][0]["seat"], 0)
+        for hidden in ("1234", "5678", a.uuid, b.uuid):
+            self.assertNotIn(hidden, repr(update))
+
+    async def test_disconnect_and_close(self):
+        game = Connect4Game("g")
+        seated(game, ["s1", "s2"])
+        await self.spectators.join("w1", game)
+        await self.spectators.join("w2", game)
+        self.spectators.forget("w1")
+        self.assertEqual(len(self.spectators), 1)
+
+        await self.spectators.close("g", "closed")
+        self.assertEqual(self.events("spectator_closed"), [({"gameId": "g", "message": "closed"}, room_of("g"))])
+        self.assertEqual((len(self.spectators), self.spectators.watchers), (0, {}))
+        self.assertNotIn(room_of("g"), self.sio.rooms)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from games.tictactoe_game import TicTacToeGame
+from games.tictactoe_board import TicTacToeBoard, CELL_LINES
 from player.tictactoe_player import TicTacToePlayer
 from errors.input_error import InputError
 from errors.mutability_error import MutabilityError
@@ -74,5 +75,57 @@ class TestTicTacToeGame(unittest.TestCase):
         self.assertTrue(self.game.state.is_game_over)
         self.assertEqual(self.game.state.winner, "draw")
 
+    def test_board_list_tracks_bitboard(self):
+        self.game.play(self.player1.uuid, 4)
+        self.game.play(self.player2.uuid, 0)
+
+        self.assertEqual(self.game.state.board[4], "X")
+        self.assertEqual(self.game.state.board[0], "O")
+        self.assertEqual(self.game.bitboard.masks, [1 << 4, 1 << 0])
+        self.assertEqual(self.game.bitboard.moves, 2)
+
+    def test_play_game_diagonal_win_for_second_player(self):
+        moves = [
+            (self.player1.uuid, 0),
+            (self.player2.uuid, 2),
+            (self.player1.uuid, 1),
+            (self.player2.uuid, 4),
+            (self.player1.uuid, 8),
+            (self.player2.uuid, 6),
+        ]
+        winner = None
+        for p, m in moves:
+            winner = self.game.play(p, m)
+
+        self.assertEqual(winner, self.player2)
+        self.assertEqual(self.game.check_winner(), "O")
+
+    def test_board_delta_carries_sequence(self):
+        self.game.play(self.player1.uuid, 4)
+        self.assertEqual(self.game.board_delta(), {"seq": 1, "cell": 4, "value": "X"})
+
+        with self.assertRaises(InputError):
+            self.game.play(self.player2.uuid, 4)
+        self.game.play(self.player2.uuid, 8)
+
+        self.assertEqual(self.game.board_delta(), {"seq": 2, "cell": 8, "value": "O"})
+        self.assertEqual(self.game.board_snapshot()["seq"], 2)
+
+
+class TestTicTacToeBoard(unittest.TestCase):
+    def test_cell_line_membership(self):
+        self.assertEqual(len(CELL_LINES[4]), 4)
+        self.assertEqual(len(CELL_LINES[0]), 3)
+        self.assertEqual(len(CELL_LINES[1]), 2)
+
+    def test_wins_only_through_completed_line(self):
+        board = TicTacToeBoard()
+        for cell in (2, 5):
+            board.play(cell, 0)
+        self.assertFalse(board.wins_through(5, 0))
+        board.play(8, 0)
+        self.assertTrue(board.wins_through(8, 0))
+        self.assertFalse(board.wins_through(8, 1))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from bots.tictactoe_table import TicTacToeTable
+from games.tictactoe_board import TicTacToeBoard
+
+class TestTicTacToeTable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.table = TicTacToeTable()
+
+    def test_empty_board_is_a_draw(self):
+        self.assertEqual(self.table.value(0, 0), 0)
+        self.assertEqual(self.table.best_moves(0, 0), list(range(9)))
+
+    def test_blocks_and_wins(self):
+        # X on 0 and 1, O on 4: O has to take 2
+        self.assertEqual(self.table.best_moves(0b11, 1 << 4), [2])
+        # X on 0 and 1, O on 3 and 4, X to move wins at 2
+        self.assertEqual(self.table.value(0b11, 0b11000), 1)
+        self.assertIn(2, self.table.best_moves(0b11, 0b11000))
+
+    def test_never_loses_against_any_opponent(self):
+        for table_slot in (0, 1):
+            self._explore(TicTacToeBoard(), 0, table_slot)
+
+    def _explore(self, board, slot, table_slot):
+        if slot == table_slot:
+            cells = self.table.best_moves(board.masks[0], board.masks[1])
+        else:
+            cells = [cell for cell in range(9) if board.can_play(cell)]
+        for cell in cells:
+            board.play(cell, slot)
+            if board.wins_through(cell, slot):
+                self.assertEqual(slot, table_slot)
+            elif not board.is_full():
+                self._explore(board, slot ^ 1, table_slot)
+            board.undo(cell, slot)
+
+    def test_dump_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tictactoe.bin")
+            TicTacToeTable.load(path)
+            self.assertTrue(os.path.exists(path))
+            self.assertEqual(TicTacToeTable.load(path).table, self.table.table)
+
+if __name__ == '__main__':
+    unittest.main()
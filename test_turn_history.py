@@ -0,0 +1,45 @@
+import unittest
+from games.connect4_game import Connect4Game
+from games.guess_secret_game import GuessSecretGame
+from player.connect4_player import Connect4Player
+from player.guess_player import GuessPlayer
+
+class TestTurnHistory(unittest.TestCase):
+    def test_connect4_entries_are_built_from_cells(self):
+        game = Connect4Game("game_c4")
+        player1 = Connect4Player("Player1", "sid1", "game_c4", "Red", uuid="uuid1")
+        player2 = Connect4Player("Player2", "sid2", "game_c4", "Yellow", uuid="uuid2")
+        game.add_player(player1)
+        game.add_player(player2)
+        game.play("uuid1", 2)
+        game.play("uuid2", 2)
+
+        self.assertEqual(game.turn_history[-1], {
+            "seq": 2, "uuid": "uuid2", "player": "Player2", "col": 2, "row": 4, "color": "Yellow"
+        })
+        self.assertEqual(list(game.turn_history.moves), [5 * 7 + 2, 4 * 7 + 2])
+        self.assertEqual(game.turn_history.players, [player1, player2])
+
+    def test_guess_entries_round_trip(self):
+        game = GuessSecretGame("game_123")
+        player1 = GuessPlayer("Player1", "sid1", "game_123", uuid="uuid1")
+        player2 = GuessPlayer("Player2", "sid2", "game_123", uuid="uuid2")
+        game.add_player(player1)
+        game.add_player(player2)
+        player1.secret = "1234"
+        player2.secret = "5678"
+        game.play("uuid1", "5687")
+        game.play("uuid2", "9870")
+
+        self.assertEqual(game.turn_history.to_list(), [
+            {"seq": 1, "uuid": "uuid1", "player": "Player1", "guess": "5687",
+             "result": False, "correct_positions": 2, "correct_digits": 2},
+            {"seq": 2, "uuid": "uuid2", "player": "Player2", "guess": "9870",
+             "result": False, "correct_positions": 0, "correct_digits": 0},
+        ])
+        self.assertEqual(len(game.turn_history), 2)
+        with self.assertRaises(IndexError):
+            game.turn_history[2]
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,22 +1,30 @@
 from datetime import datetime, timedelta
-from typing import List, Union, Dict
+from typing import List, Union, Dict, Callable, Awaitable
 from games.game import Game
+from server.connections import ConnectionRegistry
+from server.expiry import GameExpiry
+from server.log import get_logger
 import random
 import time
 import string
 
+log = get_logger(__name__)
 
-def check_game_timeout(games: Dict[str, Game], timeout: timedelta):
-    now = datetime.now()
-    print(f"Checking game timeout at {now}")
-    print(f"Current games: {list(games.keys())}")
-    for game_id, game in list(games.items()):
-        print(f"Checking game {game}")
-        if now - game.last_played_at > timeout:
-            del games[game_id]
-            print(f"Game {game_id} is over due to timeout")
-    print("-"*10)
-    print(f"after check games: {list(games.keys())}")
+
+async def check_game_timeout(games: Dict[str, Game], expiry: GameExpiry, connections: ConnectionRegistry = None,
+                             notify: Callable[[Game], Awaitable[None]] = None) -> List[Game]:
+    expired = expiry.pop_expired(games, datetime.now())
+    # Out of the registry before the first await, a quit or a finished game
+    # may otherwise remove one of them while notify runs
+    for game in expired:
+        del games[game.game_id]
+        if connections is not None:
+            connections.forget_game(game)
+    for game in expired:
+        if notify is not None:
+            await notify(game)
+        log.info("game_timeout", game_id=game.game_id, type=game.GAME_TYPE)
+    return expired
 
 
 def generate_custom_id():